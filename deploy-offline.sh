@@ -90,7 +90,7 @@ echo -e "                 ID: admin / PW: naver123"
 echo ""
 echo -e "${GREEN}HAProxy Stats:${NC}  http://localhost:8080/stats"
 echo ""
-echo -e "${GREEN}Nginx:${NC}          http://localhost:8081"
+echo -e "${GREEN}Nginx:${NC}          http://localhost (HAProxy 경유)"
 echo ""
 echo -e "${BLUE}==========================================${NC}"
 echo -e "${GREEN}✨ 배포 완료!${NC}"
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""Run every collector in one exporter process: python -m exporter"""
+
+import os
+
+from exporter.core import run
+
+
+def main():
+    modules = os.environ.get('EXPORTER_COLLECTORS', 'nfs,docker,haproxy,mysql')
+    port = int(os.environ.get('EXPORTER_PORT', '9170'))
+    run([m.strip() for m in modules.split(',') if m.strip()], port, 'Exporter')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+from collections import Counter, OrderedDict, deque
+
+# Why an alert was not forwarded
+DUPLICATE = 'duplicate'
+FLAPPING = 'flapping'
+RATE_LIMITED = 'rate_limited'
+
+# Rate limit for receivers without one of their own
+DEFAULT_ROUTE = '*'
+
+
+def parse_rate_limits(text):
+    """{receiver: alerts per minute} from text like *=60,webhook=120"""
+    limits = {}
+    for part in text.split(','):
+        name, _, rate = part.partition('=')
+        if name.strip() and rate.strip():
+            limits[name.strip()] = float(rate)
+    return limits
+
+
+class TokenBucket:
+    """`rate` alerts per minute on average, bursts of up to that many"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, per_minute, now):
+        self.rate = per_minute / 60
+        self.burst = max(per_minute, 1)
+        self.tokens = self.burst
+        self.updated = now
+
+    def take(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class AlertState:
+    """What is known about one alert fingerprint"""
+
+    __slots__ = ('status', 'recorded', 'notified', 'forwarded', 'transitions', 'flapping')
+
+    def __init__(self, flap_transitions):
+        self.status = None  # status last received
+        self.recorded = None  # monotonic time last passed to history
+        self.notified = None  # status last forwarded
+        self.forwarded = None  # monotonic time last forwarded
+        self.transitions = deque(maxlen=flap_transitions)
+        self.flapping = False
+
+
+class AlertProcessor:
+    """Decide which received alerts reach history and which are forwarded
+
+    State is tracked per fingerprint, least recently seen evicted beyond
+    `capacity`.  History sees an alert when its status changed or once
+    every `ttl` seconds while it is resent unchanged.  Forwarding is
+    stricter, so the notification sinks see roughly one alert per incident:
+
+    - a status already forwarded within `ttl` is a duplicate;
+    - an alert that changed status `flap_transitions` times within
+      `flap_window` seconds is flapping and held back until it settles,
+      when its settled status is forwarded on the next resend;
+    - each receiver (Alertmanager route) forwards at most its
+      `rate_limits` alerts per minute; what is refused is forwarded on a
+      later resend.
+
+    flap_transitions=0 turns flap detection off.
+    """
+
+    def __init__(self, ttl=300, flap_transitions=4, flap_window=600, rate_limits=None, capacity=100000):
+        self.ttl = ttl
+        self.flap_transitions = flap_transitions
+        self.flap_window = flap_window
+        self.rate_limits = rate_limits or {}
+        self.capacity = capacity
+        self.states = OrderedDict()  # fingerprint -> AlertState
+        self.buckets = {}  # receiver -> TokenBucket
+        self.suppressed = Counter()  # reason -> alerts
+        self.flapping = 0
+        self.evictions = 0
+
+    def state(self, fingerprint):
+        state = self.states.get(fingerprint)
+        if state is not None:
+            self.states.move_to_end(fingerprint)
+            return state
+        state = self.states[fingerprint] = AlertState(self.flap_transitions)
+        if len(self.states) > self.capacity:
+            _, evicted = self.states.popitem(last=False)
+            self.evictions += 1
+            if evicted.flapping:
+                self.flapping -= 1
+        return state
+
+    def allow(self, receiver, now):
+        bucket = self.buckets.get(receiver)
+        if bucket is None:
+            rate = self.rate_limits.get(receiver, self.rate_limits.get(DEFAULT_ROUTE))
+            if rate is None:
+                return True
+            bucket = self.buckets[receiver] = TokenBucket(rate, now)
+        return bucket.take(now)
+
+    def process(self, records, now):
+        """(records for history, records to forward)"""
+        history = []
+        forward = []
+        for record in records:
+            state = self.state(record['fingerprint'])
+            status = record['status']
+
+            changed = status != state.status
+            if changed:
+                if state.status is not None:
+                    state.transitions.append(now)
+                state.status = status
+            if changed or now - state.recorded >= self.ttl:
+                state.recorded = now
+                history.append(record)
+
+            transitions = state.transitions
+            flapping = (bool(transitions.maxlen) and len(transitions) == transitions.maxlen
+                        and now - transitions[0] <= self.flap_window)
+            if flapping != state.flapping:
+                state.flapping = flapping
+                self.flapping += 1 if flapping else -1
+
+            if state.notified == status and now - state.forwarded < self.ttl:
+                reason = DUPLICATE
+            elif flapping:
+                reason = FLAPPING
+            elif not self.allow(record['receiver'] or DEFAULT_ROUTE, now):
+                reason = RATE_LIMITED
+            else:
+                state.notified = status
+                state.forwarded = now
+                forward.append(record)
+                continue
+            self.suppressed[reason] += 1
+        return history, forward
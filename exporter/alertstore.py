@@ -0,0 +1,236 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS labelsets (
+    fingerprint TEXT PRIMARY KEY,
+    alertname TEXT,
+    labels TEXT NOT NULL,
+    last_seen REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS alert_labels (
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (name, value, fingerprint)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    received REAL NOT NULL,
+    fingerprint TEXT NOT NULL,
+    alertname TEXT,
+    status TEXT,
+    starts_at TEXT,
+    ends_at TEXT,
+    annotations TEXT
+);
+CREATE INDEX IF NOT EXISTS events_received ON events (received);
+CREATE INDEX IF NOT EXISTS events_fingerprint ON events (fingerprint, received, status);
+CREATE INDEX IF NOT EXISTS events_alertname ON events (alertname, received, status);
+CREATE INDEX IF NOT EXISTS labelsets_last_seen ON labelsets (last_seen);
+CREATE INDEX IF NOT EXISTS alert_labels_fingerprint ON alert_labels (fingerprint);
+"""
+
+# Query parameters that are not label matchers
+FILTERS = ('since', 'until', 'status', 'fingerprint', 'alertname', 'limit')
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10000
+
+# Rows deleted per transaction, so retention never holds the write lock for long
+PURGE_CHUNK = 10000
+
+DURATION = re.compile(r'^(\d+(?:\.\d+)?)([smhdw])$')
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_duration(text):
+    """Seconds in "3600" or "30d" """
+    text = text.strip()
+    match = DURATION.match(text)
+    if match:
+        return float(match.group(1)) * UNITS[match.group(2)]
+    return float(text)
+
+
+def parse_time(text, now=None):
+    """Unix seconds, RFC 3339, or a duration such as 7d meaning that long ago"""
+    text = text.strip()
+    match = DURATION.match(text)
+    if match:
+        return (time.time() if now is None else now) - float(match.group(1)) * UNITS[match.group(2)]
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        raise ValueError(f"cannot parse time {text!r}")
+
+
+class AlertStore:
+    """Alert history in SQLite
+
+    Each alert fingerprint's label set is stored once, with one row per
+    label in alert_labels, and every notification of it is an event row.
+    Label filters therefore resolve to a handful of fingerprints through
+    the (name, value) primary key before the events are read through the
+    (fingerprint, received) index, and a time range alone uses the
+    received index.  The database runs in WAL mode, so queries read while
+    a batch is being written.  The writer connection belongs to the
+    thread calling insert() and purge(); every querying thread gets its
+    own connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.writer = None
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # A crash may lose the last batch but never corrupts the database
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA busy_timeout=5000')
+        return connection
+
+    def open(self):
+        self.writer = self.connect()
+        self.writer.executescript(SCHEMA)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def reader(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = self.connect()
+            connection.execute('PRAGMA query_only=1')
+        return connection
+
+    def insert(self, records):
+        """Store a batch of alert records in one transaction"""
+        labelsets = {}
+        for record in records:
+            labelsets[record['fingerprint']] = record
+        writer = self.writer
+        writer.execute('BEGIN')
+        try:
+            writer.executemany(
+                'INSERT INTO labelsets (fingerprint, alertname, labels, last_seen) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (fingerprint) DO UPDATE SET last_seen = excluded.last_seen',
+                [(fingerprint, record['alertname'], json.dumps(record['labels'], sort_keys=True), record['received'])
+                 for fingerprint, record in labelsets.items()]
+            )
+            writer.executemany(
+                'INSERT OR IGNORE INTO alert_labels (name, value, fingerprint) VALUES (?, ?, ?)',
+                [(name, str(value), fingerprint)
+                 for fingerprint, record in labelsets.items() for name, value in record['labels'].items()]
+            )
+            writer.executemany(
+                'INSERT INTO events (received, fingerprint, alertname, status, starts_at, ends_at, annotations) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(record['received'], record['fingerprint'], record['alertname'], record['status'],
+                  record['startsAt'], record['endsAt'], json.dumps(record['annotations'], separators=(',', ':')))
+                 for record in records]
+            )
+        except BaseException:
+            writer.execute('ROLLBACK')
+            raise
+        writer.execute('COMMIT')
+
+    def purge(self, cutoff):
+        """Delete events received before `cutoff` and label sets not seen since; rows deleted"""
+        writer = self.writer
+        deleted = 0
+        while True:
+            count = writer.execute(
+                'DELETE FROM events WHERE id IN (SELECT id FROM events WHERE received < ? LIMIT ?)',
+                (cutoff, PURGE_CHUNK)
+            ).rowcount
+            deleted += count
+            if count < PURGE_CHUNK:
+                break
+
+        writer.execute('BEGIN')
+        try:
+            stale = [row[0] for row in writer.execute(
+                'SELECT fingerprint FROM labelsets WHERE last_seen < ?', (cutoff,)
+            )]
+            writer.executemany('DELETE FROM alert_labels WHERE fingerprint = ?', [(f,) for f in stale])
+            writer.executemany('DELETE FROM labelsets WHERE fingerprint = ?', [(f,) for f in stale])
+        except BaseException:
+            writer.execute('ROLLBACK')
+            raise
+        writer.execute('COMMIT')
+        return deleted
+
+    def query(self, params):
+        """Matching events, newest first, and how many match by status
+
+        `params` are parsed query parameters ({name: [values]}): since and
+        until bound the time received, status, fingerprint and alertname
+        match those fields, limit caps the events returned, and every other
+        name matches that alert label.  Several values of one name match
+        any of them.
+        """
+        clauses = []
+        args = []
+        now = time.time()
+        if 'since' in params:
+            clauses.append('e.received >= ?')
+            args.append(parse_time(params['since'][0], now))
+        if 'until' in params:
+            clauses.append('e.received < ?')
+            args.append(parse_time(params['until'][0], now))
+        labels = {name: values for name, values in params.items() if name not in FILTERS}
+        if 'alertname' in params and (labels or 'fingerprint' in params):
+            # Matched as a label, so every filter narrows the fingerprints and
+            # SQLite never walks all events of the alertname instead
+            labels['alertname'] = params['alertname']
+        elif 'alertname' in params:
+            clauses.append(f"e.alertname IN ({', '.join('?' * len(params['alertname']))})")
+            args.extend(params['alertname'])
+        for field in ('status', 'fingerprint'):
+            if field in params:
+                values = params[field]
+                clauses.append(f"e.{field} IN ({', '.join('?' * len(values))})")
+                args.extend(values)
+        for name, values in labels.items():
+            clauses.append('e.fingerprint IN (SELECT fingerprint FROM alert_labels WHERE name = ? '
+                           f"AND value IN ({', '.join('?' * len(values))}))")
+            args.append(name)
+            args.extend(values)
+        try:
+            limit = int(params.get('limit', [DEFAULT_LIMIT])[0])
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        limit = max(0, min(limit, MAX_LIMIT))
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+
+        connection = self.reader()
+        counts = dict(connection.execute(f'SELECT e.status, count(*) FROM events e{where} GROUP BY e.status', args))
+        rows = connection.execute(
+            'SELECT e.received, e.fingerprint, e.status, e.alertname, l.labels, e.annotations, e.starts_at, e.ends_at '
+            f'FROM events e JOIN labelsets l ON l.fingerprint = e.fingerprint{where} '
+            'ORDER BY e.received DESC LIMIT ?', args + [limit]
+        )
+        alerts = [{
+            'received': received,
+            'fingerprint': fingerprint,
+            'status': status,
+            'alertname': alertname,
+            'labels': json.loads(labels),
+            'annotations': json.loads(annotations) if annotations else {},
+            'startsAt': starts_at,
+            'endsAt': ends_at,
+        } for received, fingerprint, status, alertname, labels, annotations, starts_at, ends_at in rows]
+        return {'count': sum(counts.values()), 'statuses': counts, 'alerts': alerts}
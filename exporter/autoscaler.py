@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""Target-tracking autoscaler for the nginx replicas
+
+    python -m exporter.autoscaler                 run against Docker
+    python -m exporter.autoscaler --dry-run       decide and log, never scale
+    python -m exporter.autoscaler --record FILE   also append observations to FILE
+    python -m exporter.autoscaler --simulate FILE replay a recorded trace offline
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from urllib.parse import quote, urlsplit
+
+try:
+    import docker
+except ImportError:
+    docker = None
+
+from exporter.registry import MetricRegistry
+from exporter.server import MetricsServer
+from exporter.snapshot import SnapshotBuffer
+
+DECISION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+class Observation:
+    """Load seen in one step: average CPU % per replica and total requests/s"""
+
+    __slots__ = ('cpu', 'requests')
+
+    def __init__(self, cpu=None, requests=None):
+        self.cpu = cpu
+        self.requests = requests
+
+
+class TargetTrackingPolicy:
+    """Replica count that keeps CPU and request rate per replica at their targets
+
+    Each metric proposes ceil(replicas * value / target) unless it is
+    within `tolerance` of its target; the larger proposal wins.  Proposals
+    are stabilized like the Kubernetes HPA: a scale-up takes the lowest
+    proposal of the last `up_window` seconds and a scale-down the highest
+    of the last `down_window` seconds, so a single spike or dip does not
+    move the replica count.  Cooldowns space out consecutive actions and
+    every action is capped at `max_step_up`/`max_step_down` replicas.
+    """
+
+    def __init__(self, min_replicas=2, max_replicas=10, target_cpu=10.0, target_requests=10.0,
+                 tolerance=0.1, up_window=0, down_window=60, cooldown_up=15, cooldown_down=60,
+                 max_step_up=4, max_step_down=2):
+        self.min_replicas = min_replicas
+        self.max_replicas = max_replicas
+        self.target_cpu = target_cpu
+        self.target_requests = target_requests
+        self.tolerance = tolerance
+        self.up_window = up_window
+        self.down_window = down_window
+        self.cooldown_up = cooldown_up
+        self.cooldown_down = cooldown_down
+        self.max_step_up = max_step_up
+        self.max_step_down = max_step_down
+        self.proposals = deque()  # (time, proposed replicas)
+        self.last_scale = None  # time of the last action
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ.get
+        return cls(
+            min_replicas=int(env('SCALER_MIN_REPLICAS', '2')),
+            max_replicas=int(env('SCALER_MAX_REPLICAS', '10')),
+            target_cpu=float(env('SCALER_TARGET_CPU', '10')),
+            target_requests=float(env('SCALER_TARGET_REQUESTS', '10')),
+            tolerance=float(env('SCALER_TOLERANCE', '0.1')),
+            up_window=float(env('SCALER_UP_WINDOW', '0')),
+            down_window=float(env('SCALER_DOWN_WINDOW', '60')),
+            cooldown_up=float(env('SCALER_COOLDOWN_UP', '15')),
+            cooldown_down=float(env('SCALER_COOLDOWN_DOWN', '60')),
+        )
+
+    def propose(self, replicas, observation):
+        """Raw replica count for this observation, before stabilization"""
+        proposals = []
+        if observation.cpu is not None and self.target_cpu > 0:
+            ratio = observation.cpu / self.target_cpu
+            proposals.append(replicas if abs(ratio - 1) <= self.tolerance else math.ceil(replicas * ratio))
+        if observation.requests is not None and self.target_requests > 0:
+            ratio = observation.requests / max(replicas, 1) / self.target_requests
+            proposals.append(
+                replicas if abs(ratio - 1) <= self.tolerance else math.ceil(observation.requests / self.target_requests)
+            )
+        return max(proposals) if proposals else replicas
+
+    def decide(self, now, replicas, observation):
+        """(desired replicas, raw proposal) for the current replica count"""
+        proposal = self.propose(replicas, observation)
+        self.proposals.append((now, proposal))
+        horizon = now - max(self.up_window, self.down_window)
+        while self.proposals and self.proposals[0][0] < horizon:
+            self.proposals.popleft()
+
+        lowest = min(p for t, p in self.proposals if t >= now - self.up_window)
+        highest = max(p for t, p in self.proposals if t >= now - self.down_window)
+
+        desired = replicas
+        since_last = now - self.last_scale if self.last_scale is not None else math.inf
+        if lowest > replicas and since_last >= self.cooldown_up:
+            desired = min(lowest, replicas + self.max_step_up)
+        elif highest < replicas and since_last >= self.cooldown_down:
+            desired = max(highest, replicas - self.max_step_down)
+
+        # Bounds apply even during a cooldown
+        desired = min(max(desired, self.min_replicas), self.max_replicas)
+        return desired, proposal
+
+    def scaled(self, now):
+        self.last_scale = now
+
+
+class HTTPSource:
+    """Keep-alive GETs against one HTTP server"""
+
+    def __init__(self, url, timeout=5):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.connection = None
+
+    def get(self, path):
+        for attempt in (0, 1):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request('GET', path)
+                response = self.connection.getresponse()
+                body = response.read()
+                if response.status != 200:
+                    raise http.client.HTTPException(f"GET {path} returned {response.status}")
+                return json.loads(body)
+            except (OSError, http.client.HTTPException):
+                # The server may have closed an idle keep-alive connection
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+
+class ExporterSource(HTTPSource):
+    """Read rates the exporter already keeps in memory from its /rates document"""
+
+    def __init__(self, url, backend, service, timeout=5):
+        super().__init__(url, timeout)
+        self.backend = backend
+        self.container = re.compile(rf'(^|[-_]){re.escape(service)}([-_]\d+)?$')
+
+    def read(self):
+        document = self.get('/rates')
+
+        requests = None
+        for series in document.get('haproxy_stats_backend_http_requests_total', []):
+            if series['labels'].get('backend') == self.backend:
+                requests = series['rate'].get('1m', series['ewma'].get('1m'))
+
+        cpu = []
+        for series in document.get('docker_cpu_usage_seconds_total', []):
+            rate = series['rate'].get('1m', series['ewma'].get('1m'))
+            if rate is not None and self.container.search(series['labels'].get('container', '')):
+                cpu.append(rate * 100)
+
+        return Observation(sum(cpu) / len(cpu) if cpu else None, requests)
+
+
+class PrometheusSource(HTTPSource):
+    """Read the same signals with instant queries against the Prometheus HTTP API"""
+
+    def __init__(self, url, cpu_query, requests_query, timeout=5):
+        super().__init__(url, timeout)
+        self.cpu_query = cpu_query
+        self.requests_query = requests_query
+
+    def query(self, expr):
+        result = self.get('/api/v1/query?query=' + quote(expr))['data']['result']
+        return float(result[0]['value'][1]) if result else None
+
+    def read(self):
+        return Observation(self.query(self.cpu_query), self.query(self.requests_query))
+
+
+class DockerScaler:
+    """Scale a compose service through the Docker API
+
+    New replicas are cloned from a running one with the labels, name
+    scheme and network aliases docker compose would give them, so
+    `docker compose ps` and the HAProxy DNS template keep seeing one
+    service, and with its capabilities and devices, so a clone can mount
+    NFS like the original.  Scale-down removes the highest-numbered
+    replicas first.  The service must be scalable in compose (no
+    container_name, no fixed host ports); compose then owns the clones
+    like its own replicas, and `docker compose up` without --scale
+    brings the count back to the file's.
+    """
+
+    def __init__(self, client, service, project=None):
+        self.client = client
+        self.service = service
+        self.project = project
+
+    def replicas(self):
+        filters = {'label': [f'com.docker.compose.service={self.service}']}
+        if self.project:
+            filters['label'].append(f'com.docker.compose.project={self.project}')
+        containers = self.client.containers.list(filters=filters)
+        return sorted(containers, key=lambda c: int(c.labels.get('com.docker.compose.container-number', 0)))
+
+    def scale(self, count):
+        containers = self.replicas()
+        if not containers:
+            raise RuntimeError(f"no running {self.service} container to scale from")
+        if count > len(containers):
+            numbers = [int(c.labels.get('com.docker.compose.container-number', 0)) for c in containers]
+            for number in range(max(numbers) + 1, max(numbers) + 1 + count - len(containers)):
+                self.clone(containers[0], number)
+        else:
+            for container in reversed(containers[count:]):
+                container.stop(timeout=10)
+                container.remove()
+
+    def clone(self, template, number):
+        attrs = template.attrs
+        labels = dict(template.labels)
+        labels['com.docker.compose.container-number'] = str(number)
+        project = labels.get('com.docker.compose.project', self.project or '')
+        networks = attrs['NetworkSettings']['Networks']
+        host_config = attrs['HostConfig']
+        devices = [
+            f"{d['PathOnHost']}:{d['PathInContainer']}:{d['CgroupPermissions']}" for d in host_config.get('Devices') or ()
+        ]
+
+        container = self.client.containers.create(
+            attrs['Config']['Image'],
+            name=f'{project}-{self.service}-{number}',
+            labels=labels,
+            environment=attrs['Config'].get('Env'),
+            command=attrs['Config'].get('Cmd'),
+            volumes=attrs['HostConfig'].get('Binds'),
+            restart_policy=host_config.get('RestartPolicy'),
+            cap_add=host_config.get('CapAdd'),
+            privileged=host_config.get('Privileged', False),
+            devices=devices or None,
+            network=next(iter(networks), None),
+        )
+        # The template's own name and short id are aliases of the template only
+        own = {template.name, template.id[:12]}
+        for index, (name, settings) in enumerate(networks.items()):
+            aliases = [alias for alias in settings.get('Aliases') or () if alias not in own]
+            if self.service not in aliases:
+                aliases.append(self.service)
+            network = self.client.networks.get(name)
+            if index == 0:
+                # Attached by create() without aliases; reattach before it starts
+                network.disconnect(container)
+            network.connect(container, aliases=aliases)
+        container.start()
+
+
+class Controller:
+    """Observe, decide and scale every `interval` seconds, exporting what it did"""
+
+    def __init__(self, policy, source, scaler, interval=5, dry_run=False, record=None):
+        self.policy = policy
+        self.source = source
+        self.scaler = scaler
+        self.interval = interval
+        self.dry_run = dry_run
+        self.record = record
+        self.snapshot = SnapshotBuffer()
+
+        self.registry = MetricRegistry()
+        self.replicas = self.registry.gauge('autoscaler_replicas', 'Running replicas')
+        self.desired = self.registry.gauge('autoscaler_desired_replicas', 'Replicas after stabilization and bounds')
+        self.proposal = self.registry.gauge('autoscaler_proposed_replicas', 'Raw target-tracking proposal')
+        self.observed = self.registry.gauge('autoscaler_observed_value', 'Load signal used for the decision', ('signal',))
+        self.events = self.registry.counter('autoscaler_scale_events_total', 'Scaling actions taken', ('direction',))
+        self.errors = self.registry.counter('autoscaler_errors_total', 'Steps that failed', ('stage',))
+        self.duration = self.registry.histogram(
+            'autoscaler_decision_duration_seconds', 'Time to observe, decide and scale in one step',
+            buckets=DECISION_BUCKETS
+        )
+        self.scale_events = {'up': 0, 'down': 0}
+        self.failures = {'observe': 0, 'scale': 0}
+
+    def step(self):
+        start = time.perf_counter()
+        now = time.monotonic()
+        try:
+            observation = self.source.read()
+            replicas = len(self.scaler.replicas())
+        except Exception as e:
+            print(f"[Auto-Scaler] Failed to observe load: {e}")
+            self.failures['observe'] += 1
+            self.publish(None, None, None, None, time.perf_counter() - start)
+            return
+
+        desired, proposal = self.policy.decide(now, replicas, observation)
+        print(f"[Auto-Scaler] {time.strftime('%Y-%m-%d %H:%M:%S')} replicas={replicas} "
+              f"cpu={observation.cpu} requests={observation.requests} proposal={proposal} desired={desired}")
+        if self.record:
+            self.record.write(json.dumps({
+                't': time.time(), 'cpu': observation.cpu, 'requests': observation.requests, 'replicas': replicas
+            }) + '\n')
+            self.record.flush()
+
+        if desired != replicas:
+            direction = 'up' if desired > replicas else 'down'
+            print(f"[Auto-Scaler] Scale {direction}: {replicas} -> {desired}")
+            if self.dry_run:
+                # Act as if it had scaled, so the cooldowns shape what is printed
+                self.policy.scaled(now)
+                self.scale_events[direction] += 1
+            else:
+                try:
+                    self.scaler.scale(desired)
+                    replicas = desired
+                    self.policy.scaled(now)
+                    self.scale_events[direction] += 1
+                except Exception as e:
+                    print(f"[Auto-Scaler] Scaling failed: {e}")
+                    self.failures['scale'] += 1
+
+        self.publish(replicas, desired, proposal, observation, time.perf_counter() - start)
+
+    def publish(self, replicas, desired, proposal, observation, elapsed):
+        with self.registry.cycle():
+            if replicas is not None:
+                self.replicas.set(replicas)
+                self.desired.set(desired)
+                self.proposal.set(proposal)
+            if observation is not None:
+                if observation.cpu is not None:
+                    self.observed.labels('cpu_percent').set(observation.cpu)
+                if observation.requests is not None:
+                    self.observed.labels('requests_per_second').set(observation.requests)
+            for direction, count in self.scale_events.items():
+                self.events.labels(direction).set(count)
+            for stage, count in self.failures.items():
+                self.errors.labels(stage).set(count)
+            self.duration.observe(elapsed)
+        self.snapshot.publish(self.registry.render())
+
+    def run(self):
+        while True:
+            started = time.monotonic()
+            self.step()
+            time.sleep(max(0, self.interval - (time.monotonic() - started)))
+
+
+def simulate(trace, policy, interval=5, startup=20, initial=None):
+    """Replay a recorded trace against a policy and summarize the outcome
+
+    Trace records carry the total load seen when they were recorded
+    (`cpu` as average percent per replica times `replicas`, and
+    `requests`), so the replayed load can be spread over however many
+    replicas the policy runs.  New replicas serve traffic after `startup`
+    seconds.
+    """
+    records = [r for r in trace if r.get('cpu') is not None or r.get('requests') is not None]
+    if not records:
+        return {}
+    start = records[0]['t']
+    end = records[-1]['t']
+
+    replicas = initial or policy.min_replicas
+    pending = []  # times new replicas become ready
+    summary = {'scale_events': 0, 'replica_seconds': 0.0, 'overloaded_seconds': 0.0, 'max_replicas': replicas}
+    index = 0
+    now = start
+    while now <= end:
+        while index + 1 < len(records) and records[index + 1]['t'] <= now:
+            index += 1
+        record = records[index]
+        ready = replicas - len([t for t in pending if t > now])
+        pending = [t for t in pending if t > now]
+
+        cpu_demand = (record.get('cpu') or 0) * record.get('replicas', 1)
+        cpu = cpu_demand / max(ready, 1)
+        requests = record.get('requests')
+        observation = Observation(cpu if record.get('cpu') is not None else None, requests)
+
+        overloaded = cpu > policy.target_cpu * (1 + policy.tolerance) or (
+            requests is not None and ready and requests / ready > policy.target_requests * (1 + policy.tolerance)
+        )
+        summary['overloaded_seconds'] += interval if overloaded else 0
+        summary['replica_seconds'] += replicas * interval
+
+        desired, _ = policy.decide(now, replicas, observation)
+        if desired != replicas:
+            summary['scale_events'] += 1
+            if desired > replicas:
+                pending.extend([now + startup] * (desired - replicas))
+            else:
+                # Unready replicas go first
+                pending = pending[:max(0, len(pending) - (replicas - desired))]
+            replicas = desired
+            policy.scaled(now)
+            summary['max_replicas'] = max(summary['max_replicas'], replicas)
+        now += interval
+
+    summary['duration_seconds'] = end - start
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--simulate', metavar='TRACE', help='replay a recorded JSON-lines trace and exit')
+    parser.add_argument('--startup', type=float, default=20, help='simulated replica startup time in seconds')
+    parser.add_argument('--record', metavar='FILE', help='append observations to FILE as a replayable trace')
+    parser.add_argument('--dry-run', action='store_true', help='log decisions without scaling')
+    args = parser.parse_args()
+
+    interval = float(os.environ.get('SCALER_INTERVAL', '5'))
+    policy = TargetTrackingPolicy.from_env()
+
+    if args.simulate:
+        with open(args.simulate) as f:
+            trace = [json.loads(line) for line in f if line.strip()]
+        print(json.dumps(simulate(trace, policy, interval, args.startup), indent=2))
+        return
+
+    service = os.environ.get('SCALER_SERVICE', 'nginx')
+    if os.environ.get('SCALER_SOURCE', 'exporter') == 'prometheus':
+        source = PrometheusSource(
+            os.environ.get('PROMETHEUS_URL', 'http://localhost:9090'),
+            os.environ.get('SCALER_CPU_QUERY',
+                           f'avg(rate(container_cpu_usage_seconds_total{{name=~".*{service}.*"}}[1m])) * 100'),
+            os.environ.get('SCALER_REQUESTS_QUERY',
+                           'sum(rate(haproxy_backend_http_requests_total{proxy="web_servers"}[1m]))'),
+        )
+    else:
+        source = ExporterSource(
+            os.environ.get('EXPORTER_URL', 'http://localhost:9170'),
+            os.environ.get('SCALER_BACKEND', 'web_servers'),
+            service,
+        )
+
+    if docker is None:
+        raise SystemExit("The docker package is required to scale")
+    scaler = DockerScaler(docker.from_env(), service, os.environ.get('SCALER_PROJECT') or None)
+
+    record = open(args.record, 'a') if args.record else None
+    controller = Controller(policy, source, scaler, interval, dry_run=args.dry_run, record=record)
+
+    port = int(os.environ.get('SCALER_PORT', '9171'))
+    server = MetricsServer(('0.0.0.0', port), controller.snapshot)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"[Auto-Scaler] Started: MIN={policy.min_replicas}, MAX={policy.max_replicas}, "
+          f"target CPU {policy.target_cpu}%/replica, target {policy.target_requests} req/s/replica")
+    print(f"[Auto-Scaler] Metrics available at http://localhost:{port}/metrics")
+    try:
+        controller.run()
+    except KeyboardInterrupt:
+        print("[Auto-Scaler] Shutting down...")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,535 @@
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from exporter.cgroup import CgroupReader
+from exporter.collectors.docker import DockerCollector
+from exporter.haproxy import HAProxyCSVParser
+from exporter.mountstats import MountStatsParser
+from exporter.mysql_status import MySQLStatusCollector
+from exporter.nfs_probe import PACKAGE_ROOT
+from exporter.registry import MetricRegistry
+from exporter.server import MetricsServer
+from exporter.snapshot import SnapshotBuffer
+
+DEFAULT_SIZES = '10,100,1000'
+
+# Slower than the baseline by more than this factor counts as a regression
+DEFAULT_THRESHOLD = 1.2
+
+# Column order of HAProxy 2.x `show stat` up to ttime
+HAPROXY_COLUMNS = (
+    'pxname,svname,qcur,qmax,scur,smax,slim,stot,bin,bout,dreq,dresp,ereq,econ,eresp,wretr,wredis,'
+    'status,weight,act,bck,chkfail,chkdown,lastchg,downtime,qlimit,pid,iid,sid,throttle,lbtot,tracked,'
+    'type,rate,rate_lim,rate_max,check_status,check_code,check_duration,hrsp_1xx,hrsp_2xx,hrsp_3xx,'
+    'hrsp_4xx,hrsp_5xx,hrsp_other,hanafail,req_rate,req_rate_max,req_tot,cli_abrt,srv_abrt,comp_in,'
+    'comp_out,comp_byp,comp_rsp,lastsess,last_chk,last_agt,qtime,ctime,rtime,ttime'
+).split(',')
+
+NFS3_OPERATIONS = (
+    'NULL', 'GETATTR', 'SETATTR', 'LOOKUP', 'ACCESS', 'READLINK', 'READ', 'WRITE', 'CREATE', 'MKDIR',
+    'SYMLINK', 'MKNOD', 'REMOVE', 'RMDIR', 'RENAME', 'LINK', 'READDIR', 'READDIRPLUS', 'FSSTAT',
+    'FSINFO', 'PATHCONF', 'COMMIT',
+)
+
+
+class FakeCore:
+    """Stands in for Exporter when collectors are built outside of it"""
+
+    def docker_client(self):
+        return None
+
+
+class FakeDockerClient:
+    def __init__(self, containers):
+        self.api = self
+        self.listing = [{'Id': container_id, 'Names': [f'/{name}']} for container_id, name in containers.items()]
+
+    def containers(self):
+        return self.listing
+
+
+class FakeCursor:
+    def __init__(self, results):
+        self.results = results
+        self.index = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        self.index = 0
+
+    def fetchall(self):
+        return self.results[self.index]
+
+    def nextset(self):
+        self.index += 1
+
+
+class FakePool:
+    """Replays one SHOW GLOBAL STATUS/VARIABLES dump"""
+
+    def __init__(self, status, variables):
+        self.results = [status, variables]
+
+    def connection(self, timeout=None):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor(self.results)
+
+
+def container_id(rng):
+    return '%064x' % rng.getrandbits(256)
+
+
+def docker_stats_fixture(count, rng):
+    """`docker stats --no-stream --format json` records for count containers"""
+    stats = []
+    for i in range(count):
+        stats.append({
+            'BlockIO': f'{rng.uniform(0, 900):.1f}MB / {rng.uniform(0, 9):.2f}GB',
+            'CPUPerc': f'{rng.uniform(0, 200):.2f}%',
+            'Container': f'web-{i}',
+            'ID': container_id(rng)[:12],
+            'MemPerc': f'{rng.uniform(0, 100):.2f}%',
+            'MemUsage': f'{rng.uniform(1, 900):.1f}MiB / {rng.choice((1, 2, 4, 8))}GiB',
+            'Name': f'web-{i}',
+            'NetIO': f'{rng.uniform(0, 900):.1f}MB / {rng.uniform(0, 900):.1f}MB',
+            'PIDs': str(rng.randint(1, 200)),
+        })
+    return stats
+
+
+def haproxy_csv_fixture(count, rng):
+    """/stats;csv lines with one frontend and count servers in backends of 10"""
+    def row(pxname, svname, proxy_type, status):
+        values = {column: '' for column in HAPROXY_COLUMNS}
+        values.update(pxname=pxname, svname=svname, type=proxy_type, status=status)
+        for column in ('qcur', 'scur', 'smax', 'stot', 'bin', 'bout', 'econ', 'eresp', 'weight', 'lbtot',
+                       'rate', 'rate_max', 'check_duration', 'hrsp_1xx', 'hrsp_2xx', 'hrsp_3xx', 'hrsp_4xx',
+                       'hrsp_5xx', 'hrsp_other', 'req_tot', 'cli_abrt', 'srv_abrt', 'qtime', 'ctime', 'rtime',
+                       'ttime'):
+            values[column] = str(rng.randint(0, 1000000))
+        return ','.join(values[column] for column in HAPROXY_COLUMNS) + ','
+
+    lines = ['# ' + ','.join(HAPROXY_COLUMNS) + ',', row('http_front', 'FRONTEND', '0', 'OPEN')]
+    for backend in range(-(-count // 10)):
+        pxname = f'backend_{backend}'
+        for server in range(min(10, count - backend * 10)):
+            lines.append(row(pxname, f'server_{server}', '2', rng.choice(('UP', 'UP', 'UP', 'DOWN'))))
+        lines.append(row(pxname, 'BACKEND', '1', 'UP'))
+    return lines
+
+
+def mountstats_block(index, rng):
+    lines = [
+        f'device nfs{index}:/export/{index} mounted on /mnt/nfs{index} with fstype nfs statvers=1.1',
+        '\topts:\trw,vers=3,rsize=1048576,wsize=1048576,namlen=255,acregmin=3,acregmax=60,hard,proto=tcp',
+        f'\tage:\t{rng.randint(1, 10 ** 6)}',
+        '\tcaps:\tcaps=0x3fef,wtmult=4096,dtsize=4096,bsize=0,namlen=255',
+        '\tsec:\tflavor=1,pseudoflavor=1',
+        '\tevents:\t' + ' '.join(str(rng.randint(0, 10 ** 6)) for _ in range(27)),
+        '\tbytes:\t' + ' '.join(str(rng.randint(0, 10 ** 12)) for _ in range(8)),
+        '\tRPC iostats version: 1.1  p/v: 100003/3 (nfs)',
+        '\txprt:\ttcp 0 1 2 0 0 ' + ' '.join(str(rng.randint(0, 10 ** 6)) for _ in range(5)),
+        '\tper-op statistics',
+    ]
+    for operation in NFS3_OPERATIONS:
+        requests = rng.choice((0, rng.randint(1, 10 ** 6)))
+        counters = [requests, requests] + [rng.randint(0, 10 ** 9) for _ in range(6)] + [0]
+        lines.append(f'\t{operation:>12}: ' + ' '.join(str(value) for value in counters))
+    return '\n'.join(lines) + '\n'
+
+
+def mountstats_fixture(count, rng):
+    """/proc/self/mountstats with count NFS mounts among local ones"""
+    parts = ['device proc mounted on /proc with fstype proc\n', 'device /dev/sda1 mounted on / with fstype ext4\n']
+    parts.extend(mountstats_block(i, rng) for i in range(count))
+    return ''.join(parts).encode('ascii')
+
+
+def mysql_status_fixture(rng):
+    """(status rows, variable rows) shaped like a MySQL 8 SHOW GLOBAL output"""
+    status = [('Threads_connected', str(rng.randint(1, 150))), ('Queries', str(rng.randint(0, 10 ** 9))),
+              ('Uptime', str(rng.randint(0, 10 ** 7))), ('Innodb_buffer_pool_read_requests', str(10 ** 9)),
+              ('Innodb_buffer_pool_reads', str(10 ** 5)), ('Ssl_cipher', ''), ('Rpl_semi_sync_master_status', 'OFF')]
+    status.extend((f'Com_stmt_{i}', str(rng.randint(0, 10 ** 6))) for i in range(440))
+    variables = [('max_connections', '151'), ('innodb_buffer_pool_size', str(128 * 1024 ** 2)),
+                 ('version', '8.0.36'), ('log_bin', 'ON')]
+    variables.extend((f'setting_{i}', str(rng.randint(0, 10 ** 6))) for i in range(600))
+    return status, variables
+
+
+def cgroup_fixture(root, count, rng):
+    """A cgroup v2 tree with count containers; returns {container id: name}"""
+    open(os.path.join(root, 'cgroup.controllers'), 'w').close()
+    containers = {}
+    for i in range(count):
+        cid = container_id(rng)
+        containers[cid] = f'web-{i}'
+        path = os.path.join(root, 'system.slice', f'docker-{cid}.scope')
+        os.makedirs(path)
+        files = {
+            'cpu.stat': f'usage_usec {rng.randint(0, 10 ** 10)}\nuser_usec 1\nsystem_usec 1\nnr_periods 0\n'
+                        'nr_throttled 0\nthrottled_usec 0\n',
+            'memory.current': f'{rng.randint(10 ** 6, 10 ** 9)}\n',
+            'memory.max': 'max\n',
+            'memory.stat': ''.join(f'{key} {rng.randint(0, 10 ** 8)}\n' for key in (
+                'anon', 'file', 'kernel', 'kernel_stack', 'pagetables', 'sock', 'shmem', 'file_mapped',
+                'file_dirty', 'file_writeback', 'inactive_anon', 'active_anon', 'inactive_file', 'active_file',
+                'unevictable', 'slab', 'pgfault', 'pgmajfault')),
+            'io.stat': f'8:0 rbytes={rng.randint(0, 10 ** 9)} wbytes={rng.randint(0, 10 ** 9)} rios=1 wios=1 '
+                       'dbytes=0 dios=0\n',
+            'pids.current': f'{rng.randint(1, 200)}\n',
+            'cpu.pressure': 'some avg10=0.00 avg60=0.00 avg300=0.00 total=12345\n'
+                            'full avg10=0.00 avg60=0.00 avg300=0.00 total=123\n',
+            'memory.pressure': 'some avg10=0.00 avg60=0.00 avg300=0.00 total=0\n'
+                               'full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n',
+            'io.pressure': 'some avg10=0.00 avg60=0.00 avg300=0.00 total=99\n'
+                           'full avg10=0.00 avg60=0.00 avg300=0.00 total=9\n',
+        }
+        for name, text in files.items():
+            with open(os.path.join(path, name), 'w') as f:
+                f.write(text)
+    return containers
+
+
+def docker_collector():
+    """A DockerCollector in CLI mode; cases swap in their own data source"""
+    return DockerCollector(FakeCore())
+
+
+class Workspace:
+    """Fixtures for one target count, generated once and shared by the cases"""
+
+    def __init__(self, count, seed):
+        self.count = count
+        self.rng = random.Random(seed)
+        self.docker_stats = docker_stats_fixture(count, self.rng)
+        self.haproxy_lines = haproxy_csv_fixture(count, self.rng)
+        self.mountstats = mountstats_fixture(count, self.rng)
+        self.mysql = mysql_status_fixture(self.rng)
+        self.tempdir = tempfile.mkdtemp(prefix='exporter-bench-')
+        self.containers = cgroup_fixture(self.tempdir, count, self.rng)
+        self.closers = []  # cleanup of servers and open files made by the cases
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'docker_stats_{self.count}.json'), 'w') as f:
+            f.write('\n'.join(json.dumps(stat) for stat in self.docker_stats) + '\n')
+        with open(os.path.join(directory, f'haproxy_{self.count}.csv'), 'w') as f:
+            f.write('\n'.join(self.haproxy_lines) + '\n')
+        with open(os.path.join(directory, f'mountstats_{self.count}'), 'wb') as f:
+            f.write(self.mountstats)
+        with open(os.path.join(directory, 'mysql_status.json'), 'w') as f:
+            json.dump({'status': self.mysql[0], 'variables': self.mysql[1]}, f)
+
+    def close(self):
+        for close in self.closers:
+            close()
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+
+# Every case takes a Workspace and returns the callable that is timed
+def case_parse_memory(workspace):
+    collector = docker_collector()
+    strings = []
+    for stat in workspace.docker_stats:
+        for field in ('MemUsage', 'NetIO', 'BlockIO'):
+            strings.extend(part.strip() for part in stat[field].split('/'))
+    parse_memory = collector.parse_memory
+    return lambda: [parse_memory(text) for text in strings]
+
+
+def case_docker_cli(workspace):
+    collector = docker_collector()
+    collector.get_docker_stats = lambda timeout=30: workspace.docker_stats
+    return lambda: collector.collect(5)
+
+
+def case_docker_cgroup(workspace):
+    collector = docker_collector()
+    collector.client = FakeDockerClient(workspace.containers)
+    collector.cgroups = CgroupReader(workspace.tempdir, '/nonexistent')
+    workspace.closers.append(collector.close)
+    return lambda: collector.collect(5)
+
+
+def case_haproxy_csv(workspace):
+    registry = MetricRegistry()
+    parser = HAProxyCSVParser(registry)
+    lines = workspace.haproxy_lines
+
+    def parse():
+        with registry.cycle():
+            parser.parse(lines)
+    return parse
+
+
+def with_traffic(mountstats, every):
+    """mountstats with the transport counters of every `every`th mount moved on"""
+    mounts = itertools.count()
+    return re.sub(
+        rb' 0 1 2 0 0 ', lambda match: b' 0 1 3 0 0 ' if next(mounts) % every == 0 else match.group(0), mountstats
+    )
+
+
+def case_mountstats(workspace, busy):
+    """Alternate between two readings in which one mount in `busy` saw traffic
+
+    Only the idle mounts hit the unchanged-block cache; busy=None keeps
+    every mount idle, the parser's best case.
+    """
+    registry = MetricRegistry()
+    parser = MountStatsParser(registry)
+    readings = [workspace.mountstats, with_traffic(workspace.mountstats, busy) if busy else workspace.mountstats]
+    state = {'turn': 0}
+
+    def update():
+        state['turn'] ^= 1
+        with registry.cycle():
+            parser.update(memoryview(readings[state['turn']]))
+    return update
+
+
+def case_mysql(workspace):
+    registry = MetricRegistry()
+    collector = MySQLStatusCollector(FakePool(*workspace.mysql), registry)
+    return collector.collect
+
+
+def populated_registry(workspace):
+    """One registry holding docker, HAProxy and mountstats series for the workspace"""
+    collector = docker_collector()
+    collector.get_docker_stats = lambda timeout=30: workspace.docker_stats
+    rows = collector.collect_cli_metrics()
+    registry = collector.registry
+    parser = HAProxyCSVParser(registry)
+    mounts = MountStatsParser(registry)
+    # A single cycle, so nothing set here is swept by the next one
+    with registry.cycle():
+        for container_name, cid, values in rows:
+            for name, value in values.items():
+                registry.families[name].labels(container_name, cid).set(value)
+        parser.parse(workspace.haproxy_lines)
+        mounts.update(memoryview(workspace.mountstats))
+    return registry
+
+
+def case_render(workspace):
+    return populated_registry(workspace).render
+
+
+class ScrapeClient:
+    """Keep-alive GETs of /metrics against a local MetricsServer"""
+
+    def __init__(self, workspace, gzip):
+        snapshot = SnapshotBuffer()
+        snapshot.publish(populated_registry(workspace).render())
+        self.server = MetricsServer(('127.0.0.1', 0), snapshot)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+        self.headers = {'Accept-Encoding': 'gzip'} if gzip else {}
+        workspace.closers.append(self.close)
+
+    def __call__(self):
+        self.connection.request('GET', '/metrics', headers=self.headers)
+        response = self.connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"scrape returned {response.status}")
+
+    def close(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+CASES = {
+    'docker.parse_memory': case_parse_memory,
+    'docker.collect.cli': case_docker_cli,
+    'docker.collect.cgroup': case_docker_cgroup,
+    'haproxy.csv_parse': case_haproxy_csv,
+    'mountstats.update': lambda workspace: case_mountstats(workspace, busy=1),
+    'mountstats.update.mixed': lambda workspace: case_mountstats(workspace, busy=10),
+    'mountstats.update.cached': lambda workspace: case_mountstats(workspace, busy=None),
+    'mysql.collect': case_mysql,
+    'registry.render': case_render,
+    'scrape.plain': lambda workspace: ScrapeClient(workspace, gzip=False),
+    'scrape.gzip': lambda workspace: ScrapeClient(workspace, gzip=True),
+}
+
+# Cases whose input does not grow with the number of targets
+FIXED_SIZE_CASES = {'mysql.collect'}
+
+
+def measure(function, min_time, min_iterations):
+    """Wall-clock seconds of repeated calls, after one warm-up call"""
+    function()
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < min_iterations or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def measure_allocations(function):
+    """(peak bytes, bytes still allocated afterwards) of one call"""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        function()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - before, after - before
+
+
+def run_case(name, workspace, min_time, min_iterations):
+    function = CASES[name](workspace)
+    timings = measure(function, min_time, min_iterations)
+    peak, retained = measure_allocations(function)
+    timings.sort()
+    median = statistics.median(timings)
+    return {
+        'case': name,
+        'targets': None if name in FIXED_SIZE_CASES else workspace.count,
+        'iterations': len(timings),
+        'median_seconds': median,
+        'p95_seconds': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'min_seconds': timings[0],
+        'per_second': 1 / median if median else None,
+        'peak_bytes': peak,
+        'retained_bytes': retained,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PACKAGE_ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print median ratios against a previous run; returns the regressed cases"""
+    previous = {(result['case'], result['targets']): result for result in baseline['results']}
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('revision') or 'baseline'} ({baseline['meta']['time']})")
+    for result in results:
+        old = previous.get((result['case'], result['targets']))
+        if old is None or not old['median_seconds']:
+            continue
+        ratio = result['median_seconds'] / old['median_seconds']
+        flag = ''
+        if ratio > threshold:
+            flag = '  REGRESSION'
+            regressions.append(result)
+        print(f"{result['case']:<26} {str(result['targets'] or '-'):>6} {ratio:8.2f}x{flag}")
+    return regressions
+
+
+def format_row(result):
+    return (
+        f"{result['case']:<26} {str(result['targets'] or '-'):>6} {result['median_seconds'] * 1000:10.3f} "
+        f"{result['p95_seconds'] * 1000:10.3f} {result['per_second'] or 0:10.1f} "
+        f"{result['peak_bytes'] / 1024:10.1f} {result['retained_bytes'] / 1024:10.1f}"
+    )
+
+
+def main():
+    """Benchmark the exporter hot paths: python -m exporter.bench [--output FILE] [--compare FILE]"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma-separated target counts')
+    parser.add_argument('--cases', default='', help='comma-separated case name prefixes to run')
+    parser.add_argument('--min-time', type=float, default=0.5, help='seconds to spend timing each case')
+    parser.add_argument('--min-iterations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='slowdown factor reported as a regression')
+    parser.add_argument('--fixtures', help='also write the generated fixtures to this directory')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    prefixes = [prefix.strip() for prefix in args.cases.split(',') if prefix.strip()]
+    names = [name for name in CASES if not prefixes or any(name.startswith(prefix) for prefix in prefixes)]
+
+    # Collectors log to stdout; keep it for the report
+    out = sys.stdout
+    results = []
+    out.write(f"{'case':<26} {'targets':>6} {'median ms':>10} {'p95 ms':>10} {'ops/s':>10} "
+              f"{'peak KiB':>10} {'kept KiB':>10}\n")
+    for size in sizes:
+        workspace = Workspace(size, args.seed)
+        try:
+            if args.fixtures:
+                workspace.save(args.fixtures)
+            for name in names:
+                if name in FIXED_SIZE_CASES and size != sizes[0]:
+                    continue
+                sys.stdout = sys.stderr
+                try:
+                    result = run_case(name, workspace, args.min_time, args.min_iterations)
+                finally:
+                    sys.stdout = out
+                results.append(result)
+                out.write(format_row(result) + '\n')
+                out.flush()
+        finally:
+            workspace.close()
+
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
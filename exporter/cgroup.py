@@ -0,0 +1,279 @@
+import os
+import resource
+import time
+
+# Where a container's cgroup lives under the v2 root, by cgroup driver
+CGROUP_PATHS = (
+    'system.slice/docker-{id}.scope',  # systemd
+    'docker/{id}',  # cgroupfs
+)
+
+CGROUP_FILES = (
+    'cpu.stat', 'memory.current', 'memory.max', 'memory.stat', 'io.stat', 'pids.current',
+    'cpu.pressure', 'memory.pressure', 'io.pressure', 'cgroup.procs',
+)
+
+PRESSURE_RESOURCES = (('cpu', 'cpu.pressure'), ('memory', 'memory.pressure'), ('io', 'io.pressure'))
+
+
+def raise_fd_limit():
+    """Lift the soft open-file limit to the hard limit"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError) as e:
+            print(f"Could not raise the open file limit from {soft}: {e}")
+
+
+def is_cgroup2(root):
+    return os.path.exists(os.path.join(root, 'cgroup.controllers'))
+
+
+def parse_keyed(data):
+    """Flat "key value" lines (cpu.stat, memory.stat) into {bytes key: int}"""
+    values = {}
+    for line in data.split(b'\n'):
+        key, _, value = line.partition(b' ')
+        if value:
+            try:
+                values[key] = int(value)
+            except ValueError:
+                pass
+    return values
+
+
+def parse_io_stat(data):
+    """(read bytes, written bytes) summed over every device in io.stat"""
+    read = written = 0
+    for token in data.split():
+        if token.startswith(b'rbytes='):
+            read += int(token[7:])
+        elif token.startswith(b'wbytes='):
+            written += int(token[7:])
+    return read, written
+
+
+def parse_pressure(data):
+    """{scope: stalled seconds} from a PSI file ("some ... total=<usec>")"""
+    stalled = {}
+    for line in data.split(b'\n'):
+        fields = line.split()
+        if fields and fields[-1].startswith(b'total='):
+            stalled[fields[0].decode()] = int(fields[-1][6:]) / 1e6
+    return stalled
+
+
+def parse_net_dev(data):
+    """(received, transmitted) bytes over all non-loopback interfaces"""
+    received = transmitted = 0
+    for line in data.split(b'\n')[2:]:
+        interface, _, counters = line.partition(b':')
+        fields = counters.split()
+        if len(fields) < 9 or interface.strip() == b'lo':
+            continue
+        received += int(fields[0])
+        transmitted += int(fields[8])
+    return received, transmitted
+
+
+class ContainerCgroup:
+    """Open cgroup files of one container and its previous CPU reading"""
+
+    __slots__ = ('name', 'path', 'fds', 'host_pid', 'pid', 'net_fd', 'cpu_usage', 'cpu_time')
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.fds = {}
+        self.host_pid = None  # from resolve_pid, as the bytes cgroup.procs would give
+        self.pid = None
+        self.net_fd = None
+        self.cpu_usage = None
+        self.cpu_time = None
+
+
+class CgroupReader:
+    """Read container stats straight from cgroup v2 files
+
+    Each container's cgroup directory is located once and its files are
+    opened once; every cycle then re-reads them with os.preadv at offset
+    0 into one shared buffer, which is how cgroupfs hands out fresh
+    values without a new open().  No daemon round trip, no JSON and no
+    subprocess is involved.  Network counters are not part of the cgroup
+    and come from <proc>/<pid>/net/dev of a process in it, which needs the
+    host's /proc mounted in.  cgroup.procs lists PIDs as seen from the
+    reader's own PID namespace, 0 for processes outside it, so inside a
+    container `resolve_pid` (container id -> host PID) supplies the PID
+    instead, once per container.
+    """
+
+    def __init__(self, root='/sys/fs/cgroup', proc='/proc', resolve_pid=None):
+        self.root = root
+        self.proc = proc
+        self.resolve_pid = resolve_pid
+        self.buffer = bytearray(64 * 1024)
+        self.containers = {}  # container id -> ContainerCgroup
+        self.memory_total = self.read_memory_total()
+        # Every container keeps about ten files open
+        raise_fd_limit()
+
+    def read_memory_total(self):
+        try:
+            with open(os.path.join(self.proc, 'meminfo'), 'rb') as f:
+                for line in f:
+                    if line.startswith(b'MemTotal:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return 0
+
+    def locate(self, container_id):
+        for pattern in CGROUP_PATHS:
+            path = os.path.join(self.root, pattern.format(id=container_id))
+            if os.path.isdir(path):
+                return path
+        return None
+
+    def sync(self, containers):
+        """Track exactly the given {container id: name}"""
+        for container_id in list(self.containers):
+            if container_id not in containers:
+                self.close(container_id)
+
+        for container_id, name in containers.items():
+            cgroup = self.containers.get(container_id)
+            if cgroup is not None:
+                cgroup.name = name
+                continue
+            path = self.locate(container_id)
+            if path is None:
+                continue
+            cgroup = self.containers[container_id] = ContainerCgroup(name, path)
+            if self.resolve_pid is not None:
+                # A restart makes a new cgroup, so this container is synced afresh
+                pid = self.resolve_pid(container_id)
+                cgroup.host_pid = str(pid).encode() if pid else None
+            for filename in CGROUP_FILES:
+                # Controllers that are not enabled simply have no files
+                try:
+                    cgroup.fds[filename] = os.open(os.path.join(path, filename), os.O_RDONLY)
+                except OSError:
+                    pass
+
+    def close(self, container_id):
+        cgroup = self.containers.pop(container_id, None)
+        if cgroup is None:
+            return
+        for fd in cgroup.fds.values():
+            os.close(fd)
+        if cgroup.net_fd is not None:
+            os.close(cgroup.net_fd)
+
+    def close_all(self):
+        for container_id in list(self.containers):
+            self.close(container_id)
+
+    def pread(self, fd):
+        count = os.preadv(fd, [self.buffer], 0)
+        return bytes(memoryview(self.buffer)[:count])
+
+    def read(self):
+        """[(name, short id, {metric: value}, {(resource, scope): stalled seconds})]"""
+        rows = []
+        now = time.monotonic()
+        for container_id, cgroup in list(self.containers.items()):
+            try:
+                values, pressure = self.read_container(cgroup, now)
+            except OSError:
+                # The cgroup is gone once the container stops
+                self.close(container_id)
+                continue
+            rows.append((cgroup.name, container_id[:12], values, pressure))
+        return rows
+
+    def read_container(self, cgroup, now):
+        fds = cgroup.fds
+        values = {}
+
+        if 'cpu.stat' in fds:
+            stat = parse_keyed(self.pread(fds['cpu.stat']))
+            usage = stat.get(b'usage_usec', 0) / 1e6
+            values['docker_cpu_usage_seconds_total'] = usage
+            values['docker_cpu_user_seconds_total'] = stat.get(b'user_usec', 0) / 1e6
+            values['docker_cpu_system_seconds_total'] = stat.get(b'system_usec', 0) / 1e6
+            values['docker_cpu_throttled_seconds_total'] = stat.get(b'throttled_usec', 0) / 1e6
+            values['docker_cpu_throttled_periods_total'] = stat.get(b'nr_throttled', 0)
+            if cgroup.cpu_time is not None and now > cgroup.cpu_time:
+                values['docker_cpu_usage_percent'] = (usage - cgroup.cpu_usage) / (now - cgroup.cpu_time) * 100
+            cgroup.cpu_usage, cgroup.cpu_time = usage, now
+
+        if 'memory.current' in fds:
+            usage = int(self.pread(fds['memory.current']))
+            stat = parse_keyed(self.pread(fds['memory.stat'])) if 'memory.stat' in fds else {}
+            # Same accounting as the docker CLI: page cache that can be dropped is not usage
+            inactive_file = stat.get(b'inactive_file', 0)
+            if inactive_file < usage:
+                usage -= inactive_file
+            limit = self.pread(fds['memory.max']).strip() if 'memory.max' in fds else b'max'
+            limit = self.memory_total if limit == b'max' else int(limit)
+            values['docker_memory_usage_bytes'] = usage
+            values['docker_memory_limit_bytes'] = limit
+            if limit > 0:
+                values['docker_memory_usage_percent'] = usage / limit * 100
+                values['docker_memory_percent'] = usage / limit * 100
+            values['docker_memory_rss_bytes'] = stat.get(b'anon', 0)
+            values['docker_memory_cache_bytes'] = stat.get(b'file', 0)
+            values['docker_memory_page_faults_total'] = stat.get(b'pgfault', 0)
+            values['docker_memory_major_page_faults_total'] = stat.get(b'pgmajfault', 0)
+
+        if 'io.stat' in fds:
+            values['docker_block_read_bytes'], values['docker_block_write_bytes'] = parse_io_stat(
+                self.pread(fds['io.stat'])
+            )
+
+        if 'pids.current' in fds:
+            values['docker_pids'] = int(self.pread(fds['pids.current']))
+
+        pressure = {}
+        for resource, filename in PRESSURE_RESOURCES:
+            if filename in fds:
+                for scope, seconds in parse_pressure(self.pread(fds[filename])).items():
+                    pressure[resource, scope] = seconds
+
+        network = self.read_network(cgroup)
+        if network is not None:
+            values['docker_network_rx_bytes'], values['docker_network_tx_bytes'] = network
+
+        return values, pressure
+
+    def read_network(self, cgroup):
+        if self.resolve_pid is not None:
+            pid = cgroup.host_pid
+        elif 'cgroup.procs' in cgroup.fds:
+            pid = self.pread(cgroup.fds['cgroup.procs']).split(b'\n', 1)[0]
+        else:
+            return None
+        if not pid or pid == b'0':
+            return None
+
+        if pid != cgroup.pid:
+            if cgroup.net_fd is not None:
+                os.close(cgroup.net_fd)
+                cgroup.net_fd = None
+            cgroup.pid = pid
+            try:
+                cgroup.net_fd = os.open(os.path.join(self.proc, pid.decode(), 'net', 'dev'), os.O_RDONLY)
+            except OSError:
+                # The process lives in another pid namespace than our /proc
+                return None
+        if cgroup.net_fd is None:
+            return None
+
+        try:
+            return parse_net_dev(self.pread(cgroup.net_fd))
+        except OSError:
+            os.close(cgroup.net_fd)
+            cgroup.net_fd = None
+            cgroup.pid = None
+            return None
@@ -0,0 +1,53 @@
+from exporter.registry import MetricRegistry
+
+
+class SourceUnavailable(Exception):
+    """Raised by collect() when its source could not be read at all
+
+    The registry is left as it was, so the last values keep being served
+    until the collector's max_staleness runs out.
+    """
+
+
+class Collector:
+    """Base class for exporter collector plugins
+
+    Subclasses set `name` and their schedule (`interval`, `timeout`,
+    `deadline`), declare their metric families on `self.registry` and
+    implement collect().  They are registered with
+    exporter.collectors.register and get the owning Exporter so they can
+    share clients and pools.  Failures that collect() handles itself are
+    reported through error() so they are counted, not just logged; when
+    nothing could be read it raises SourceUnavailable instead of emptying
+    its registry.
+
+    `max_staleness` is how long the last good values are served after the
+    source stops answering (default: four intervals).
+    """
+
+    name = None
+    interval = 30
+    timeout = 5
+    deadline = None
+    max_staleness = None
+
+    def __init__(self, core):
+        self.core = core
+        self.registry = MetricRegistry()
+        self.errors = 0  # failures handled inside collect()
+
+    def collect(self, timeout):
+        """Update self.registry inside registry.cycle(); called on the scheduler pool
+
+        Do the slow I/O first and only hold the cycle while writing samples,
+        so rendering never waits on a source.
+        """
+        raise NotImplementedError
+
+    def error(self, message):
+        """Log a failure collect() recovered from and count it"""
+        self.errors += 1
+        print(message)
+
+    def close(self):
+        pass
@@ -0,0 +1,24 @@
+"""Collector plugins, one module per monitored system"""
+
+import importlib
+
+REGISTRY = {}  # collector name -> Collector subclass
+
+
+def register(cls):
+    """Class decorator adding a collector to the registry"""
+    REGISTRY[cls.name] = cls
+    return cls
+
+
+def load(modules):
+    """Import collector modules by name and return the classes they register"""
+    classes = []
+    for module in modules:
+        try:
+            qualified = importlib.import_module(f'{__name__}.{module}').__name__
+        except ImportError as e:
+            print(f"Collector module {module} unavailable: {e}")
+            continue
+        classes.extend(cls for cls in REGISTRY.values() if cls.__module__ == qualified)
+    return classes
@@ -0,0 +1,278 @@
+import json
+import os
+import subprocess
+
+from exporter.cgroup import CgroupReader, is_cgroup2
+from exporter.collector import Collector, SourceUnavailable
+from exporter.collectors import register
+from exporter.docker_stream import DockerStatsStreamer
+
+
+@register
+class DockerCollector(Collector):
+    name = 'docker'
+    interval = 30
+    timeout = 30
+    metrics = (
+        ('docker_cpu_usage_percent', 'gauge', 'CPU usage percentage'),
+        ('docker_cpu_usage_seconds_total', 'counter', 'Total CPU time consumed in seconds'),
+        ('docker_memory_usage_bytes', 'gauge', 'Memory usage in bytes'),
+        ('docker_memory_limit_bytes', 'gauge', 'Memory limit in bytes'),
+        ('docker_memory_usage_percent', 'gauge', 'Memory usage percentage'),
+        ('docker_memory_percent', 'gauge', 'Memory usage percentage'),
+        ('docker_network_rx_bytes', 'counter', 'Network bytes received'),
+        ('docker_network_tx_bytes', 'counter', 'Network bytes transmitted'),
+        ('docker_block_read_bytes', 'counter', 'Block I/O bytes read'),
+        ('docker_block_write_bytes', 'counter', 'Block I/O bytes written'),
+        ('docker_pids', 'gauge', 'Number of PIDs'),
+        # Only read in cgroup mode
+        ('docker_cpu_user_seconds_total', 'counter', 'CPU time spent in user mode in seconds'),
+        ('docker_cpu_system_seconds_total', 'counter', 'CPU time spent in kernel mode in seconds'),
+        ('docker_cpu_throttled_seconds_total', 'counter', 'Time the container was throttled by its CPU quota in seconds'),
+        ('docker_cpu_throttled_periods_total', 'counter', 'CFS periods in which the container was throttled'),
+        ('docker_memory_rss_bytes', 'gauge', 'Anonymous memory in bytes'),
+        ('docker_memory_cache_bytes', 'gauge', 'Page cache memory in bytes'),
+        ('docker_memory_page_faults_total', 'counter', 'Page faults'),
+        ('docker_memory_major_page_faults_total', 'counter', 'Major page faults'),
+    )
+
+    def __init__(self, core):
+        super().__init__(core)
+        for name, kind, help_text in self.metrics:
+            self.registry.family(name, kind, help_text, ('container', 'id'))
+        self.registry.counter(
+            'docker_pressure_stalled_seconds_total',
+            'Time tasks of the container were stalled on a resource (PSI)',
+            ('container', 'id', 'resource', 'scope'),
+        )
+
+        # DOCKER_STATS_MODE=cgroup reads cgroup v2 files directly; otherwise
+        # stream stats from the Docker socket and fall back to the CLI without it
+        self.client = None
+        self.streamer = None
+        self.cgroups = None
+        mode = os.environ.get('DOCKER_STATS_MODE', 'stream')
+        try:
+            self.client = core.docker_client()
+            if self.client is None:
+                raise RuntimeError("no Docker API client")
+            if mode == 'cgroup':
+                root = os.environ.get('CGROUP_ROOT', '/sys/fs/cgroup')
+                if not is_cgroup2(root):
+                    raise RuntimeError(f"{root} is not a cgroup v2 hierarchy")
+                self.cgroups = CgroupReader(root, os.environ.get('HOST_PROC', '/proc'), self.container_pid)
+            else:
+                self.streamer = DockerStatsStreamer(self.client)
+                self.streamer.start()
+        except Exception as e:
+            print(f"Docker {mode} stats unavailable, using docker CLI: {e}")
+            self.cgroups = None
+            self.streamer = None
+
+        # Reading streamed samples or cgroup files is cheap; forking the CLI is not
+        if self.streamer or self.cgroups:
+            self.interval = 5
+            self.timeout = 5
+
+    def container_pid(self, container_id):
+        """Host PID of a container's init process, or None"""
+        try:
+            return self.client.api.inspect_container(container_id)['State']['Pid']
+        except Exception as e:
+            self.error(f"Error inspecting container {container_id[:12]}: {e}")
+            return None
+
+    def get_docker_stats(self, timeout=30):
+        """Get Docker container statistics"""
+        try:
+            # Get container stats in JSON format
+            cmd = ["docker", "stats", "--no-stream", "--format", "json"]
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=timeout)
+
+            stats = []
+            for line in result.stdout.strip().split('\n'):
+                if line:
+                    stats.append(json.loads(line))
+
+            return stats
+        except subprocess.CalledProcessError as e:
+            raise SourceUnavailable(f"Error getting docker stats: {e}")
+        except subprocess.TimeoutExpired:
+            raise SourceUnavailable("Timed out getting docker stats")
+        except json.JSONDecodeError as e:
+            raise SourceUnavailable(f"Error parsing docker stats JSON: {e}")
+
+    def parse_percentage(self, value):
+        """Parse percentage string to float"""
+        if '%' in value:
+            return float(value.replace('%', ''))
+        return 0.0
+
+    def parse_memory(self, mem_str):
+        """Parse memory string (e.g., '1.5GiB') to bytes"""
+        mem_str = mem_str.strip()
+        multipliers = {
+            'B': 1,
+            'KiB': 1024,
+            'MiB': 1024**2,
+            'GiB': 1024**3,
+            'TiB': 1024**4,
+            'KB': 1000,
+            'MB': 1000**2,
+            'GB': 1000**3,
+            'TB': 1000**4
+        }
+
+        for unit, multiplier in multipliers.items():
+            if mem_str.endswith(unit):
+                try:
+                    return float(mem_str[:-len(unit)]) * multiplier
+                except ValueError:
+                    return 0
+
+        # Try to parse as plain number (bytes)
+        try:
+            return float(mem_str)
+        except ValueError:
+            return 0
+
+    def parse_network_io(self, io_str):
+        """Parse network I/O string"""
+        if '/' in io_str:
+            parts = io_str.split('/')
+            if len(parts) == 2:
+                rx = self.parse_memory(parts[0].strip())
+                tx = self.parse_memory(parts[1].strip())
+                return rx, tx
+        return 0, 0
+
+    def parse_block_io(self, io_str):
+        """Parse block I/O string"""
+        if '/' in io_str:
+            parts = io_str.split('/')
+            if len(parts) == 2:
+                read = self.parse_memory(parts[0].strip())
+                write = self.parse_memory(parts[1].strip())
+                return read, write
+        return 0, 0
+
+    def collect_stream_metrics(self):
+        """Build per-container values from the latest Docker API stats samples"""
+        rows = []
+        for container_id, container_name, sample in self.streamer.samples():
+            values = {
+                'docker_cpu_usage_percent': sample['cpu_percent'],
+                'docker_cpu_usage_seconds_total': sample['cpu_seconds'],
+                'docker_memory_usage_bytes': sample['memory_usage'],
+                'docker_memory_limit_bytes': sample['memory_limit'],
+                'docker_network_rx_bytes': sample['network_rx'],
+                'docker_network_tx_bytes': sample['network_tx'],
+                'docker_block_read_bytes': sample['block_read'],
+                'docker_block_write_bytes': sample['block_write'],
+                'docker_pids': sample['pids'],
+            }
+
+            mem_used = sample['memory_usage']
+            mem_limit = sample['memory_limit']
+            if mem_limit > 0:
+                mem_percent = (mem_used / mem_limit) * 100
+                values['docker_memory_usage_percent'] = mem_percent
+                values['docker_memory_percent'] = mem_percent
+
+            rows.append((container_name, container_id[:12], values))
+        return rows
+
+    def collect_cgroup_metrics(self):
+        """Build per-container values from cgroup v2 files
+
+        Returns the rows and the PSI stall times per container.
+        """
+        containers = {}
+        try:
+            # One listing call; the stats themselves never touch the daemon
+            for container in self.client.api.containers():
+                names = container.get('Names') or [container['Id']]
+                containers[container['Id']] = names[0].lstrip('/')
+        except Exception as e:
+            raise SourceUnavailable(f"Error listing containers: {e}")
+        self.cgroups.sync(containers)
+
+        rows = []
+        pressure = []
+        for container_name, container_id, values, stalled in self.cgroups.read():
+            rows.append((container_name, container_id, values))
+            pressure.extend(
+                (container_name, container_id, resource, scope, seconds)
+                for (resource, scope), seconds in stalled.items()
+            )
+        return rows, pressure
+
+    def collect_cli_metrics(self, timeout=30):
+        """Build per-container values from `docker stats` CLI output"""
+        rows = []
+        for stat in self.get_docker_stats(timeout):
+            container_name = stat.get('Name', 'unknown')
+            container_id = stat.get('ID', 'unknown')[:12]  # Short ID
+            values = {}
+
+            # CPU usage
+            values['docker_cpu_usage_percent'] = self.parse_percentage(stat.get('CPUPerc', '0%'))
+
+            # Memory usage
+            mem_usage_str = stat.get('MemUsage', '0B / 0B')
+            if '/' in mem_usage_str:
+                used, limit = mem_usage_str.split('/')
+                mem_used = self.parse_memory(used.strip())
+                mem_limit = self.parse_memory(limit.strip())
+
+                values['docker_memory_usage_bytes'] = mem_used
+                values['docker_memory_limit_bytes'] = mem_limit
+
+                if mem_limit > 0:
+                    values['docker_memory_usage_percent'] = (mem_used / mem_limit) * 100
+
+            # Memory percentage from docker stats
+            mem_percent = self.parse_percentage(stat.get('MemPerc', '0%'))
+            if mem_percent > 0:
+                values['docker_memory_percent'] = mem_percent
+
+            # Network I/O
+            net_rx, net_tx = self.parse_network_io(stat.get('NetIO', '0B / 0B'))
+            values['docker_network_rx_bytes'] = net_rx
+            values['docker_network_tx_bytes'] = net_tx
+
+            # Block I/O
+            block_read, block_write = self.parse_block_io(stat.get('BlockIO', '0B / 0B'))
+            values['docker_block_read_bytes'] = block_read
+            values['docker_block_write_bytes'] = block_write
+
+            # PIDs
+            try:
+                values['docker_pids'] = int(stat.get('PIDs', '0'))
+            except ValueError:
+                pass
+
+            rows.append((container_name, container_id, values))
+        return rows
+
+    def collect(self, timeout):
+        pressure = []
+        if self.cgroups:
+            rows, pressure = self.collect_cgroup_metrics()
+        elif self.streamer:
+            rows = self.collect_stream_metrics()
+        else:
+            rows = self.collect_cli_metrics(timeout)
+
+        families = self.registry.families
+        with self.registry.cycle():
+            for container_name, container_id, values in rows:
+                for name, value in values.items():
+                    families[name].labels(container_name, container_id).set(value)
+            stalled = families['docker_pressure_stalled_seconds_total']
+            for container_name, container_id, resource, scope, seconds in pressure:
+                stalled.labels(container_name, container_id, resource, scope).set(seconds)
+
+    def close(self):
+        if self.cgroups:
+            self.cgroups.close_all()
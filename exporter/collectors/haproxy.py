@@ -0,0 +1,65 @@
+import os
+
+import requests
+
+from exporter.collector import Collector, SourceUnavailable
+from exporter.collectors import register
+from exporter.haproxy import HAProxyCSVParser, HAProxyRuntimeClient
+
+
+@register
+class HAProxyCollector(Collector):
+    name = 'haproxy'
+    interval = 15
+    timeout = 5
+
+    def __init__(self, core):
+        super().__init__(core)
+        self.haproxy_stats_url = "http://haproxy:8404/stats;csv"
+        self.haproxy_parser = HAProxyCSVParser(self.registry)
+        # Optional runtime API ("unix:/path" or "host:port") instead of the CSV page
+        self.haproxy_runtime_address = os.environ.get('HAPROXY_RUNTIME_ADDRESS', '')
+        self.haproxy_runtime = None
+        if self.haproxy_runtime_address:
+            self.haproxy_runtime = HAProxyRuntimeClient(self.haproxy_runtime_address, self.registry)
+        # Reuse one keep-alive connection to the stats page
+        self.session = requests.Session()
+
+    def get_haproxy_stats(self, timeout=5):
+        """Get the HAProxy stats CSV lines"""
+        try:
+            with self.session.get(self.haproxy_stats_url, timeout=timeout, stream=True) as response:
+                if response.status_code != 200:
+                    raise SourceUnavailable(f"HAProxy stats returned HTTP {response.status_code}")
+
+                return list(response.iter_lines(decode_unicode=True))
+
+        except requests.RequestException as e:
+            raise SourceUnavailable(f"Failed to get HAProxy stats: {e}")
+
+    def get_haproxy_runtime_stats(self, timeout=5):
+        """Get HAProxy statistics from the runtime API (show stat/info typed)"""
+        try:
+            self.haproxy_runtime.timeout = timeout
+            return self.haproxy_runtime.fetch()
+        except OSError as e:
+            self.haproxy_runtime.close()
+            raise SourceUnavailable(f"Failed to get HAProxy runtime stats: {e}")
+
+    def collect(self, timeout):
+        # Fetch first so the registry is only held while parsing
+        if self.haproxy_runtime:
+            info, stat = self.get_haproxy_runtime_stats(timeout)
+            with self.registry.cycle():
+                self.haproxy_runtime.parse_info_typed(info)
+                self.haproxy_runtime.parse_stat_typed(stat)
+            return
+
+        lines = self.get_haproxy_stats(timeout)
+        with self.registry.cycle():
+            self.haproxy_parser.parse(lines)
+
+    def close(self):
+        self.session.close()
+        if self.haproxy_runtime:
+            self.haproxy_runtime.close()
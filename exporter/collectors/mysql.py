@@ -0,0 +1,115 @@
+import os
+
+from exporter import mysql_status
+from exporter.collector import Collector, SourceUnavailable
+from exporter.collectors import register
+from exporter.mysql_status import MySQLConnectionPool, MySQLStatusCollector
+
+
+@register
+class MySQLCollector(Collector):
+    name = 'mysql'
+    interval = 30
+    timeout = 10
+
+    def __init__(self, core):
+        super().__init__(core)
+        self.mysql_host = os.environ.get('MYSQL_HOST', 'mysql')
+        self.mysql_port = int(os.environ.get('MYSQL_PORT', '3306'))
+        self.mysql_user = os.environ.get('MYSQL_USER', 'root')
+        self.mysql_password = os.environ.get('MYSQL_ROOT_PASSWORD', 'naver123')
+        self.mysql_database = os.environ.get('MYSQL_DATABASE', 'testdb')
+
+        # Persistent MySQL connections; falls back to docker exec without PyMySQL
+        self.mysql_collector = None
+        if mysql_status.pymysql is not None:
+            self.mysql_collector = MySQLStatusCollector(MySQLConnectionPool(
+                self.mysql_host, self.mysql_port, self.mysql_user,
+                self.mysql_password, self.mysql_database, size=2, timeout=self.timeout
+            ), self.registry)
+        else:
+            print("PyMySQL not installed, collecting MySQL stats via docker exec")
+            self.registry.keep(self.registry.gauge('mysql_up', 'MySQL server status'))
+            self.registry.gauge('mysql_connections', 'Current MySQL connections')
+            self.registry.counter('mysql_queries_total', 'Total MySQL queries')
+
+    def get_mysql_stats(self):
+        """Get basic MySQL stats from container"""
+        try:
+            docker_client = self.core.docker_client()
+            if not docker_client:
+                raise SourceUnavailable("no Docker client for docker exec")
+
+            mysql_container = docker_client.containers.get('mysql')
+
+            # Check if container is running
+            if mysql_container.status != 'running':
+                raise SourceUnavailable(f"MySQL container is {mysql_container.status}")
+
+            stats = {'mysql_up': 1}
+
+            # Try to get connection count via docker exec
+            try:
+                result = mysql_container.exec_run(
+                    "mysql -u root -pnaver123 -e \"SHOW STATUS LIKE 'Threads_connected';\" testdb"
+                )
+                if result.exit_code == 0:
+                    output = result.output.decode('utf-8')
+                    # Parse the output to get connection count
+                    for line in output.split('\n'):
+                        if 'Threads_connected' in line:
+                            parts = line.split()
+                            if len(parts) >= 2:
+                                try:
+                                    stats['mysql_connections'] = float(parts[-1])
+                                except ValueError:
+                                    pass
+            except Exception as e:
+                self.error(f"Failed to get MySQL connection count: {e}")
+
+            # Get queries per second from SHOW STATUS
+            try:
+                result = mysql_container.exec_run(
+                    "mysql -u root -pnaver123 -e \"SHOW STATUS LIKE 'Queries';\" testdb"
+                )
+                if result.exit_code == 0:
+                    output = result.output.decode('utf-8')
+                    for line in output.split('\n'):
+                        if 'Queries' in line and 'Queries' == line.split()[0]:
+                            parts = line.split()
+                            if len(parts) >= 2:
+                                try:
+                                    stats['mysql_queries_total'] = float(parts[-1])
+                                except ValueError:
+                                    pass
+            except Exception as e:
+                self.error(f"Failed to get MySQL query count: {e}")
+
+            return stats
+
+        except SourceUnavailable:
+            raise
+        except Exception as e:
+            raise SourceUnavailable(f"Failed to get MySQL stats: {e}")
+
+    def collect(self, timeout):
+        if self.mysql_collector:
+            self.mysql_collector.collect(timeout)
+            return
+
+        families = self.registry.families
+        try:
+            stats = self.get_mysql_stats()
+        except SourceUnavailable:
+            # Keep serving the last values, but say the server is down
+            with self.registry.lock:
+                families['mysql_up'].set(0)
+            raise
+
+        with self.registry.cycle():
+            for name, value in stats.items():
+                families[name].set(value)
+
+    def close(self):
+        if self.mysql_collector:
+            self.mysql_collector.pool.close()
@@ -0,0 +1,208 @@
+import os
+import time
+
+from exporter.collector import Collector, SourceUnavailable
+from exporter.collectors import register
+from exporter.mountstats import MountStatsParser
+from exporter.nfs_probe import (
+    DEFAULT_SIZES, OPERATION_BUCKETS, OPERATIONS, ProbeWorker, parse_sizes, read_mountinfo, size_label
+)
+from exporter.prober import RTT_BUCKETS, ReachabilityProber
+
+
+class NFSConfig:
+    """NFS settings shared by the NFS collectors"""
+
+    def __init__(self):
+        self.nfs_mount_path = "/var/www/html/nfs"
+        self.nfs_server = "192.168.0.200"
+        self.probe_sizes = parse_sizes(os.environ.get('NFS_PROBE_SIZES', DEFAULT_SIZES))
+        # Extra servers checked alongside nfs_server, comma separated
+        extra = [host.strip() for host in os.environ.get('NFS_SERVER_TARGETS', '').split(',') if host.strip()]
+        self.server_targets = [self.nfs_server] + [host for host in extra if host != self.nfs_server]
+        self.icmp_checks = os.environ.get('NFS_PROBE_ICMP', '1') == '1'
+        # Replicas whose own mount is checked: containers of this compose service
+        self.replica_service = os.environ.get('NFS_REPLICA_SERVICE', 'nginx')
+        self.replica_concurrency = int(os.environ.get('NFS_REPLICA_CONCURRENCY', '4'))
+        self.replica_deadline = float(os.environ.get('NFS_REPLICA_DEADLINE', '1'))
+        self.host_proc = os.environ.get('HOST_PROC', '/proc')
+
+    def is_nfs_mount(self, entry):
+        """Whether a read_mountinfo() entry is the NFS export we expect"""
+        if entry is None:
+            return False
+        fstype, source = entry
+        return fstype.startswith('nfs') and source.split(':')[0] == self.nfs_server
+
+
+@register
+class NFSMountCollector(Collector):
+    name = 'nfs_mount'
+    interval = 30
+    timeout = 5
+
+    def __init__(self, core):
+        super().__init__(core)
+        self.config = NFSConfig()
+        self.mount_status = self.registry.gauge('nfs_mount_status', 'NFS mount status (1=mounted, 0=not mounted)')
+        self.read_latency = self.registry.gauge('nfs_read_latency_ms', 'NFS read latency in milliseconds')
+        self.write_latency = self.registry.gauge('nfs_write_latency_ms', 'NFS write latency in milliseconds')
+        self.read_ops = self.registry.counter('nfs_read_ops_total', 'Total NFS read operations')
+        self.write_ops = self.registry.counter('nfs_write_ops_total', 'Total NFS write operations')
+        self.latency_age = self.registry.gauge(
+            'nfs_latency_age_seconds', 'Seconds since the NFS latency gauges were last measured', ('operation',)
+        )
+        self.measured = {}  # operation -> monotonic time of the last successful probe
+
+        self.probe = ProbeWorker(self.config.nfs_mount_path, self.config.probe_sizes)
+        self.probe_durations = {
+            operation: self.registry.histogram(
+                f'nfs_probe_{operation}_seconds', f'Duration of NFS {operation} probes by probe size',
+                ('size',), buckets
+            )
+            for operation, buckets in OPERATION_BUCKETS.items()
+        }
+        self.probe_errors = self.registry.counter(
+            'nfs_probe_errors_total', 'Failed NFS probe operations', ('operation',)
+        )
+        self.probe_timeouts = self.registry.counter(
+            'nfs_probe_timeout_total', 'NFS probes killed for missing their deadline'
+        )
+        self.probe_stuck = self.registry.gauge(
+            'nfs_probe_stuck', 'A killed NFS probe is still blocked in the kernel (1=stuck)'
+        )
+
+    def check_nfs_mount_status(self):
+        """Check if NFS is mounted, from the mount table only"""
+        try:
+            entry = read_mountinfo().get(self.config.nfs_mount_path)
+        except OSError as e:
+            self.error(f"NFS mount check failed: {e}")
+            return 0
+
+        return 1 if self.config.is_nfs_mount(entry) else 0
+
+    def get_nfs_stats(self):
+        """Get NFS statistics from /proc/net/rpc/nfs"""
+        try:
+            with open('/proc/net/rpc/nfs', 'r') as f:
+                content = f.read()
+
+            read_ops = write_ops = 0
+            for line in content.split('\n'):
+                parts = line.split()
+                # "procN <count> <null> ..." with READ/WRITE at protocol-specific positions
+                if line.startswith('proc3') and len(parts) >= 10:
+                    read_ops += int(parts[8])
+                    write_ops += int(parts[9])
+                elif line.startswith('proc4 ') and len(parts) >= 5:
+                    read_ops += int(parts[3])
+                    write_ops += int(parts[4])
+
+            return read_ops, write_ops
+
+        except Exception as e:
+            self.error(f"Failed to read NFS stats: {e}")
+            return None
+
+    def collect(self, timeout):
+        is_mounted = self.check_nfs_mount_status()
+        report = self.probe.run(timeout) if is_mounted else ([], [])
+        results, errors = report if report is not None else ([], [])
+        stuck = self.probe.stuck()
+        ops = self.get_nfs_stats()
+        now = time.monotonic()
+
+        # The dashboard latency gauges follow the smallest probe
+        smallest = size_label(self.config.probe_sizes[0]) if self.config.probe_sizes else None
+        latest = {operation: seconds for operation, size, seconds in results if size == smallest}
+
+        with self.registry.cycle():
+            self.mount_status.set(is_mounted)
+            for histogram in self.probe_durations.values():
+                histogram.touch()
+            for operation, size, seconds in results:
+                self.probe_durations[operation].labels(size).observe(seconds)
+            for operation in OPERATIONS:
+                self.probe_errors.labels(operation).inc(errors.count(operation))
+            self.probe_timeouts.set(self.probe.timeouts)
+            self.probe_stuck.set(1 if stuck else 0)
+
+            # A failed or hung probe keeps the last measured latency rather
+            # than reporting 0, until it is older than max_staleness
+            for operation, gauge in (('read', self.read_latency), ('write', self.write_latency)):
+                if operation in latest:
+                    gauge.set(latest[operation] * 1000)
+                    self.measured[operation] = now
+                elif operation in self.measured and now - self.measured[operation] <= self.max_staleness:
+                    gauge.touch()
+                if operation in self.measured:
+                    self.latency_age.labels(operation).set(now - self.measured[operation])
+
+            # Counters must not drop to 0 because procfs could not be read
+            if ops is not None:
+                self.read_ops.set(ops[0])
+                self.write_ops.set(ops[1])
+            else:
+                self.read_ops.touch()
+                self.write_ops.touch()
+
+    def close(self):
+        self.probe.close()
+
+
+@register
+class NFSServerCollector(Collector):
+    name = 'nfs_server'
+    interval = 30
+    timeout = 3
+
+    def __init__(self, core):
+        super().__init__(core)
+        self.config = NFSConfig()
+        self.prober = ReachabilityProber(icmp=self.config.icmp_checks)
+        labels = ('server', 'check')
+        self.server_reachable = self.registry.gauge(
+            'nfs_server_reachable', 'NFS server reachability (1=reachable, 0=not reachable)', ('server',)
+        )
+        self.check_up = self.registry.gauge(
+            'nfs_server_check_up', 'Result of one reachability check (1=ok, 0=failed)', labels
+        )
+        self.check_rtt = self.registry.histogram(
+            'nfs_server_check_rtt_seconds', 'Round trip time of successful reachability checks', labels, RTT_BUCKETS
+        )
+
+    def collect(self, timeout):
+        results = self.prober.run(self.config.server_targets, timeout)
+
+        with self.registry.cycle():
+            for server, checks in results.items():
+                for check, rtt in checks.items():
+                    self.check_up.labels(server, check).set(0 if rtt is None else 1)
+                    if rtt is not None:
+                        self.check_rtt.labels(server, check).observe(rtt)
+                    else:
+                        self.check_rtt.touch(server, check)
+                # What `showmount -e` used to answer: NFS and mountd both respond
+                reachable = checks['rpc_nfs'] is not None and checks['rpc_mountd'] is not None
+                self.server_reachable.labels(server).set(1 if reachable else 0)
+
+
+@register
+class NFSClientCollector(Collector):
+    name = 'nfs_client'
+    interval = 15
+    timeout = 5
+
+    def __init__(self, core):
+        super().__init__(core)
+        self.parser = MountStatsParser(self.registry)
+
+    def collect(self, timeout):
+        try:
+            data = self.parser.read()
+        except OSError as e:
+            raise SourceUnavailable(f"Failed to read NFS mountstats: {e}")
+
+        with self.registry.cycle():
+            self.parser.update(data)
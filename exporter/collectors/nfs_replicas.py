@@ -0,0 +1,154 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from exporter.collector import Collector, SourceUnavailable
+from exporter.collectors import register
+from exporter.collectors.nfs import NFSConfig
+from exporter.nfs_probe import METADATA_BUCKETS, MountCheckWorker, read_mountinfo
+
+
+class Replica:
+    """A replica container and the worker checking its NFS mount"""
+
+    __slots__ = ('name', 'pid', 'worker')
+
+    def __init__(self, name, pid, worker):
+        self.name = name
+        self.pid = pid
+        self.worker = worker
+
+
+@register
+class NFSReplicaCollector(Collector):
+    """The NFS mount of every replica, seen from inside each container
+
+    The mount lives in each replica's own mount namespace, which the host
+    /proc exposes as <proc>/<pid>/root; its mount table is
+    <proc>/<pid>/mountinfo.  Reading the table never blocks.  The access
+    check runs in a child process per replica with a deadline, at most
+    NFS_REPLICA_CONCURRENCY at once, so a stale mount in one replica
+    neither hangs the collector nor delays the others.  A replica whose
+    killed check is still stuck in the kernel is reported stale without
+    starting another.  Needs the host /proc (HOST_PROC) and the
+    SYS_PTRACE capability to look into other containers.
+    """
+
+    name = 'nfs_replicas'
+    interval = 30
+    timeout = 5
+
+    def __init__(self, core):
+        super().__init__(core)
+        self.config = NFSConfig()
+        self.client = core.docker_client()
+        self.replicas = {}  # container id -> Replica
+        self.pool = ThreadPoolExecutor(
+            max_workers=max(1, self.config.replica_concurrency), thread_name_prefix='collect-nfs-replica'
+        )
+        labels = ('container',)
+        self.count = self.registry.gauge('nfs_replicas', 'Running replicas whose NFS mount is checked')
+        self.mount_status = self.registry.gauge(
+            'nfs_replica_mount_status', 'NFS mount present in the replica (1=mounted, 0=not mounted)', labels
+        )
+        self.accessible = self.registry.gauge(
+            'nfs_replica_accessible', 'The replica could stat and list its NFS mount in time (1=yes)', labels
+        )
+        self.stale = self.registry.gauge(
+            'nfs_replica_stale', 'NFS mounted in the replica but failing or hanging (1=stale)', labels
+        )
+        self.latency = self.registry.histogram(
+            'nfs_replica_check_seconds', 'Time to stat and list the NFS mount from the replica', labels,
+            METADATA_BUCKETS
+        )
+        self.check_errors = self.registry.counter(
+            'nfs_replica_check_errors_total', 'Failed NFS mount checks by error', ('container', 'error')
+        )
+        self.check_timeouts = self.registry.counter(
+            'nfs_replica_check_timeouts_total', 'NFS mount checks killed for missing their deadline', labels
+        )
+        self.check_stuck = self.registry.gauge(
+            'nfs_replica_check_stuck', 'A killed NFS mount check is still blocked in the kernel (1=stuck)', labels
+        )
+        self.error_counts = {}  # (container, error) -> checks
+
+    def sync_replicas(self):
+        """Track the running containers of the replica service"""
+        if self.client is None:
+            raise SourceUnavailable("no Docker API client to find the replicas")
+        try:
+            containers = self.client.api.containers(
+                filters={'label': f'com.docker.compose.service={self.config.replica_service}'}
+            )
+        except Exception as e:
+            raise SourceUnavailable(f"Error listing {self.config.replica_service} containers: {e}")
+
+        running = {}
+        for container in containers:
+            names = container.get('Names') or [container['Id']]
+            running[container['Id']] = names[0].lstrip('/')
+        for container_id in list(self.replicas):
+            if container_id not in running:
+                self.replicas.pop(container_id).worker.close()
+
+        for container_id, name in running.items():
+            replica = self.replicas.get(container_id)
+            # A restarted container keeps its id but gets a new pid
+            if replica is not None and os.path.exists(os.path.join(self.config.host_proc, str(replica.pid))):
+                replica.name = name
+                continue
+            try:
+                pid = self.client.api.inspect_container(container_id)['State']['Pid']
+            except Exception as e:
+                self.error(f"Error inspecting container {name}: {e}")
+                continue
+            if not pid:
+                continue
+            root = os.path.join(self.config.host_proc, str(pid), 'root') + self.config.nfs_mount_path
+            if replica is not None:
+                replica.worker.close()
+            self.replicas[container_id] = Replica(name, pid, MountCheckWorker(root, f"NFS check of {name}"))
+
+    def check(self, replica):
+        """(mounted, (seconds, error) or None if the check hung, stuck)"""
+        try:
+            mounted = self.config.is_nfs_mount(read_mountinfo(
+                os.path.join(self.config.host_proc, str(replica.pid), 'mountinfo')
+            ).get(self.config.nfs_mount_path))
+        except OSError as e:
+            self.error(f"Cannot read the mount table of {replica.name}: {e}")
+            return False, (None, 'mountinfo'), False
+        if not mounted:
+            return False, (None, None), False
+        result = replica.worker.run(self.config.replica_deadline)
+        return True, result, replica.worker.stuck()
+
+    def collect(self, timeout):
+        self.sync_replicas()
+        replicas = list(self.replicas.values())
+        results = list(self.pool.map(self.check, replicas))
+
+        with self.registry.cycle():
+            self.count.set(len(replicas))
+            for replica, (mounted, result, stuck) in zip(replicas, results):
+                name = replica.name
+                seconds, error = result if result is not None else (None, 'timeout')
+                self.mount_status.labels(name).set(1 if mounted else 0)
+                self.accessible.labels(name).set(1 if seconds is not None else 0)
+                self.stale.labels(name).set(1 if mounted and seconds is None else 0)
+                self.check_stuck.labels(name).set(1 if stuck else 0)
+                self.check_timeouts.labels(name).set(replica.worker.timeouts)
+                if seconds is not None:
+                    self.latency.labels(name).observe(seconds)
+                else:
+                    self.latency.touch(name)
+                if error is not None:
+                    self.error_counts[name, error] = self.error_counts.get((name, error), 0) + 1
+            names = {replica.name for replica in replicas}
+            self.error_counts = {key: count for key, count in self.error_counts.items() if key[0] in names}
+            for (name, error), count in self.error_counts.items():
+                self.check_errors.labels(name, error).set(count)
+
+    def close(self):
+        for replica in self.replicas.values():
+            replica.worker.close()
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+
+try:
+    import docker
+except ImportError:
+    docker = None
+
+from exporter import collectors
+from exporter.instrumentation import ExporterMetrics
+from exporter.profiler import CollectionProfiler, ProfilerBusy
+from exporter.rates import DEFAULT_RATE_METRICS, RateTracker
+from exporter.scheduler import CollectorScheduler, CollectorSource, SingleFlight
+from exporter.server import MetricsServer
+from exporter.snapshot import MetricsSnapshot, SnapshotBuffer
+
+
+def parse_schedule(text):
+    """{collector name: seconds} from text like nfs_mount=60,mysql=30"""
+    schedule = {}
+    for part in text.split(','):
+        name, _, seconds = part.partition('=')
+        if name.strip() and seconds.strip():
+            schedule[name.strip()] = float(seconds)
+    return schedule
+
+
+class Exporter:
+    """Runs collector plugins on one scheduler and serves them on one port"""
+
+    def __init__(self, collector_classes):
+        self.snapshot = SnapshotBuffer()
+        # Per-collector text and filtered snapshots of the current publish
+        self.published = ({}, {})
+        self.rates = RateTracker(
+            name.strip() for name in os.environ.get('EXPORTER_RATE_METRICS', DEFAULT_RATE_METRICS).split(',')
+            if name.strip()
+        )
+
+        self.instrumentation = ExporterMetrics()
+        self.profiler = CollectionProfiler()
+
+        self.docker_lock = threading.Lock()
+        self._docker_client = None
+        self._docker_checked = False
+
+        self.collectors = []
+        for cls in collector_classes:
+            try:
+                self.collectors.append(cls(self))
+            except Exception as e:
+                print(f"Collector {cls.name} failed to initialize: {e}")
+
+        # EXPORTER_MODE=scrape collects when /metrics is requested instead of
+        # on a timer; the interval of a source is then the least time between
+        # two of its runs, however often it is scraped
+        self.on_demand = os.environ.get('EXPORTER_MODE', 'background') == 'scrape'
+        min_refresh = float(os.environ.get('EXPORTER_MIN_REFRESH', '5'))
+        self.scrape_wait = float(os.environ.get('EXPORTER_SCRAPE_WAIT', '8'))
+        self.flight = SingleFlight(self.collect_metrics)
+
+        # Expensive sources can be refreshed less often than cheap ones
+        intervals = parse_schedule(os.environ.get('EXPORTER_INTERVALS', ''))
+        staleness = parse_schedule(os.environ.get('EXPORTER_MAX_STALENESS', ''))
+        for c in self.collectors:
+            c.interval = intervals.get(c.name, min_refresh if self.on_demand else c.interval)
+            # Defaults from the final interval, so a slower schedule never expires its own series
+            c.max_staleness = staleness.get(c.name, c.max_staleness)
+            if c.max_staleness is None:
+                c.max_staleness = 4 * c.interval
+
+        self.scheduler = CollectorScheduler([
+            CollectorSource(
+                c.name, self.profiler.wrap(c.collect), interval=c.interval, timeout=c.timeout, deadline=c.deadline
+            )
+            for c in self.collectors
+        ])
+
+    def docker_client(self):
+        """Docker API client shared by all collectors, or None"""
+        with self.docker_lock:
+            if not self._docker_checked:
+                self._docker_checked = True
+                try:
+                    if docker is None:
+                        raise RuntimeError("docker package not installed")
+                    self._docker_client = docker.from_env()
+                except Exception as e:
+                    print(f"Docker client initialization failed: {e}")
+            return self._docker_client
+
+    def collect_metrics(self):
+        """Run due collectors and publish a new snapshot"""
+        self.scheduler.run_once()
+        start = time.perf_counter()
+
+        # Last-known-good values are only served for so long
+        now = time.monotonic()
+        for collector in self.collectors:
+            updated = collector.registry.updated
+            if updated is not None and now - updated > collector.max_staleness:
+                collector.registry.expire()
+
+        rendered = {collector.name: collector.registry.render() for collector in self.collectors}
+        self.rates.update(collector.registry for collector in self.collectors)
+        rendered['rates'] = self.rates.registry.render()
+        self.instrumentation.update(self.scheduler.sources, self.collectors)
+        rendered['exporter'] = self.instrumentation.registry.render()
+
+        # Render once per cycle and swap the payload in for the handlers
+        self.published = (rendered, {})
+        snapshot = self.snapshot.publish(''.join(rendered.values()))
+        self.instrumentation.observe_render(time.perf_counter() - start, len(snapshot.body))
+
+    def profile(self, params):
+        """/debug/profile?seconds=N&mode=cprofile|sample"""
+        try:
+            text = self.profiler.capture(params.get('mode', ['sample'])[0], params.get('seconds', ['10'])[0])
+        except (ProfilerBusy, ValueError) as e:
+            text = f"{e}\n"
+        return 'text/plain; charset=utf-8', text.encode('utf-8')
+
+    def refresh(self):
+        """Collect for a scrape if a source is due, sharing the run with concurrent scrapes
+
+        Waits at most scrape_wait seconds; a scrape that arrives while no
+        source is due and nothing is being collected gets the current
+        snapshot straight away.
+        """
+        due = self.scheduler.seconds_until_due() <= 0
+        if not self.flight.run(self.scrape_wait, start=due):
+            print(f"Collection still running after {self.scrape_wait}s, serving the previous snapshot")
+
+    def rates_document(self, params):
+        if self.on_demand:
+            self.refresh()
+        return 'application/json', self.rates.json
+
+    def select(self, names):
+        """Snapshot limited to the named collectors, or None if one is unknown"""
+        rendered, filtered = self.published
+        if any(name not in rendered for name in names):
+            return None
+
+        key = tuple(sorted(set(names)))
+        snapshot = filtered.get(key)
+        if snapshot is None:
+            text = ''.join(rendered[name] for name in key)
+            snapshot = filtered[key] = MetricsSnapshot(text.encode('utf-8'))
+        return snapshot
+
+    def close(self):
+        self.scheduler.shutdown()
+        for collector in self.collectors:
+            try:
+                collector.close()
+            except Exception as e:
+                print(f"Collector {collector.name} failed to close: {e}")
+
+
+def run(modules, port, title):
+    """Load collector modules and serve their metrics on one port"""
+    exporter = Exporter(collectors.load(modules))
+
+    def collect_loop():
+        while True:
+            try:
+                exporter.collect_metrics()
+                time.sleep(exporter.scheduler.seconds_until_due())
+            except Exception as e:
+                print(f"Error in collection loop: {e}")
+                time.sleep(10)
+
+    if not exporter.on_demand:
+        collector_thread = threading.Thread(target=collect_loop, name='collect-loop', daemon=True)
+        collector_thread.start()
+
+    routes = {'/rates': exporter.rates_document}
+    # Profiling holds a handler thread for the whole capture; opt in
+    if os.environ.get('EXPORTER_PROFILING', '0') == '1':
+        routes['/debug/profile'] = exporter.profile
+
+    server = MetricsServer(
+        ('0.0.0.0', port), exporter.snapshot, select=exporter.select, routes=routes,
+        observe=exporter.instrumentation.observe_request, refresh=exporter.refresh if exporter.on_demand else None
+    )
+    print(f"{title} starting on port {port}...")
+    print(f"Collectors: {', '.join(c.name for c in exporter.collectors)}")
+    if exporter.on_demand:
+        print("Collecting on scrape")
+    print(f"Metrics available at http://localhost:{port}/metrics")
+    print(f"Rates available at http://localhost:{port}/rates")
+    if '/debug/profile' in routes:
+        print(f"Profiles available at http://localhost:{port}/debug/profile?seconds=10&mode=sample")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+        server.shutdown()
+        exporter.close()
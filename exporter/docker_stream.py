@@ -0,0 +1,152 @@
+import threading
+import time
+
+
+def parse_stats(stats):
+    """Turn one raw /containers/{id}/stats document into exact numbers"""
+    cpu_stats = stats.get('cpu_stats') or {}
+    precpu_stats = stats.get('precpu_stats') or {}
+    cpu_usage = cpu_stats.get('cpu_usage') or {}
+    precpu_usage = precpu_stats.get('cpu_usage') or {}
+
+    # Same formula as the docker CLI, but on the raw nanosecond counters
+    cpu_percent = 0.0
+    cpu_delta = cpu_usage.get('total_usage', 0) - precpu_usage.get('total_usage', 0)
+    system_delta = cpu_stats.get('system_cpu_usage', 0) - precpu_stats.get('system_cpu_usage', 0)
+    online_cpus = cpu_stats.get('online_cpus') or len(cpu_usage.get('percpu_usage') or []) or 1
+    if cpu_delta > 0 and system_delta > 0:
+        cpu_percent = cpu_delta / system_delta * online_cpus * 100.0
+
+    # Page cache is not counted as usage (cgroup v1 "cache", v2 "inactive_file")
+    memory_stats = stats.get('memory_stats') or {}
+    mem_detail = memory_stats.get('stats') or {}
+    mem_usage = memory_stats.get('usage', 0)
+    mem_cache = mem_detail.get('total_inactive_file', mem_detail.get('inactive_file', mem_detail.get('cache', 0)))
+    if mem_cache < mem_usage:
+        mem_usage -= mem_cache
+
+    rx_bytes = tx_bytes = 0
+    for network in (stats.get('networks') or {}).values():
+        rx_bytes += network.get('rx_bytes', 0)
+        tx_bytes += network.get('tx_bytes', 0)
+
+    read_bytes = write_bytes = 0
+    for entry in (stats.get('blkio_stats') or {}).get('io_service_bytes_recursive') or []:
+        op = entry.get('op', '').lower()
+        if op == 'read':
+            read_bytes += entry.get('value', 0)
+        elif op == 'write':
+            write_bytes += entry.get('value', 0)
+
+    return {
+        'cpu_percent': cpu_percent,
+        'cpu_seconds': cpu_usage.get('total_usage', 0) / 1e9,
+        'memory_usage': mem_usage,
+        'memory_limit': memory_stats.get('limit', 0),
+        'network_rx': rx_bytes,
+        'network_tx': tx_bytes,
+        'block_read': read_bytes,
+        'block_write': write_bytes,
+        'pids': (stats.get('pids_stats') or {}).get('current', 0),
+    }
+
+
+class ContainerStream:
+    """Latest parsed stats of one container's stream"""
+
+    __slots__ = ('name', 'sample')
+
+    def __init__(self, name):
+        self.name = name
+        self.sample = None
+
+
+class DockerStatsStreamer:
+    """Keep one streaming stats connection per running container
+
+    Containers are added and removed from the Docker events stream, so a
+    scale-up shows up as soon as the container starts instead of on the
+    next full re-list.  samples() only reads the latest parsed document of
+    every stream and never blocks on the daemon.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.streams = {}  # container id -> ContainerStream
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.resync()
+        threading.Thread(target=self.watch_events, name='docker-events', daemon=True).start()
+
+    def resync(self):
+        """List running containers once and stream any that are not tracked yet"""
+        for container in self.client.containers.list():
+            self.add(container.id, container.name)
+
+    def add(self, container_id, name):
+        with self.lock:
+            if container_id in self.streams:
+                return
+            stream = self.streams[container_id] = ContainerStream(name)
+
+        threading.Thread(
+            target=self.stream_stats, args=(container_id, stream),
+            name=f'docker-stats-{container_id[:12]}', daemon=True
+        ).start()
+
+    def remove(self, container_id, stream=None):
+        with self.lock:
+            # A restarted container may already have a newer stream
+            if stream is None or self.streams.get(container_id) is stream:
+                self.streams.pop(container_id, None)
+
+    def stream_stats(self, container_id, stream):
+        """Follow the stats stream of one container until it stops"""
+        try:
+            for stats in self.client.api.stats(container_id, stream=True, decode=True):
+                if self.streams.get(container_id) is not stream:
+                    return
+                stream.name = stats.get('name', '').lstrip('/') or stream.name
+                stream.sample = parse_stats(stats)
+        except Exception as e:
+            print(f"Stats stream for {container_id[:12]} ended: {e}")
+        # The daemon closes the stream when the container stops
+        self.remove(container_id, stream)
+
+    def watch_events(self):
+        """Track container start/stop events, reconnecting on failure"""
+        while True:
+            try:
+                events = self.client.events(
+                    decode=True,
+                    filters={'type': 'container', 'event': ['start', 'die', 'destroy']}
+                )
+                for event in events:
+                    container_id = event.get('id') or event.get('Actor', {}).get('ID')
+                    if not container_id:
+                        continue
+                    if event.get('status', event.get('Action')) == 'start':
+                        name = event.get('Actor', {}).get('Attributes', {}).get('name', container_id[:12])
+                        self.add(container_id, name)
+                    else:
+                        self.remove(container_id)
+            except Exception as e:
+                print(f"Docker events stream failed: {e}")
+                time.sleep(5)
+
+            # Events may have been missed while disconnected
+            try:
+                self.resync()
+            except Exception as e:
+                print(f"Docker container re-list failed: {e}")
+
+    def samples(self):
+        """Latest sample per container as (id, name, sample) tuples"""
+        with self.lock:
+            streams = list(self.streams.items())
+        return [
+            (container_id, stream.name, stream.sample)
+            for container_id, stream in streams
+            if stream.sample is not None
+        ]
@@ -0,0 +1,409 @@
+import csv
+import socket
+
+PROXY_KINDS = {'0': 'frontend', '1': 'backend', '2': 'server'}
+
+# csv column, metric suffix, type, scale, proxy kinds (f/b/s), code label, help
+FIELDS = [
+    ('qcur', 'current_queue', 'gauge', 1, 'bs', '', 'Current number of queued requests'),
+    ('qmax', 'max_queue', 'gauge', 1, 'bs', '', 'Maximum observed number of queued requests'),
+    ('scur', 'current_sessions', 'gauge', 1, 'fbs', '', 'Current number of active sessions'),
+    ('smax', 'max_sessions', 'gauge', 1, 'fbs', '', 'Maximum observed number of active sessions'),
+    ('slim', 'limit_sessions', 'gauge', 1, 'fbs', '', 'Configured session limit'),
+    ('stot', 'sessions_total', 'counter', 1, 'fbs', '', 'Total number of sessions'),
+    ('bin', 'bytes_in_total', 'counter', 1, 'fbs', '', 'Total bytes received'),
+    ('bout', 'bytes_out_total', 'counter', 1, 'fbs', '', 'Total bytes sent'),
+    ('dreq', 'requests_denied_total', 'counter', 1, 'fb', '', 'Total requests denied for security reasons'),
+    ('dresp', 'responses_denied_total', 'counter', 1, 'fbs', '', 'Total responses denied for security reasons'),
+    ('ereq', 'request_errors_total', 'counter', 1, 'f', '', 'Total request errors'),
+    ('econ', 'connection_errors_total', 'counter', 1, 'bs', '', 'Total errors connecting to a server'),
+    ('eresp', 'response_errors_total', 'counter', 1, 'bs', '', 'Total response errors'),
+    ('wretr', 'retry_warnings_total', 'counter', 1, 'bs', '', 'Total connection retries'),
+    ('wredis', 'redispatch_warnings_total', 'counter', 1, 'bs', '', 'Total redispatches to another server'),
+    ('weight', 'weight', 'gauge', 1, 'bs', '', 'Effective weight'),
+    ('act', 'active_servers', 'gauge', 1, 'b', '', 'Number of active servers'),
+    ('bck', 'backup_servers', 'gauge', 1, 'b', '', 'Number of backup servers'),
+    ('chkfail', 'check_failures_total', 'counter', 1, 's', '', 'Total failed health checks'),
+    ('chkdown', 'down_transitions_total', 'counter', 1, 'bs', '', 'Total UP to DOWN transitions'),
+    ('downtime', 'downtime_seconds_total', 'counter', 1, 'bs', '', 'Total downtime in seconds'),
+    ('lbtot', 'server_selected_total', 'counter', 1, 'bs', '', 'Total times a server was selected'),
+    ('rate', 'current_session_rate', 'gauge', 1, 'fbs', '', 'Sessions per second over the last second'),
+    ('rate_max', 'max_session_rate', 'gauge', 1, 'fbs', '', 'Maximum observed sessions per second'),
+    ('check_duration', 'check_duration_seconds', 'gauge', 0.001, 's', '', 'Duration of the last health check'),
+    ('hrsp_1xx', 'http_responses_total', 'counter', 1, 'fbs', '1xx', 'Total HTTP responses by status class'),
+    ('hrsp_2xx', 'http_responses_total', 'counter', 1, 'fbs', '2xx', 'Total HTTP responses by status class'),
+    ('hrsp_3xx', 'http_responses_total', 'counter', 1, 'fbs', '3xx', 'Total HTTP responses by status class'),
+    ('hrsp_4xx', 'http_responses_total', 'counter', 1, 'fbs', '4xx', 'Total HTTP responses by status class'),
+    ('hrsp_5xx', 'http_responses_total', 'counter', 1, 'fbs', '5xx', 'Total HTTP responses by status class'),
+    ('hrsp_other', 'http_responses_total', 'counter', 1, 'fbs', 'other', 'Total HTTP responses by status class'),
+    ('req_rate', 'current_request_rate', 'gauge', 1, 'f', '', 'HTTP requests per second over the last second'),
+    ('req_tot', 'http_requests_total', 'counter', 1, 'fb', '', 'Total HTTP requests'),
+    ('cli_abrt', 'client_aborts_total', 'counter', 1, 'bs', '', 'Total data transfers aborted by the client'),
+    ('srv_abrt', 'server_aborts_total', 'counter', 1, 'bs', '', 'Total data transfers aborted by the server'),
+    ('comp_in', 'compressor_bytes_in_total', 'counter', 1, 'fb', '', 'Total bytes fed to the compressor'),
+    ('comp_out', 'compressor_bytes_out_total', 'counter', 1, 'fb', '', 'Total bytes emitted by the compressor'),
+    ('qtime', 'queue_time_average_seconds', 'gauge', 0.001, 'bs', '', 'Average queue time over the last 1024 requests'),
+    ('ctime', 'connect_time_average_seconds', 'gauge', 0.001, 'bs', '', 'Average connect time over the last 1024 requests'),
+    ('rtime', 'response_time_average_seconds', 'gauge', 0.001, 'bs', '', 'Average response time over the last 1024 requests'),
+    ('ttime', 'total_time_average_seconds', 'gauge', 0.001, 'bs', '', 'Average total session time over the last 1024 requests'),
+]
+
+# Server metrics the dashboards were built on, labelled server="proxy/server"
+LEGACY_SERVER_FIELDS = [
+    ('rtime', 'haproxy_response_time_ms', 'HAProxy backend response time'),
+    ('rate', 'haproxy_session_rate', 'HAProxy session rate'),
+    ('qtime', 'haproxy_queue_time_ms', 'HAProxy queue time'),
+    ('ctime', 'haproxy_connect_time_ms', 'HAProxy connect time'),
+]
+
+KIND_LETTERS = {'frontend': 'f', 'backend': 'b', 'server': 's'}
+
+# HAProxy's own prometheus-exporter serves haproxy_{frontend,backend,server}_*
+# from the same target, labelled by proxy; this prefix keeps the two apart
+PREFIX = 'haproxy_stats'
+
+LABEL_NAMES = {'frontend': ('frontend',), 'backend': ('backend',), 'server': ('backend', 'server')}
+
+FIELDS_BY_COLUMN = {field[0]: field for field in FIELDS}
+
+
+def is_up(status):
+    """Map a HAProxy status column (UP, OPEN, 'UP 1/3', DOWN, NOLB...) to 1/0"""
+    return 1 if status.startswith('UP') or status == 'OPEN' or status == 'no check' else 0
+
+
+def proxy_key(proxy, pxname, svname):
+    """Label values of a frontend, backend or server series"""
+    if proxy == 'server':
+        return (pxname, svname)
+    return (pxname,)
+
+
+def field_family(registry, proxy, column):
+    """Metric family of a stats column for one proxy kind"""
+    _, suffix, kind, _, _, code, help_text = FIELDS_BY_COLUMN[column]
+    labelnames = LABEL_NAMES[proxy] + (('code',) if code else ())
+    return registry.family(
+        f'{PREFIX}_{proxy}_{suffix}', kind, f'HAProxy {proxy} {help_text[0].lower()}{help_text[1:]}', labelnames
+    )
+
+
+def up_family(registry, proxy):
+    return registry.gauge(
+        f'{PREFIX}_{proxy}_up', f'HAProxy {proxy} status (1=UP/OPEN, 0=otherwise)', LABEL_NAMES[proxy]
+    )
+
+
+def legacy_families(registry):
+    """Families of LEGACY_SERVER_FIELDS by csv column"""
+    return {column: registry.gauge(name, help_text, ('server',)) for column, name, help_text in LEGACY_SERVER_FIELDS}
+
+
+class HAProxyCSVParser:
+    """Columnar parser for the HAProxy `/stats;csv` page
+
+    The header is indexed once and only re-indexed when HAProxy's column
+    layout changes; rows are then read by position from a plain split
+    without building a dict per row.  Only rows carrying a quoted field
+    (check_desc, last_chk and the like hold free text with commas) go
+    through the csv module.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.header = None
+        self.width = 0
+        self.type_index = self.pxname_index = self.svname_index = self.status_index = None
+        self.columns = {}  # proxy kind -> [(column index, MetricFamily, code label, scale)]
+        self.up_families = {proxy: up_family(registry, proxy) for proxy in PROXY_KINDS.values()}
+        self.legacy_columns = []
+
+    def index_header(self, header):
+        """Resolve column positions and metric families for every known field"""
+        names = header.lstrip('# ').rstrip(',').split(',')
+        position = {name: i for i, name in enumerate(names)}
+
+        self.header = header
+        self.width = len(names)
+        self.type_index = position['type']
+        self.pxname_index = position['pxname']
+        self.svname_index = position['svname']
+        self.status_index = position.get('status')
+        self.columns = {kind: [] for kind in PROXY_KINDS.values()}
+
+        for column, _, _, scale, proxies, code, _ in FIELDS:
+            if column not in position:
+                continue
+            for proxy in PROXY_KINDS.values():
+                if KIND_LETTERS[proxy] not in proxies:
+                    continue
+                family = field_family(self.registry, proxy, column)
+                self.columns[proxy].append((position[column], family, code, scale))
+
+        legacy = legacy_families(self.registry)
+        self.legacy_columns = [
+            (position[column], legacy[column]) for column, _, _ in LEGACY_SERVER_FIELDS if column in position
+        ]
+
+    def parse(self, lines):
+        """Update the registry from CSV lines; call inside registry.cycle()"""
+        lines = iter(lines)
+
+        header = next(lines, '')
+        if not header.startswith('#'):
+            return
+        if header != self.header:
+            self.index_header(header)
+
+        type_index = self.type_index
+        width = self.width
+
+        for line in lines:
+            if not line or line[0] == '#':
+                continue
+            values = next(csv.reader((line,))) if '"' in line else line.split(',')
+            if len(values) < width:
+                continue
+
+            proxy = PROXY_KINDS.get(values[type_index])
+            if proxy is None:
+                continue  # listeners
+
+            pxname = values[self.pxname_index]
+            svname = values[self.svname_index]
+            status = values[self.status_index] if self.status_index is not None else ''
+
+            # Unused server-template slots sit in MAINT; drop their series
+            if proxy == 'server' and status.startswith('MAINT'):
+                continue
+            key = proxy_key(proxy, pxname, svname)
+
+            if status:
+                self.up_families[proxy].sample(key).set(is_up(status))
+
+            for index, family, code, scale in self.columns[proxy]:
+                value = values[index]
+                if not value:
+                    continue
+                try:
+                    number = int(value)
+                except ValueError:
+                    continue
+                if scale != 1:
+                    number *= scale
+                if code:
+                    family.sample(key + (code,)).set(number)
+                else:
+                    family.sample(key).set(number)
+
+            if proxy == 'server':
+                for index, family in self.legacy_columns:
+                    try:
+                        family.labels(f'{pxname}/{svname}').set(float(values[index]))
+                    except ValueError:
+                        pass
+
+
+TYPED_KINDS = {'F': 'frontend', 'B': 'backend', 'S': 'server'}
+
+# show info fields worth exporting: field name -> (metric suffix, help)
+INFO_FIELDS = {
+    'Nbthread': ('threads', 'Number of threads'),
+    'Uptime_sec': ('uptime_seconds', 'Process uptime in seconds'),
+    'Memmax_MB': ('max_memory_megabytes', 'Per-process memory limit'),
+    'PoolAlloc_MB': ('pool_allocated_megabytes', 'Memory allocated in pools'),
+    'PoolUsed_MB': ('pool_used_megabytes', 'Memory used from pools'),
+    'Ulimit-n': ('max_fds', 'Maximum number of open files'),
+    'Maxconn': ('max_connections', 'Maximum number of concurrent connections'),
+    'CurrConns': ('current_connections', 'Current number of connections'),
+    'CumConns': ('connections_total', 'Total number of connections'),
+    'CumReq': ('requests_total', 'Total number of requests'),
+    'ConnRate': ('current_connection_rate', 'Connections per second over the last second'),
+    'SessRate': ('current_session_rate', 'Sessions per second over the last second'),
+    'Tasks': ('current_tasks', 'Current number of tasks'),
+    'Run_queue': ('current_run_queue', 'Current number of tasks in the run queue'),
+    'Idle_pct': ('idle_time_percent', 'Percentage of time the process was idle'),
+    'Stopping': ('stopping', 'Whether the process is stopping'),
+    'Jobs': ('jobs', 'Current number of active jobs'),
+    'Listeners': ('listeners', 'Current number of active listeners'),
+}
+
+
+def typed_kind(tags):
+    """Prometheus type from the nature letter of a typed field (origin, nature, scope)"""
+    return 'counter' if len(tags) > 1 and tags[1] == 'C' else 'gauge'
+
+
+def typed_number(value_type, value):
+    if value_type in ('s32', 's64', 'u32', 'u64'):
+        return int(value)
+    if value_type == 'flt':
+        return float(value)
+    return None
+
+
+class HAProxyRuntimeClient:
+    """Persistent connection to the HAProxy runtime API (stats socket)
+
+    The address is either "unix:/path/to/socket" or "host:port".  The
+    socket is put in interactive mode with `prompt`, so several commands
+    can share one connection; every reply then ends with "> ".
+    """
+
+    PROMPT = b'\n> '
+
+    def __init__(self, address, registry, timeout=5):
+        self.address = address
+        self.registry = registry
+        self.timeout = timeout
+        self.sock = None
+        self.info_families = {}  # show info field name -> MetricFamily
+        self.field_families = {}  # (proxy kind, stats column) -> MetricFamily
+        self.up_families = {proxy: up_family(registry, proxy) for proxy in PROXY_KINDS.values()}
+        self.legacy = legacy_families(registry)
+
+    def connect(self):
+        if self.address.startswith('unix:'):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            target = self.address[5:]
+        else:
+            host, _, port = self.address.rpartition(':')
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            target = (host, int(port))
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(target)
+            sock.sendall(b'prompt\n')
+            self.sock = sock
+            self.read_reply()
+        except Exception:
+            sock.close()
+            self.sock = None
+            raise
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def read_reply(self):
+        chunks = []
+        tail = b''
+        while True:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("HAProxy runtime API closed the connection")
+            chunks.append(chunk)
+            tail = (tail + chunk)[-len(self.PROMPT):]
+            if tail == self.PROMPT or (len(chunks) == 1 and chunk == b'> '):
+                break
+        reply = b''.join(chunks)
+        return reply[:-2].decode('utf-8', 'replace')
+
+    def command(self, command):
+        """Run one command, reconnecting once if the connection went away"""
+        for attempt in (0, 1):
+            if self.sock is None:
+                self.connect()
+            try:
+                self.sock.settimeout(self.timeout)
+                self.sock.sendall(command.encode('ascii') + b'\n')
+                return self.read_reply()
+            except (OSError, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+
+    def fetch(self):
+        """Lines of `show info typed` and `show stat typed`"""
+        info = self.command('show info typed').splitlines()
+        stat = self.command('show stat typed').splitlines()
+        return info, stat
+
+    def parse_info_typed(self, lines):
+        """Parse `<pos>.<name>.<proc>:<tags>:<type>:<value>` process fields"""
+        for line in lines:
+            head, _, rest = line.partition(':')
+            name = head.split('.')[1] if head.count('.') >= 2 else None
+            if name not in INFO_FIELDS:
+                continue
+            tags, _, typed_value = rest.partition(':')
+            value_type, _, value = typed_value.partition(':')
+            try:
+                number = typed_number(value_type, value)
+            except ValueError:
+                continue
+            if number is None:
+                continue
+            family = self.info_families.get(name)
+            if family is None:
+                suffix, help_text = INFO_FIELDS[name]
+                family = self.info_families[name] = self.registry.family(
+                    f'{PREFIX}_process_{suffix}', typed_kind(tags),
+                    f'HAProxy process {help_text[0].lower()}{help_text[1:]}'
+                )
+            family.set(number)
+
+    def parse_stat_typed(self, lines):
+        """Parse `<kind>.<iid>.<sid>.<pos>.<name>.<proc>:<tags>:<type>:<value>` proxy fields"""
+        current = None
+        fields = []
+
+        for line in lines:
+            head, _, rest = line.partition(':')
+            parts = head.split('.')
+            if len(parts) < 6 or parts[0] not in TYPED_KINDS:
+                continue
+            key = (parts[0], parts[1], parts[2])
+            if key != current:
+                self.flush_object(current, fields)
+                current = key
+                fields = []
+            tags, _, typed_value = rest.partition(':')
+            value_type, _, value = typed_value.partition(':')
+            fields.append((parts[4], value_type, value))
+
+        self.flush_object(current, fields)
+
+    def flush_object(self, key, fields):
+        """Set the samples of one frontend/backend/server once all its fields are known"""
+        if key is None:
+            return
+        proxy = TYPED_KINDS[key[0]]
+        values = {name: value for name, _, value in fields}
+        status = values.get('status', '')
+        if proxy == 'server' and status.startswith('MAINT'):
+            return
+        labelvalues = proxy_key(proxy, values.get('pxname', ''), values.get('svname', ''))
+
+        if status:
+            self.up_families[proxy].sample(labelvalues).set(is_up(status))
+
+        letter = KIND_LETTERS[proxy]
+        for column, value_type, value in fields:
+            field = FIELDS_BY_COLUMN.get(column)
+            if field is None or letter not in field[4]:
+                continue
+            try:
+                number = typed_number(value_type, value)
+            except ValueError:
+                continue
+            if number is None:
+                continue
+            scale, code = field[3], field[5]
+            if scale != 1:
+                number *= scale
+            family = self.field_families.get((proxy, column))
+            if family is None:
+                family = self.field_families[proxy, column] = field_family(self.registry, proxy, column)
+            if code:
+                family.sample(labelvalues + (code,)).set(number)
+            else:
+                family.sample(labelvalues).set(number)
+
+        if proxy == 'server':
+            for column, family in self.legacy.items():
+                try:
+                    family.labels(f'{values["pxname"]}/{values["svname"]}').set(float(values[column]))
+                except (KeyError, ValueError):
+                    pass
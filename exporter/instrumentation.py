@@ -0,0 +1,166 @@
+import os
+import resource
+import threading
+import time
+from collections import deque
+
+from exporter.registry import MetricRegistry
+
+# Collectors range from a few file reads to multi-second probes
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUEST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))  # 256B .. 64MiB
+
+PROC_SELF = '/proc/self'
+
+
+def read_boot_time(path='/proc/stat'):
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime '):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def read_process_stats(proc=PROC_SELF, boot_time=None):
+    """process_* values of this process from procfs, or from getrusage elsewhere"""
+    stats = {}
+    try:
+        with open(os.path.join(proc, 'stat'), 'rb') as f:
+            data = f.read()
+        # Fields after "pid (comm) ", which may itself contain spaces
+        fields = data[data.rindex(b')') + 2:].split()
+        ticks = os.sysconf('SC_CLK_TCK')
+        stats['process_cpu_seconds_total'] = (int(fields[11]) + int(fields[12])) / ticks
+        stats['process_threads'] = int(fields[17])
+        stats['process_virtual_memory_bytes'] = int(fields[20])
+        stats['process_resident_memory_bytes'] = int(fields[21]) * os.sysconf('SC_PAGE_SIZE')
+        if boot_time is not None:
+            stats['process_start_time_seconds'] = boot_time + int(fields[19]) / ticks
+        stats['process_open_fds'] = len(os.listdir(os.path.join(proc, 'fd')))
+    except (OSError, ValueError, IndexError):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        stats['process_cpu_seconds_total'] = usage.ru_utime + usage.ru_stime
+        stats['process_threads'] = threading.active_count()
+    return stats
+
+
+PROCESS_HELP = {
+    'process_cpu_seconds_total': ('counter', 'Total user and system CPU time spent in seconds'),
+    'process_threads': ('gauge', 'Number of OS threads in the process'),
+    'process_virtual_memory_bytes': ('gauge', 'Virtual memory size in bytes'),
+    'process_resident_memory_bytes': ('gauge', 'Resident memory size in bytes'),
+    'process_start_time_seconds': ('gauge', 'Start time of the process since unix epoch in seconds'),
+    'process_open_fds': ('gauge', 'Number of open file descriptors'),
+}
+
+
+class ExporterMetrics:
+    """The exporter's metrics about itself
+
+    Collector runs are timed by the scheduler and HTTP requests by the
+    server; both only queue their numbers, and update() moves everything
+    into the registry once per collection cycle, so the hot paths never
+    wait on the registry lock.
+    """
+
+    def __init__(self):
+        self.registry = registry = MetricRegistry()
+        self.duration = registry.histogram(
+            'exporter_collector_duration_seconds', 'Time a collector run took', ('collector',), DURATION_BUCKETS
+        )
+        self.runs = registry.counter('exporter_collector_runs_total', 'Collector runs finished', ('collector',))
+        self.errors = registry.counter(
+            'exporter_collector_errors_total', 'Collector runs that failed or recovered from an error', ('collector',)
+        )
+        self.timeouts = registry.counter(
+            'exporter_collector_timeouts_total', 'Collector runs that missed their deadline', ('collector',)
+        )
+        self.up = registry.gauge(
+            'exporter_collector_up', 'Whether the last collector run succeeded (1=ok, 0=failed or overran)',
+            ('collector',)
+        )
+        self.age = registry.gauge(
+            'exporter_collector_age_seconds', 'Age of the values served for the collector', ('collector',)
+        )
+        self.last_success = registry.gauge(
+            'exporter_collector_last_success_timestamp_seconds', 'When the collector last finished a run without raising',
+            ('collector',)
+        )
+        self.render_duration = registry.histogram(
+            'exporter_render_duration_seconds', 'Time spent rendering and publishing a snapshot', (), REQUEST_BUCKETS
+        )
+        self.payload = registry.gauge('exporter_payload_bytes', 'Size of the uncompressed /metrics payload')
+        self.requests = registry.counter('exporter_http_requests_total', 'HTTP requests served', ('path', 'code'))
+        self.request_duration = registry.histogram(
+            'exporter_http_request_duration_seconds', 'Time to serve an HTTP request', ('path',), REQUEST_BUCKETS
+        )
+        self.response_size = registry.histogram(
+            'exporter_http_response_size_bytes', 'Size of HTTP response bodies', ('path',), SIZE_BUCKETS
+        )
+        for name, (kind, help_text) in PROCESS_HELP.items():
+            registry.family(name, kind, help_text)
+
+        self.boot_time = read_boot_time()
+        self.renders = deque(maxlen=1024)
+        self.served = deque(maxlen=4096)  # (path, code, seconds, bytes)
+        self.request_counts = {}  # (path, code) -> requests
+        self.payload_size = 0
+
+    def observe_request(self, path, code, seconds, size):
+        """Record one served request; called on HTTP handler threads"""
+        self.served.append((path, code, seconds, size))
+
+    def observe_render(self, seconds, size):
+        self.renders.append(seconds)
+        self.payload_size = size
+
+    def update(self, sources, collectors):
+        """Publish the numbers gathered since the last cycle"""
+        errors = {collector.name: collector.errors for collector in collectors}
+        updated = {collector.name: collector.registry.updated for collector in collectors}
+        now = time.monotonic()
+        served = []
+        while self.served:
+            served.append(self.served.popleft())
+
+        with self.registry.cycle():
+            for source in sources:
+                name = source.name
+                histogram = self.duration.labels(name)
+                histogram.touch()
+                while source.durations:
+                    histogram.observe(source.durations.popleft())
+                self.runs.labels(name).set(source.runs)
+                self.errors.labels(name).set(source.failures + errors.get(name, 0))
+                self.timeouts.labels(name).set(source.timeouts)
+                if source.last_success is not None:
+                    self.last_success.labels(name).set(source.last_success)
+                if source.up is not None:
+                    self.up.labels(name).set(1 if source.up else 0)
+                if updated.get(name) is not None:
+                    self.age.labels(name).set(now - updated[name])
+
+            self.render_duration.touch()
+            while self.renders:
+                self.render_duration.observe(self.renders.popleft())
+            self.payload.set(self.payload_size)
+
+            self.request_duration.touch()
+            self.response_size.touch()
+            for path, code, seconds, size in served:
+                key = (path, str(code))
+                self.request_counts[key] = self.request_counts.get(key, 0) + 1
+                self.request_duration.labels(path).observe(seconds)
+                self.response_size.labels(path).observe(size)
+            for (path, code), count in self.request_counts.items():
+                self.requests.labels(path, code).set(count)
+
+            families = self.registry.families
+            for name, value in read_process_stats(boot_time=self.boot_time).items():
+                families[name].set(value)
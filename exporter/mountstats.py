@@ -0,0 +1,193 @@
+MOUNTSTATS_PATH = '/proc/self/mountstats'
+
+NFS_FSTYPES = {'nfs', 'nfs4'}
+
+# bytes: line, in kernel order
+BYTE_COUNTERS = (
+    ('read_bytes_total', 'Bytes read by applications through read()'),
+    ('write_bytes_total', 'Bytes written by applications through write()'),
+    ('direct_read_bytes_total', 'Bytes read with O_DIRECT'),
+    ('direct_write_bytes_total', 'Bytes written with O_DIRECT'),
+    ('server_read_bytes_total', 'Bytes read from the server'),
+    ('server_write_bytes_total', 'Bytes written to the server'),
+    ('read_pages_total', 'Pages read with readpage(s)'),
+    ('write_pages_total', 'Pages written with writepage(s)'),
+)
+
+# Per-op line: ops trans timeouts bytes_sent bytes_recv queue_ms rtt_ms execute_ms [errors]
+OPERATION_COUNTERS = (
+    ('requests_total', 1, 'RPC requests sent for the operation'),
+    ('transmissions_total', 1, 'RPC transmissions including retransmissions'),
+    ('major_timeouts_total', 1, 'RPC major timeouts'),
+    ('sent_bytes_total', 1, 'Bytes sent including RPC headers'),
+    ('received_bytes_total', 1, 'Bytes received including RPC headers'),
+    ('queue_seconds_total', 0.001, 'Time requests waited in the transmit queue'),
+    ('rtt_seconds_total', 0.001, 'Round trip time between transmission and reply'),
+    ('execute_seconds_total', 0.001, 'Time from request creation to completion'),
+    ('errors_total', 1, 'Requests that completed with an error status'),
+)
+
+# xprt: counters by transport, as positions in the line after "xprt:"
+TRANSPORT_FIELDS = {
+    'tcp': {'connects_total': 3, 'sends_total': 6, 'receives_total': 7, 'bad_xids_total': 8,
+            'requests_total': 9, 'backlog_total': 10},
+    'udp': {'sends_total': 3, 'receives_total': 4, 'bad_xids_total': 5, 'requests_total': 6,
+            'backlog_total': 7},
+}
+
+TRANSPORT_HELP = {
+    'connects_total': 'Transport connections established',
+    'sends_total': 'RPC requests sent on the transport',
+    'receives_total': 'RPC replies received on the transport',
+    'bad_xids_total': 'Replies that matched no outstanding request',
+    'requests_total': 'Cumulative active requests, summed at every send',
+    'backlog_total': 'Cumulative backlog queue length, summed at every send',
+}
+
+
+class MountStatsParser:
+    """Parser for /proc/self/mountstats
+
+    The file is read into one reusable buffer.  Every NFS mount's block
+    is compared with the previous read (minus its `age:` line, which
+    changes every second); unchanged mounts reuse the samples resolved
+    last time instead of being parsed again.
+    """
+
+    def __init__(self, registry, path=MOUNTSTATS_PATH):
+        self.registry = registry
+        self.path = path
+        self.buffer = bytearray(64 * 1024)
+        self.mounts = {}  # mountpoint -> (block without age line, [(Sample, value)])
+        self.epoch = registry.epoch  # registry epoch the cached Samples belong to
+
+        labels = ('export', 'mountpoint')
+        self.age = registry.gauge('nfs_mountstats_age_seconds', 'Seconds since the NFS mount was made', labels)
+        self.byte_families = [
+            registry.counter(f'nfs_mountstats_{name}', help_text, labels) for name, help_text in BYTE_COUNTERS
+        ]
+        self.operation_families = [
+            (registry.counter(f'nfs_mountstats_operation_{name}', help_text, labels + ('operation',)), scale)
+            for name, scale, help_text in OPERATION_COUNTERS
+        ]
+        self.transport_families = {
+            name: registry.counter(f'nfs_mountstats_transport_{name}', help_text, labels + ('protocol',))
+            for name, help_text in TRANSPORT_HELP.items()
+        }
+
+    def read(self):
+        """Contents of the mountstats file as a memoryview of the shared buffer"""
+        with open(self.path, 'rb', buffering=0) as f:
+            size = 0
+            while True:
+                if size == len(self.buffer):
+                    self.buffer.extend(bytes(len(self.buffer)))
+                view = memoryview(self.buffer)[size:]
+                try:
+                    count = f.readinto(view)
+                finally:
+                    view.release()
+                if not count:
+                    break
+                size += count
+        return memoryview(self.buffer)[:size]
+
+    def update(self, data):
+        """Set samples for every NFS mount in data; call inside registry.cycle()
+
+        data is bytes or the view read() returns.  The view is searched in
+        place, so only the blocks of NFS mounts are ever copied.
+        """
+        # read() views always start at offset 0 of the shared buffer
+        source = data.obj if isinstance(data, memoryview) else data
+        seen = {}
+        if self.epoch != self.registry.epoch:
+            # Series were dropped (expire() or a sweep), so cached Samples may be detached
+            self.mounts = {}
+            self.epoch = self.registry.epoch
+        for export, mountpoint, age, block in self.nfs_blocks(source, len(data)):
+            cached = self.mounts.get(mountpoint)
+            if cached is not None and cached[0] == block:
+                samples = cached[1]
+            else:
+                samples = self.parse_block(export, mountpoint, block.decode('ascii', 'replace'))
+            for sample, value in samples:
+                sample.set(value)
+            if age is not None:
+                self.age.labels(export, mountpoint).set(age)
+            seen[mountpoint] = (block, samples)
+
+        # Forget mounts that went away so their samples are not reused
+        self.mounts = seen
+
+    @staticmethod
+    def nfs_blocks(data, size):
+        """(export, mountpoint, age, rest of block) for every NFS mount in data[:size]
+
+        Only NFS blocks are copied out of data; the others are skipped.
+        """
+        start = data.find(b'device ', 0, size)
+        while start != -1:
+            end = data.find(b'\ndevice ', start, size)
+            stop = end if end != -1 else size
+            newline = data.find(b'\n', start, stop)
+            header_end = newline if newline != -1 else stop
+            header = data[start:header_end].decode('ascii', 'replace')
+            start = end + 1 if end != -1 else -1
+
+            words = header.split()
+            # device <export> mounted on <mountpoint> with fstype <type> [statvers=...]
+            if len(words) < 8 or words[7] not in NFS_FSTYPES:
+                continue
+
+            # A slice of the bytearray is a copy, so the cache never sees it change
+            rest = data[header_end + 1:stop]
+            age = None
+            age_start = rest.find(b'\tage:')
+            if age_start != -1:
+                age_end = rest.find(b'\n', age_start)
+                age_end = age_end if age_end != -1 else len(rest)
+                try:
+                    age = int(rest[age_start + 5:age_end])
+                except ValueError:
+                    pass
+                rest = rest[:age_start] + rest[age_end:]
+
+            yield words[1], words[4], age, rest
+
+    def parse_block(self, export, mountpoint, text):
+        """Resolve (Sample, value) pairs for one mount's statistics"""
+        samples = []
+        transport = {}  # (protocol, counter) -> value, summed over nconnect transports
+        in_ops = False
+
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if in_ops:
+                name, _, values = line.partition(':')
+                numbers = values.split()
+                # Operations never used on this mount only add noise
+                if not numbers or numbers[0] == '0':
+                    continue
+                for (family, scale), value in zip(self.operation_families, numbers):
+                    samples.append((family.labels(export, mountpoint, name), int(value) * scale))
+            elif line.startswith('bytes:'):
+                for family, value in zip(self.byte_families, line[6:].split()):
+                    samples.append((family.labels(export, mountpoint), int(value)))
+            elif line.startswith('xprt:'):
+                fields = line[5:].split()
+                positions = TRANSPORT_FIELDS.get(fields[0]) if fields else None
+                if positions is None:
+                    continue
+                for name, position in positions.items():
+                    if position < len(fields):
+                        key = (fields[0], name)
+                        transport[key] = transport.get(key, 0) + int(fields[position])
+            elif line == 'per-op statistics':
+                in_ops = True
+
+        for (protocol, name), value in transport.items():
+            samples.append((self.transport_families[name].labels(export, mountpoint, protocol), value))
+        return samples
@@ -0,0 +1,224 @@
+import queue
+import re
+import time
+from contextlib import contextmanager
+
+try:
+    import pymysql
+    from pymysql.constants import CLIENT
+except ImportError:
+    pymysql = None
+
+from exporter.collector import SourceUnavailable
+
+# SHOW GLOBAL STATUS values that go up and down; everything else is a counter
+GAUGE_STATUS = {
+    'innodb_buffer_pool_bytes_data', 'innodb_buffer_pool_bytes_dirty',
+    'innodb_buffer_pool_pages_data', 'innodb_buffer_pool_pages_dirty',
+    'innodb_buffer_pool_pages_free', 'innodb_buffer_pool_pages_misc',
+    'innodb_buffer_pool_pages_total', 'innodb_data_pending_fsyncs',
+    'innodb_data_pending_reads', 'innodb_data_pending_writes',
+    'innodb_os_log_pending_fsyncs', 'innodb_os_log_pending_writes',
+    'innodb_page_size', 'innodb_row_lock_current_waits',
+    'innodb_row_lock_time_avg', 'innodb_row_lock_time_max',
+    'key_blocks_not_flushed', 'key_blocks_unused', 'key_blocks_used',
+    'max_used_connections', 'open_files', 'open_streams',
+    'open_table_definitions', 'open_tables', 'prepared_stmt_count',
+    'qcache_free_blocks', 'qcache_free_memory', 'qcache_queries_in_cache',
+    'qcache_total_blocks', 'slave_open_temp_tables', 'threads_cached',
+    'threads_connected', 'threads_running', 'uptime',
+    'uptime_since_flush_status',
+}
+
+DERIVED_FAMILIES = (
+    ('mysql_queries_per_second', 'MySQL queries per second since the previous collection'),
+    ('mysql_connection_utilization_ratio', 'Threads_connected divided by max_connections'),
+    ('mysql_innodb_buffer_pool_hit_ratio', 'Share of InnoDB buffer pool reads served from memory'),
+)
+
+BOOLEAN_VALUES = {'ON': 1, 'YES': 1, 'TRUE': 1, 'OFF': 0, 'NO': 0, 'FALSE': 0}
+
+INVALID_CHARS = re.compile(r'[^a-zA-Z0-9_]')
+
+
+def parse_value(value):
+    """Numeric value of a status/variable row, or None when it is not a number"""
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    value = value.strip()
+    if value.upper() in BOOLEAN_VALUES:
+        return BOOLEAN_VALUES[value.upper()]
+    try:
+        return float(value) if '.' in value else int(value)
+    except ValueError:
+        return None
+
+
+class MySQLConnectionPool:
+    """A small pool of persistent connections to one MySQL server"""
+
+    def __init__(self, host, port, user, password, database=None, size=2, timeout=5):
+        self.params = {
+            'host': host,
+            'port': port,
+            'user': user,
+            'password': password,
+            'database': database,
+            'connect_timeout': timeout,
+            'read_timeout': timeout,
+            'write_timeout': timeout,
+            # STATUS and VARIABLES go out in a single round trip
+            'client_flag': CLIENT.MULTI_STATEMENTS if pymysql else 0,
+            'autocommit': True,
+        }
+        self.idle = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """A pooled connection; new ones connect, read and write within timeout if given"""
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            params = self.params
+            if timeout is not None:
+                params = dict(params, connect_timeout=timeout, read_timeout=timeout, write_timeout=timeout)
+            conn = pymysql.connect(**params)
+
+        try:
+            yield conn
+        except Exception:
+            # Never hand a connection in an unknown state back to the pool
+            conn.close()
+            raise
+
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class MySQLStatusCollector:
+    """Export SHOW GLOBAL STATUS/VARIABLES as typed metrics plus derived rates"""
+
+    QUERY = 'SHOW GLOBAL STATUS; SHOW GLOBAL VARIABLES'
+
+    def __init__(self, pool, registry):
+        self.pool = pool
+        self.registry = registry
+        self.up = registry.gauge('mysql_up', 'MySQL server status')
+        # A down server must read mysql_up 0, not vanish with the stale values
+        registry.keep(self.up)
+        # Names the dashboards already use
+        self.connections = registry.gauge('mysql_connections', 'Current MySQL connections')
+        self.queries = registry.counter('mysql_queries_total', 'Total MySQL queries')
+        for name, help_text in DERIVED_FAMILIES:
+            registry.gauge(name, help_text)
+        self.status_families = {}  # SHOW GLOBAL STATUS name -> MetricFamily
+        self.variable_families = {}  # SHOW GLOBAL VARIABLES name -> MetricFamily
+        self.previous = None  # (monotonic time, status dict)
+
+    def fetch(self, timeout=None):
+        """Fetch global status and variables in one round trip"""
+        with self.pool.connection(timeout) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(self.QUERY)
+                status = dict(cursor.fetchall())
+                cursor.nextset()
+                variables = dict(cursor.fetchall())
+        return status, variables
+
+    def status_family(self, name):
+        family = self.status_families.get(name)
+        if family is None:
+            key = INVALID_CHARS.sub('_', name.lower())
+            kind = 'gauge' if key in GAUGE_STATUS else 'counter'
+            family = self.status_families[name] = self.registry.family(
+                f'mysql_global_status_{key}', kind, f'Generic metric from SHOW GLOBAL STATUS ({name})'
+            )
+        return family
+
+    def variable_family(self, name):
+        family = self.variable_families.get(name)
+        if family is None:
+            key = INVALID_CHARS.sub('_', name.lower())
+            family = self.variable_families[name] = self.registry.gauge(
+                f'mysql_global_variables_{key}', f'Generic gauge from SHOW GLOBAL VARIABLES ({name})'
+            )
+        return family
+
+    def collect(self, timeout=None):
+        """Update the registry for one collection cycle"""
+        try:
+            status, variables = self.fetch(timeout)
+        except Exception as e:
+            # Keep serving the last values, but say the server is down
+            with self.registry.lock:
+                self.up.set(0)
+            raise SourceUnavailable(f"Failed to get MySQL stats: {e}")
+
+        now = time.monotonic()
+        with self.registry.cycle():
+            self.up.set(1)
+
+            status_values = {}
+            for name, value in status.items():
+                number = parse_value(value)
+                if number is None:
+                    continue
+                status_values[INVALID_CHARS.sub('_', name.lower())] = number
+                self.status_family(name).set(number)
+
+            variable_values = {}
+            for name, value in variables.items():
+                number = parse_value(value)
+                if number is None:
+                    continue
+                variable_values[INVALID_CHARS.sub('_', name.lower())] = number
+                self.variable_family(name).set(number)
+
+            if 'threads_connected' in status_values:
+                self.connections.set(status_values['threads_connected'])
+            if 'queries' in status_values:
+                self.queries.set(status_values['queries'])
+
+            families = self.registry.families
+            for name, value in self.derive(now, status_values, variable_values).items():
+                families[name].set(value)
+
+        self.previous = (now, status_values)
+
+    def derive(self, now, status, variables):
+        """Rates and ratios computed from this and the previous cycle"""
+        derived = {}
+
+        max_connections = variables.get('max_connections')
+        if max_connections:
+            derived['mysql_connection_utilization_ratio'] = status.get('threads_connected', 0) / max_connections
+
+        read_requests = status.get('innodb_buffer_pool_read_requests', 0)
+        disk_reads = status.get('innodb_buffer_pool_reads', 0)
+
+        if self.previous is not None:
+            prev_time, prev = self.previous
+            elapsed = now - prev_time
+            queries_delta = status.get('queries', 0) - prev.get('queries', 0)
+            # A negative delta means the server restarted; skip one cycle
+            if elapsed > 0 and queries_delta >= 0:
+                derived['mysql_queries_per_second'] = queries_delta / elapsed
+            requests_delta = read_requests - prev.get('innodb_buffer_pool_read_requests', 0)
+            reads_delta = disk_reads - prev.get('innodb_buffer_pool_reads', 0)
+            if requests_delta > 0 and reads_delta >= 0:
+                derived['mysql_innodb_buffer_pool_hit_ratio'] = 1 - reads_delta / requests_delta
+        elif read_requests > 0:
+            derived['mysql_innodb_buffer_pool_hit_ratio'] = 1 - disk_reads / read_requests
+
+        return derived
@@ -0,0 +1,306 @@
+import errno
+import json
+import mmap
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Metadata round trips are sub-millisecond on a healthy server; data
+# operations scale with the probe size
+METADATA_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+DATA_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+OPERATION_BUCKETS = {
+    'open': METADATA_BUCKETS,
+    'write': DATA_BUCKETS,  # write + fsync
+    'read': DATA_BUCKETS,  # uncached
+    'stat': METADATA_BUCKETS,
+    'unlink': METADATA_BUCKETS,
+}
+
+OPERATIONS = tuple(OPERATION_BUCKETS)
+
+DEFAULT_SIZES = '4K,64K,1M'
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+# O_DIRECT transfers must be aligned to the logical block size
+DIRECT_ALIGNMENT = 4096
+
+MOUNTINFO_PATH = '/proc/self/mountinfo'
+
+OCTAL_ESCAPE = re.compile(r'\\([0-7]{3})')
+
+# Directory that contains the exporter package, for the probe worker
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_size(text):
+    """Byte count of a size like 4096, 64K or 1M"""
+    text = text.strip().upper().rstrip('B')
+    unit = text[-1:] if text[-1:] in SIZE_UNITS else ''
+    return int(text[:len(text) - len(unit)]) * SIZE_UNITS[unit]
+
+
+def parse_sizes(text):
+    return sorted({parse_size(part) for part in text.split(',') if part.strip()})
+
+
+def size_label(size):
+    for unit in ('G', 'M', 'K'):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f'{size // SIZE_UNITS[unit]}{unit}'
+    return str(size)
+
+
+def read_mountinfo(path=MOUNTINFO_PATH):
+    """Mount point -> (fstype, source) from the mount table
+
+    Only reads procfs, so it never blocks on a hung NFS server the way a
+    stat() of the mount point would.
+    """
+    mounts = {}
+    with open(path, 'r') as f:
+        for line in f:
+            # id parent major:minor root mountpoint options [optional...] - fstype source superoptions
+            fields = line.split()
+            try:
+                separator = fields.index('-', 6)
+            except ValueError:
+                continue
+            if separator + 2 >= len(fields):
+                continue
+            mountpoint = OCTAL_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), fields[4])
+            mounts[mountpoint] = (fields[separator + 1], fields[separator + 2])
+    return mounts
+
+
+class NFSProbe:
+    """Time the file operations a client does against an NFS mount
+
+    Each probe size writes its own file and times open, write+fsync, an
+    uncached read, stat and unlink separately.  The read goes through
+    O_DIRECT where the filesystem supports it and otherwise drops the
+    file's pages with posix_fadvise first, so it measures the server and
+    not the local page cache.
+    """
+
+    def __init__(self, path, sizes):
+        self.path = path
+        self.sizes = sizes
+        self.payloads = {size: os.urandom(size) for size in sizes}
+        self.direct = getattr(os, 'O_DIRECT', 0)
+
+    def run(self):
+        """Probe every size; returns ([(operation, size label, seconds)], [failed operation])"""
+        results = []
+        errors = []
+        for size in self.sizes:
+            self.probe(size, results, errors)
+        return results, errors
+
+    def probe(self, size, results, errors):
+        label = size_label(size)
+        # One name per host, so a probe killed mid-write leaves nothing behind next run
+        file_path = os.path.join(self.path, f'.nfs_probe_{os.uname().nodename}_{label}')
+        operation = 'open'
+        try:
+            start = time.perf_counter()
+            fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            results.append(('open', label, time.perf_counter() - start))
+
+            operation = 'write'
+            try:
+                start = time.perf_counter()
+                self.write_all(fd, self.payloads[size])
+                os.fsync(fd)
+                results.append(('write', label, time.perf_counter() - start))
+            finally:
+                os.close(fd)
+
+            operation = 'read'
+            results.append(('read', label, self.read_uncached(file_path, size)))
+
+            operation = 'stat'
+            start = time.perf_counter()
+            os.stat(file_path)
+            results.append(('stat', label, time.perf_counter() - start))
+
+            operation = 'unlink'
+            start = time.perf_counter()
+            os.unlink(file_path)
+            results.append(('unlink', label, time.perf_counter() - start))
+        except OSError as e:
+            print(f"NFS {operation} probe ({label}) failed: {e}")
+            errors.append(operation)
+            if operation != 'unlink':
+                try:
+                    os.unlink(file_path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def write_all(fd, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+    def read_uncached(self, file_path, size):
+        """Seconds to read the whole file past the page cache"""
+        if self.direct:
+            try:
+                fd = os.open(file_path, os.O_RDONLY | self.direct)
+            except OSError:
+                # tmpfs and some FUSE mounts refuse O_DIRECT
+                self.direct = 0
+            else:
+                try:
+                    return self.read_direct(fd, size)
+                finally:
+                    os.close(fd)
+
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            start = time.perf_counter()
+            while os.read(fd, 1024 * 1024):
+                pass
+            return time.perf_counter() - start
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def read_direct(fd, size):
+        # Anonymous mmap memory is page aligned, as O_DIRECT requires
+        length = -(-size // DIRECT_ALIGNMENT) * DIRECT_ALIGNMENT
+        with mmap.mmap(-1, length) as buffer:
+            view = memoryview(buffer)
+            try:
+                offset = 0
+                start = time.perf_counter()
+                while offset < size:
+                    count = os.preadv(fd, [view[offset:]], offset)
+                    if not count:
+                        break
+                    offset += count
+                return time.perf_counter() - start
+            finally:
+                view.release()
+
+
+def check_mount(path):
+    """Seconds to stat a directory and read its first entry
+
+    The two round trips a request for a file on the mount needs, without
+    writing anything; on a stale or hung mount they fail or never return.
+    """
+    start = time.perf_counter()
+    os.stat(path)
+    with os.scandir(path) as entries:
+        next(entries, None)
+    return time.perf_counter() - start
+
+
+class ProbeWorker:
+    """Run NFSProbe in a child process with a hard deadline
+
+    A hung NFS server leaves the probing process in uninterruptible sleep.
+    Doing that in a child keeps the collector thread free: the child is
+    killed at the deadline, and while it has not exited yet no new probe
+    is started, so stuck processes never pile up.
+    """
+
+    def __init__(self, path, sizes):
+        self.command = [
+            sys.executable, '-m', 'exporter.nfs_probe', path, ','.join(str(size) for size in sizes)
+        ]
+        self.process = None
+        self.timeouts = 0
+        self.label = 'NFS probe'
+
+    def stuck(self):
+        """True while a killed probe has not exited yet"""
+        if self.process is None:
+            return False
+        if self.process.poll() is None:
+            return True
+        self.process.stdout.close()
+        self.process = None
+        return False
+
+    def run(self, deadline):
+        """(results, errors) as NFSProbe.run, or None if the probe did not finish in time"""
+        if self.stuck():
+            return None
+
+        self.process = subprocess.Popen(self.command, stdout=subprocess.PIPE, cwd=PACKAGE_ROOT)
+        try:
+            output, _ = self.process.communicate(timeout=deadline)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.timeouts += 1
+            print(f"{self.label} did not finish within {deadline}s, killed")
+            return None
+
+        self.process = None
+        try:
+            return self.parse(json.loads(output))
+        except (ValueError, KeyError) as e:
+            print(f"{self.label} worker failed: {e}")
+            return self.failed()
+
+    @staticmethod
+    def parse(report):
+        return [tuple(result) for result in report['results']], report['errors']
+
+    @staticmethod
+    def failed():
+        return [], ['open']
+
+    def close(self):
+        if self.process is not None:
+            self.process.kill()
+
+
+class MountCheckWorker(ProbeWorker):
+    """check_mount() of one path in a child process with a hard deadline
+
+    run() returns (seconds, None) on success, (None, errno name) when the
+    check failed and None when it hung.
+    """
+
+    def __init__(self, path, label='NFS mount check'):
+        super().__init__(path, ())
+        self.command = [sys.executable, '-m', 'exporter.nfs_probe', '--check', path]
+        self.label = label
+
+    @staticmethod
+    def parse(report):
+        return report['seconds'], report['error']
+
+    @staticmethod
+    def failed():
+        return None, 'worker'
+
+
+def main():
+    """Probe worker entry point: python -m exporter.nfs_probe <path> <sizes> | --check <path>"""
+    out = sys.stdout
+    # Probe failures are logged; stdout only carries the report
+    sys.stdout = sys.stderr
+    if sys.argv[1] == '--check':
+        try:
+            report = {'seconds': check_mount(sys.argv[2]), 'error': None}
+        except OSError as e:
+            report = {'seconds': None, 'error': errno.errorcode.get(e.errno, 'OSError')}
+        out.write(json.dumps(report))
+        return
+    results, errors = NFSProbe(sys.argv[1], parse_sizes(sys.argv[2])).run()
+    out.write(json.dumps({'results': results, 'errors': errors}))
+
+
+if __name__ == '__main__':
+    main()
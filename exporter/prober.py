@@ -0,0 +1,207 @@
+import asyncio
+import itertools
+import os
+import socket
+import struct
+import sys
+import time
+
+PORTMAP_PROGRAM = 100000
+PORTMAP_VERSION = 2
+PMAPPROC_GETPORT = 3
+NFS_PROGRAM = 100003
+NFS_VERSION = 3
+MOUNT_PROGRAM = 100005
+MOUNT_VERSION = 3
+IPPROTO_TCP = 6
+
+CHECKS = ('icmp', 'tcp_nfs', 'tcp_portmap', 'rpc_nfs', 'rpc_mountd')
+
+# Round trips on a LAN are well under a millisecond
+RTT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+LAST_FRAGMENT = 0x80000000
+
+
+class RPCError(Exception):
+    pass
+
+
+def rpc_call(xid, program, version, procedure, args=b''):
+    """One record-marked ONC-RPC call with AUTH_NONE credentials"""
+    body = struct.pack('>10I', xid, 0, 2, program, version, procedure, 0, 0, 0, 0) + args
+    return struct.pack('>I', LAST_FRAGMENT | len(body)) + body
+
+
+def parse_reply(xid, record):
+    """Results of an accepted and successful reply to call xid"""
+    try:
+        reply_xid, msg_type, reply_stat = struct.unpack_from('>3I', record)
+        if reply_xid != xid or msg_type != 1:
+            raise RPCError("reply does not match the call")
+        if reply_stat != 0:
+            raise RPCError("call denied")
+        verifier_length, = struct.unpack_from('>I', record, 16)
+        offset = 20 + (verifier_length + 3) // 4 * 4
+        accept_stat, = struct.unpack_from('>I', record, offset)
+    except struct.error:
+        raise RPCError("truncated reply")
+    if accept_stat != 0:
+        raise RPCError(f"call not executed (accept_stat {accept_stat})")
+    return record[offset + 4:]
+
+
+async def read_record(reader):
+    fragments = []
+    while True:
+        header, = struct.unpack('>I', await reader.readexactly(4))
+        fragments.append(await reader.readexactly(header & ~LAST_FRAGMENT))
+        if header & LAST_FRAGMENT:
+            return b''.join(fragments)
+
+
+def icmp_checksum(data):
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'>{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def icmp_echo_request(sequence, payload=b'nfs-exporter'):
+    # The kernel fills in the identifier of an unprivileged ICMP socket
+    header = struct.pack('>BBHHH', 8, 0, 0, 0, sequence)
+    checksum = icmp_checksum(header + payload)
+    return struct.pack('>BBHHH', 8, 0, checksum, 0, sequence) + payload
+
+
+class ReachabilityProber:
+    """Concurrent TCP, ONC-RPC NULL and ICMP checks against NFS servers
+
+    For every host it times the TCP connect to the NFS and portmapper
+    ports, a NULL call to the NFS program and, after asking the
+    portmapper for its port, a NULL call to mountd.  ICMP uses an
+    unprivileged datagram socket and is skipped where the kernel does not
+    allow one (net.ipv4.ping_group_range).  Nothing is forked.
+    """
+
+    def __init__(self, nfs_port=2049, portmap_port=111, icmp=True):
+        self.nfs_port = nfs_port
+        self.portmap_port = portmap_port
+        self.icmp = icmp
+        self.xids = itertools.count(int.from_bytes(os.urandom(4), 'big'))
+        self.sequence = itertools.count(1)
+
+    @property
+    def checks(self):
+        return CHECKS if self.icmp else CHECKS[1:]
+
+    def run(self, hosts, timeout):
+        """{host: {check: rtt seconds or None when it failed}}"""
+        return asyncio.run(self.check_hosts(hosts, timeout))
+
+    async def check_hosts(self, hosts, timeout):
+        results = await asyncio.gather(*(self.check_host(host, timeout) for host in hosts))
+        return dict(zip(hosts, results))
+
+    async def check_host(self, host, timeout):
+        results = {}
+        probes = [
+            self.check_nfs(host, results),
+            self.check_mountd(host, results),
+        ]
+        if self.icmp:
+            probes.append(self.check_icmp(host, results))
+        await asyncio.gather(*(self.guard(host, probe, timeout) for probe in probes))
+        return {check: results.get(check) for check in self.checks}
+
+    @staticmethod
+    async def guard(host, probe, timeout):
+        try:
+            await asyncio.wait_for(probe, timeout)
+        except asyncio.TimeoutError:
+            print(f"Reachability check of {host} timed out after {timeout}s")
+        except (OSError, RPCError, asyncio.IncompleteReadError) as e:
+            print(f"Reachability check of {host} failed: {e}")
+
+    async def connect(self, host, port):
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_connection(host, port)
+        return reader, writer, time.perf_counter() - start
+
+    async def call(self, reader, writer, program, version, procedure, args=b''):
+        """Run one RPC call; returns (result bytes, round trip seconds)"""
+        xid = next(self.xids) & 0xffffffff
+        start = time.perf_counter()
+        writer.write(rpc_call(xid, program, version, procedure, args))
+        await writer.drain()
+        record = await read_record(reader)
+        elapsed = time.perf_counter() - start
+        return parse_reply(xid, record), elapsed
+
+    async def check_nfs(self, host, results):
+        reader, writer, results['tcp_nfs'] = await self.connect(host, self.nfs_port)
+        try:
+            _, results['rpc_nfs'] = await self.call(reader, writer, NFS_PROGRAM, NFS_VERSION, 0)
+        finally:
+            writer.close()
+
+    async def check_mountd(self, host, results):
+        reader, writer, results['tcp_portmap'] = await self.connect(host, self.portmap_port)
+        try:
+            mapping = struct.pack('>4I', MOUNT_PROGRAM, MOUNT_VERSION, IPPROTO_TCP, 0)
+            reply, _ = await self.call(reader, writer, PORTMAP_PROGRAM, PORTMAP_VERSION, PMAPPROC_GETPORT, mapping)
+        finally:
+            writer.close()
+
+        try:
+            port, = struct.unpack_from('>I', reply)
+        except struct.error:
+            raise RPCError("truncated GETPORT reply")
+        if not port:
+            raise RPCError("mountd is not registered with the portmapper")
+
+        reader, writer, _ = await self.connect(host, port)
+        try:
+            _, results['rpc_mountd'] = await self.call(reader, writer, MOUNT_PROGRAM, MOUNT_VERSION, 0)
+        finally:
+            writer.close()
+
+    async def check_icmp(self, host, results):
+        loop = asyncio.get_running_loop()
+        address = (await loop.getaddrinfo(host, None, family=socket.AF_INET))[0][4][0]
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        except PermissionError as e:
+            if self.icmp:
+                print(f"Unprivileged ICMP not permitted, disabling ICMP checks: {e}")
+                self.icmp = False
+            return
+
+        try:
+            sock.setblocking(False)
+            sequence = next(self.sequence) & 0xffff
+            await loop.sock_connect(sock, (address, 0))
+            start = time.perf_counter()
+            await loop.sock_sendall(sock, icmp_echo_request(sequence))
+            while True:
+                reply = await loop.sock_recv(sock, 1024)
+                # Echo reply; the socket only receives replies to its own identifier
+                if len(reply) >= 8 and reply[0] == 0 and struct.unpack_from('>H', reply, 6)[0] == sequence:
+                    results['icmp'] = time.perf_counter() - start
+                    return
+        finally:
+            sock.close()
+
+
+def main():
+    """Check hosts from the command line: python -m exporter.prober HOST..."""
+    prober = ReachabilityProber()
+    for host, checks in prober.run(sys.argv[1:], 3).items():
+        for check, rtt in checks.items():
+            print(f"{host} {check} {'failed' if rtt is None else f'{rtt * 1000:.3f}ms'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Longest capture a request may ask for
+MAX_SECONDS = 60
+
+SAMPLE_INTERVAL = 0.005
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+class CollectionProfiler:
+    """On-demand profiles of the collection loop for /debug/profile
+
+    `cprofile` runs collector calls that start during the capture under
+    their own cProfile.Profile (one per call, as a profile cannot be
+    shared between threads) and merges them.  Only one call is profiled at
+    a time, since from Python 3.12 a second active profiler raises; calls
+    overlapping it run unprofiled and are counted.  `sample` instead walks the
+    stacks of the collection threads every few milliseconds, which costs
+    nothing when idle and also catches code blocked in I/O; its output is
+    in the collapsed format flame graph tools read.  One capture runs at a
+    time.
+    """
+
+    def __init__(self, thread_prefixes=('collect',)):
+        self.thread_prefixes = thread_prefixes
+        self.lock = threading.Lock()
+        self.profiles = None  # list of finished profiles while capturing
+        self.profiling = threading.Lock()  # held by the one call being profiled
+        self.unprofiled = 0  # calls during the capture that overlapped a profiled one
+
+    def wrap(self, function):
+        """function, profiled while a cprofile capture is running"""
+        def profiled(*args):
+            profiles = self.profiles
+            if profiles is None:
+                return function(*args)
+            if not self.profiling.acquire(blocking=False):
+                self.unprofiled += 1
+                return function(*args)
+            try:
+                profile = cProfile.Profile()
+                try:
+                    return profile.runcall(function, *args)
+                finally:
+                    profiles.append(profile)
+            finally:
+                self.profiling.release()
+        return profiled
+
+    def capture(self, mode, seconds):
+        """Profile text for `seconds` of collection"""
+        seconds = max(0.1, min(float(seconds), MAX_SECONDS))
+        if not self.lock.acquire(blocking=False):
+            raise ProfilerBusy("a profile is already being captured")
+        try:
+            if mode == 'cprofile':
+                return self.cprofile(seconds)
+            if mode == 'sample':
+                return self.sample(seconds)
+            raise ValueError(f"unknown profile mode {mode!r}")
+        finally:
+            self.lock.release()
+
+    def cprofile(self, seconds):
+        self.unprofiled = 0
+        self.profiles = []
+        time.sleep(seconds)
+        profiles, self.profiles = self.profiles, None
+        unprofiled = self.unprofiled
+
+        if not profiles:
+            return f"No collector ran in {seconds}s\n"
+        out = io.StringIO()
+        stats = pstats.Stats(profiles[0], stream=out)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        out.write(f"{len(profiles)} collector runs in {seconds}s, {unprofiled} more overlapped them unprofiled\n")
+        stats.sort_stats('cumulative').print_stats(60)
+        return out.getvalue()
+
+    def sample(self, seconds):
+        stacks = Counter()
+        own = threading.get_ident()
+        end = time.monotonic() + seconds
+        samples = 0
+        while time.monotonic() < end:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or not names.get(ident, '').startswith(self.thread_prefixes):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({code.co_filename}:{frame.f_lineno})')
+                    frame = frame.f_back
+                stacks[';'.join(reversed(stack))] += 1
+            samples += 1
+            time.sleep(SAMPLE_INTERVAL)
+
+        lines = [f'{stack} {count}' for stack, count in stacks.most_common()]
+        return f"# {samples} samples every {SAMPLE_INTERVAL}s over {seconds}s\n" + '\n'.join(lines) + '\n'
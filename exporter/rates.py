@@ -0,0 +1,162 @@
+import json
+import math
+from collections import deque
+
+from exporter.registry import MetricRegistry
+
+# Series the scaler and alerts make local decisions on
+DEFAULT_RATE_METRICS = (
+    'haproxy_stats_backend_http_requests_total,haproxy_stats_backend_sessions_total,'
+    'mysql_queries_total,nfs_read_ops_total,nfs_write_ops_total,'
+    'docker_cpu_usage_seconds_total,docker_network_rx_bytes,docker_network_tx_bytes'
+)
+
+# Windowed rates from the ring buffer
+RATE_WINDOWS = (('1m', 60), ('5m', 300))
+
+# Time constants of the smoothed rates, as in the load average
+EWMA_WINDOWS = (('1m', 60), ('5m', 300), ('15m', 900))
+
+
+def rate_base(name):
+    return name[:-len('_total')] if name.endswith('_total') else name
+
+
+class SeriesHistory:
+    """Bounded recent samples of one series, corrected for counter resets"""
+
+    __slots__ = ('points', 'last_raw', 'offset', 'resets', 'ewma')
+
+    def __init__(self, capacity):
+        self.points = deque(maxlen=capacity)  # (monotonic time, reset-corrected value)
+        self.last_raw = None
+        self.offset = 0
+        self.resets = 0
+        self.ewma = [None] * len(EWMA_WINDOWS)
+
+    def add(self, timestamp, value):
+        # A counter that goes down was restarted from zero
+        if self.last_raw is not None and value < self.last_raw:
+            self.offset += self.last_raw
+            self.resets += 1
+        self.last_raw = value
+        value += self.offset
+
+        if self.points:
+            previous_time, previous_value = self.points[-1]
+            elapsed = timestamp - previous_time
+            if elapsed <= 0:
+                return
+            instant = (value - previous_value) / elapsed
+            for i, (_, tau) in enumerate(EWMA_WINDOWS):
+                if self.ewma[i] is None:
+                    self.ewma[i] = instant
+                else:
+                    self.ewma[i] += (1 - math.exp(-elapsed / tau)) * (instant - self.ewma[i])
+
+        self.points.append((timestamp, value))
+
+    def rate(self, window):
+        """Per-second increase over the last window seconds, or None"""
+        points = self.points
+        if len(points) < 2:
+            return None
+        last_time, last_value = points[-1]
+        first_time, first_value = points[-2]
+        cutoff = last_time - window
+        for timestamp, value in reversed(points):
+            if timestamp < cutoff:
+                break
+            if timestamp != last_time:
+                first_time, first_value = timestamp, value
+        return (last_value - first_value) / (last_time - first_time)
+
+
+class RateTracker:
+    """Per-second rates and smoothed rates of selected series
+
+    After each collection the tracker samples the named families of every
+    collector registry that finished a cycle since the last update, keeps
+    a ring buffer per series and publishes `<name>_rate` and
+    `<name>_rate_ewma` gauges (a trailing `_total` is dropped) plus the
+    same numbers as a JSON document for consumers that cannot afford a
+    Prometheus range query.
+    """
+
+    def __init__(self, names, capacity=128):
+        self.names = set(names)
+        self.capacity = capacity
+        self.history = {}  # (family name, label values) -> SeriesHistory
+        self.labelnames = {}  # family name -> label names
+        self.updated = {}  # registry -> time of the cycle last sampled
+        self.keys = {}  # registry -> series keys it provided
+        self.registry = MetricRegistry()
+        self.json = b'{}'
+
+    def update(self, registries):
+        changed = False
+        for registry in registries:
+            timestamp = registry.updated
+            if timestamp is None or self.updated.get(registry) == timestamp:
+                continue
+            self.updated[registry] = timestamp
+            changed = True
+
+            with registry.lock:
+                samples = []
+                for name in self.names:
+                    family = registry.families.get(name)
+                    if family is None or family.kind == 'histogram':
+                        continue
+                    self.labelnames[name] = family.labelnames
+                    samples.extend(((name, labelvalues), sample.value) for labelvalues, sample in family.samples.items())
+
+            keys = set()
+            for key, value in samples:
+                history = self.history.get(key)
+                if history is None:
+                    history = self.history[key] = SeriesHistory(self.capacity)
+                history.add(timestamp, value)
+                keys.add(key)
+
+            # Series that vanished from the collector lose their history
+            for key in self.keys.get(registry, set()) - keys:
+                del self.history[key]
+            self.keys[registry] = keys
+
+        if changed:
+            self.publish()
+
+    def publish(self):
+        document = {}
+        with self.registry.cycle():
+            for (name, labelvalues), history in self.history.items():
+                labelnames = self.labelnames[name]
+                base = rate_base(name)
+                rate_family = self.registry.gauge(
+                    f'{base}_rate', f'Per-second rate of {name} over the window', labelnames + ('window',)
+                )
+                ewma_family = self.registry.gauge(
+                    f'{base}_rate_ewma', f'Exponentially weighted per-second rate of {name}', labelnames + ('window',)
+                )
+
+                rates = {}
+                for window, seconds in RATE_WINDOWS:
+                    rate = history.rate(seconds)
+                    if rate is not None:
+                        rates[window] = rate
+                        rate_family.labels(*labelvalues, window).set(rate)
+                smoothed = {}
+                for (window, _), value in zip(EWMA_WINDOWS, history.ewma):
+                    if value is not None:
+                        smoothed[window] = value
+                        ewma_family.labels(*labelvalues, window).set(value)
+
+                document.setdefault(name, []).append({
+                    'labels': dict(zip(labelnames, labelvalues)),
+                    'rate': rates,
+                    'ewma': smoothed,
+                    'resets': history.resets,
+                })
+
+        self.json = json.dumps(document, separators=(',', ':')).encode('utf-8')
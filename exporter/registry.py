@@ -0,0 +1,265 @@
+import math
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+INF = float('inf')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, INF)
+
+
+def escape_label_value(value):
+    """Escape a label value for the text exposition format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def escape_help(text):
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def format_labels(labelnames, labelvalues):
+    if not labelnames:
+        return ''
+    pairs = ','.join(f'{name}="{escape_label_value(value)}"' for name, value in zip(labelnames, labelvalues))
+    return '{' + pairs + '}'
+
+
+def format_value(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(int(value))
+
+
+class Sample:
+    """One gauge/counter series, updated in place every cycle"""
+
+    __slots__ = ('registry', 'labels', 'value', 'generation')
+
+    def __init__(self, registry, labels):
+        self.registry = registry
+        self.labels = labels  # pre-rendered '{name="value",...}'
+        self.value = 0
+        self.generation = 0
+
+    def set(self, value):
+        self.value = value
+        self.generation = self.registry.generation
+
+    def inc(self, amount=1):
+        self.value += amount
+        self.generation = self.registry.generation
+
+    def touch(self):
+        """Keep the last value for this cycle without updating it"""
+        self.generation = self.registry.generation
+
+
+class HistogramSample:
+    """Bucket counts, sum and count of one histogram series"""
+
+    __slots__ = ('registry', 'labels', 'bucket_labels', 'upper_bounds', 'counts', 'sum', 'count', 'generation')
+
+    def __init__(self, registry, labelnames, labelvalues, upper_bounds):
+        self.registry = registry
+        self.labels = format_labels(labelnames, labelvalues)
+        self.bucket_labels = [
+            format_labels(labelnames + ('le',), labelvalues + (format_value(float(bound)),))
+            for bound in upper_bounds
+        ]
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+        self.count = 0
+        self.generation = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.generation = self.registry.generation
+
+    def touch(self):
+        """Keep the series through this cycle without an observation"""
+        self.generation = self.registry.generation
+
+
+class MetricFamily:
+    """A named, typed metric with a fixed set of label names"""
+
+    __slots__ = ('registry', 'name', 'kind', 'help', 'labelnames', 'buckets', 'samples')
+
+    def __init__(self, registry, name, kind, help_text, labelnames, buckets=None):
+        self.registry = registry
+        self.name = name
+        self.kind = kind
+        self.help = escape_help(help_text)
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self.samples = {}  # interned label values tuple -> sample
+
+    def sample(self, labelvalues):
+        """Sample for a tuple of label values, created on first use"""
+        sample = self.samples.get(labelvalues)
+        if sample is None:
+            # Stored under the str-converted values, so look those up before creating
+            labelvalues = self.registry.intern(labelvalues)
+            sample = self.samples.get(labelvalues)
+        if sample is None:
+            if self.kind == 'histogram':
+                sample = HistogramSample(self.registry, self.labelnames, labelvalues, self.buckets)
+            else:
+                sample = Sample(self.registry, format_labels(self.labelnames, labelvalues))
+            self.samples[labelvalues] = sample
+        return sample
+
+    def labels(self, *labelvalues):
+        return self.sample(labelvalues)
+
+    def set(self, value):
+        self.sample(()).set(value)
+
+    def observe(self, value):
+        self.sample(()).observe(value)
+
+    def touch(self, *labelvalues):
+        """Keep the existing series, or the one with these label values if it exists, through this cycle"""
+        if not labelvalues:
+            for sample in self.samples.values():
+                sample.touch()
+            return
+        sample = self.samples.get(tuple(str(value) for value in labelvalues))
+        if sample is not None:
+            sample.touch()
+
+    def render(self, lines):
+        name = self.name
+        if self.kind != 'histogram':
+            for sample in self.samples.values():
+                lines.append(f"{name}{sample.labels} {format_value(sample.value)}")
+            return
+
+        for sample in self.samples.values():
+            cumulative = 0
+            for bucket_labels, count in zip(sample.bucket_labels, sample.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{sample.labels} {format_value(sample.sum)}")
+            lines.append(f"{name}_count{sample.labels} {sample.count}")
+
+
+class MetricRegistry:
+    """Typed metric families of one collector
+
+    Samples are kept between cycles and updated in place.  Updates happen
+    inside cycle(); series that were not set, observed or touched during a
+    successful cycle are dropped at its end, so vanished containers or
+    servers disappear from the output.  A histogram series that is only
+    observed now and then must be touched in the cycles without an
+    observation.
+    """
+
+    def __init__(self):
+        self.families = {}  # name -> MetricFamily, in declaration order
+        self.label_sets = {}  # canonical label value tuples shared by all families, pruned by sweep()
+        self.generation = 0
+        self.kept = set()  # names of families expire() leaves alone
+        self.epoch = 0  # bumped whenever series are dropped, so cached Samples can be checked
+        self.updated = None  # monotonic time the last successful cycle ended
+        self.lock = threading.RLock()
+
+    def family(self, name, kind, help_text, labelnames=(), buckets=None):
+        """Declare a family, or return it if it already exists"""
+        family = self.families.get(name)
+        if family is None:
+            if buckets is not None:
+                buckets = tuple(sorted(float(b) for b in buckets))
+                if buckets[-1] != INF:
+                    buckets += (INF,)
+            family = self.families[name] = MetricFamily(self, name, kind, help_text, labelnames, buckets)
+        elif family.kind != kind:
+            raise ValueError(f"metric {name} already registered as {family.kind}")
+        return family
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.family(name, 'gauge', help_text, labelnames)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.family(name, 'counter', help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.family(name, 'histogram', help_text, labelnames, buckets)
+
+    def keep(self, family):
+        """Exempt a family from expire(), for status gauges that must outlive the stale values"""
+        self.kept.add(family.name)
+        return family
+
+    def intern(self, labelvalues):
+        labelvalues = tuple(sys.intern(str(value)) for value in labelvalues)
+        return self.label_sets.setdefault(labelvalues, labelvalues)
+
+    @contextmanager
+    def cycle(self):
+        """Update samples for one collection cycle, then drop stale series"""
+        with self.lock:
+            self.generation += 1
+            yield self
+            # Only reached when the update finished without raising
+            self.sweep(histograms=True)
+            self.updated = time.monotonic()
+
+    def expire(self):
+        """Drop every gauge and counter series without counting as an update
+
+        Histograms are cumulative rather than last values, so they stay, and
+        so do families passed to keep().
+        """
+        with self.lock:
+            self.generation += 1
+            self.sweep(kept=self.kept)
+
+    def sweep(self, histograms=False, kept=()):
+        generation = self.generation
+        dropped = set()
+        for family in self.families.values():
+            if family.kind == 'histogram' and not histograms or family.name in kept:
+                continue
+            stale = [key for key, sample in family.samples.items() if sample.generation != generation]
+            for key in stale:
+                del family.samples[key]
+            dropped.update(stale)
+        if not dropped:
+            return
+        self.epoch += 1
+        # Forget label sets no family uses any more, or churning container
+        # ids and names would pile up here for the life of the process
+        families = self.families.values()
+        for key in dropped:
+            if not any(key in family.samples for family in families):
+                self.label_sets.pop(key, None)
+
+    def get(self, name, *labelvalues):
+        """Current value of a gauge/counter series, or None"""
+        family = self.families.get(name)
+        if family is None:
+            return None
+        sample = family.samples.get(labelvalues)
+        return sample.value if sample is not None else None
+
+    def render(self):
+        """Text exposition of every family that currently has samples"""
+        lines = []
+        with self.lock:
+            for family in self.families.values():
+                if not family.samples:
+                    continue
+                lines.append(f"# HELP {family.name} {family.help}")
+                lines.append(f"# TYPE {family.name} {family.kind}")
+                family.render(lines)
+        return '\n'.join(lines) + '\n' if lines else ''
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+
+class CollectorSource:
+    """A named metrics source with its own interval, timeout and deadline
+
+    `collect` is called with the timeout (seconds) it should pass on to
+    its own I/O and updates its collector's metrics.  The deadline is how
+    long the scheduler waits for it before giving up on this run; a source
+    that overruns keeps its last values and is not started again until the
+    hung call returns.
+
+    Every run is counted and timed; `durations` holds the seconds of runs
+    that finished since the owner last drained it.
+    """
+
+    def __init__(self, name, collect, interval=30, timeout=5, deadline=None):
+        self.name = name
+        self.collect = collect
+        self.interval = interval
+        self.timeout = timeout
+        self.deadline = deadline if deadline is not None else timeout * 2
+        self.next_run = 0
+        self.started = 0
+        self.future = None
+        self.runs = 0
+        self.failures = 0  # runs that raised
+        self.timeouts = 0  # runs that missed their deadline
+        self.last_success = None  # wall-clock time the last good run finished
+        self.up = None  # whether the last run succeeded; None before the first
+        self.durations = deque(maxlen=1024)
+
+    def run(self):
+        """Call collect on a pool thread, recording how long it took"""
+        start = time.perf_counter()
+        try:
+            self.collect(self.timeout)
+        except Exception:
+            self.failures += 1
+            self.up = False
+            raise
+        else:
+            self.last_success = time.time()
+            self.up = True
+        finally:
+            self.runs += 1
+            self.durations.append(time.perf_counter() - start)
+
+
+class CollectorScheduler:
+    """Run collector sources concurrently on a thread pool"""
+
+    def __init__(self, sources, max_workers=None):
+        self.sources = list(sources)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or max(1, len(self.sources)),
+            thread_name_prefix='collector'
+        )
+
+    def _harvest(self, source, timeout=0):
+        """Wait up to timeout seconds for a run to finish and report failures"""
+        try:
+            source.future.result(timeout=timeout)
+        except TimeoutError:
+            source.timeouts += 1
+            source.up = False
+            print(f"Collector {source.name} missed its {source.deadline}s deadline")
+            return False
+        except Exception as e:
+            print(f"Collector {source.name} failed: {e}")
+        source.future = None
+        return True
+
+    def run_once(self):
+        """Start every due source and wait for them up to their deadlines"""
+        now = time.monotonic()
+        started = []
+
+        for source in self.sources:
+            if source.future is not None:
+                # Previous run overran its deadline; pick it up if it is done now
+                if not source.future.done():
+                    if now >= source.next_run:
+                        source.next_run = now + source.interval
+                    continue
+                self._harvest(source)
+
+            if now < source.next_run:
+                continue
+
+            source.started = now
+            source.next_run = now + source.interval
+            source.future = self.executor.submit(source.run)
+            started.append(source)
+
+        # All sources run in parallel, so the cycle costs the slowest deadline
+        for source in started:
+            remaining = source.started + source.deadline - time.monotonic()
+            self._harvest(source, timeout=max(0, remaining))
+
+    def seconds_until_due(self):
+        """Seconds until the next source is due to run"""
+        if not self.sources:
+            return 30
+        next_run = min(source.next_run for source in self.sources)
+        return max(0, next_run - time.monotonic())
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SingleFlight:
+    """Run a function once for any number of concurrent callers
+
+    The first caller starts a run on its own thread; callers arriving
+    while it is in flight wait for that run instead of starting another.
+    Nobody waits longer than the timeout they pass, so a slow source can
+    delay a scrape but never hold it past the scraper's own timeout.
+    """
+
+    def __init__(self, function, name='collect-scrape'):
+        self.function = function
+        self.name = name
+        self.lock = threading.Lock()
+        self.done = None  # Event of the run in flight
+
+    def run(self, timeout=None, start=True):
+        """Join the run in flight, or start one if `start`; True once it finished within timeout"""
+        with self.lock:
+            done = self.done
+            if done is None:
+                if not start:
+                    return True
+                done = self.done = threading.Event()
+                threading.Thread(target=self._run, args=(done,), name=self.name, daemon=True).start()
+        return done.wait(timeout)
+
+    def _run(self, done):
+        try:
+            self.function()
+        except Exception as e:
+            print(f"Error in {self.name}: {e}")
+        finally:
+            with self.lock:
+                self.done = None
+            done.set()
@@ -0,0 +1,138 @@
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def accepts_gzip(header):
+    """Check an Accept-Encoding header for gzip with a non-zero q-value"""
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps scrape connections alive between requests
+    protocol_version = 'HTTP/1.1'
+    # Drop idle keep-alive connections instead of holding a thread forever
+    timeout = 120
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # body of a small response waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def handle_request(self, send_body):
+        start = time.perf_counter()
+        self.status = None
+        self.body_size = 0
+
+        path, _, query = self.path.partition('?')
+        if path == '/metrics':
+            if self.server.refresh:
+                self.server.refresh()
+            self.send_metrics(send_body, parse_qs(query))
+        elif path in self.server.routes:
+            content_type, body = self.server.routes[path](parse_qs(query))
+            self.send_document(send_body, content_type, body)
+        else:
+            self.send_empty(404)
+            # Unknown paths share one label instead of one series each
+            path = 'other'
+
+        if self.server.observe:
+            self.server.observe(path, self.status, time.perf_counter() - start, self.body_size)
+
+    def send_metrics(self, send_body, params):
+        # /metrics?collect[]=nfs_mount&collect[]=mysql serves a subset of collectors
+        names = params.get('collect[]')
+        if names and self.server.select:
+            snapshot = self.server.select(names)
+            if snapshot is None:
+                self.send_empty(400)
+                return
+        else:
+            snapshot = self.server.snapshot.current()
+
+        if self.headers.get('If-None-Match') == snapshot.etag:
+            self.send_empty(304, etag=snapshot.etag)
+            return
+
+        body = snapshot.body
+        gzipped = accepts_gzip(self.headers.get('Accept-Encoding'))
+        if gzipped:
+            body = snapshot.gzip_body()
+
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', snapshot.etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+            self.body_size = len(body)
+
+    def send_document(self, send_body, content_type, body):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+            self.body_size = len(body)
+
+    def send_empty(self, code, etag=None):
+        self.send_response(code)
+        if etag:
+            self.send_header('ETag', etag)
+        if code != 304:
+            self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_request(self, code='-', size='-'):
+        # send_response() reports every status here
+        self.status = getattr(code, 'value', code)
+
+    def log_message(self, format, *args):
+        # Suppress default logging
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Threaded /metrics server shared by all exporters
+
+    `routes` maps extra paths to callables that take the parsed query
+    string and return (content type, body bytes); they should hand out
+    documents prepared by the collector rather than build them per
+    request.  `observe`, if given, is called with (path, status, seconds,
+    body bytes) after every request, and `refresh` before /metrics is
+    served, for exporters that collect on demand.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, snapshot, select=None, routes=None, observe=None, refresh=None,
+                 handler_class=MetricsHandler):
+        self.snapshot = snapshot
+        self.select = select
+        self.routes = routes or {}
+        self.observe = observe
+        self.refresh = refresh
+        super().__init__(server_address, handler_class)
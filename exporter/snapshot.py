@@ -0,0 +1,42 @@
+import gzip
+import hashlib
+import time
+
+
+class MetricsSnapshot:
+    """An immutable, already-encoded /metrics payload"""
+
+    __slots__ = ('body', 'created', 'etag', '_gzip_body')
+
+    def __init__(self, body, created=None):
+        self.body = body
+        self.created = created if created is not None else time.time()
+        self.etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+        self._gzip_body = None
+
+    def gzip_body(self):
+        """Gzip-compressed body, compressed once on first use"""
+        # Two handlers racing here just compress twice; the result is identical
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzip_body
+
+
+class SnapshotBuffer:
+    """Double buffer between the collector and the HTTP handlers
+
+    The collector renders the next payload off to the side and publish()
+    swaps it in with a single reference assignment, so readers never take
+    a lock and always see either the old or the new snapshot in full.
+    """
+
+    def __init__(self):
+        self._current = MetricsSnapshot(b'')
+
+    def publish(self, text):
+        snapshot = MetricsSnapshot(text.encode('utf-8'))
+        self._current = snapshot
+        return snapshot
+
+    def current(self):
+        return self._current
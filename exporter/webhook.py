@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""Alertmanager webhook receiver
+
+    python -m exporter.webhook                       receive on WEBHOOK_PORT (5001)
+    python -m exporter.webhook --load URL            generate load against a receiver
+
+    GET /alerts?alertname=ContainerHighCPU&name=nginx-3&status=firing&since=7d
+
+POST /webhook is acknowledged as soon as the body is read and queued;
+parsing, the alert processor and the sinks run on worker tasks behind a
+bounded queue.  When the queue is full the receiver answers 503 and
+Alertmanager retries later, so a storm backs up in Alertmanager instead
+of in our memory.  GET /metrics reports queue depth, rejections and the
+time from receipt to the sinks.  The alert log only gets what the
+processor forwards: no repeats, nothing flapping and at most
+WEBHOOK_RATE_LIMITS alerts per minute per receiver.  With WEBHOOK_DB set,
+every state change is also kept in SQLite and GET /alerts queries them;
+parameters other than since, until, status, fingerprint, alertname and
+limit match alert labels.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import sqlite3
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from exporter.alertprocessor import AlertProcessor, parse_rate_limits
+from exporter.alertstore import AlertStore, parse_duration
+from exporter.registry import MetricRegistry
+from exporter.server import CONTENT_TYPE, accepts_gzip
+from exporter.snapshot import SnapshotBuffer
+
+# Queueing is microseconds; sink flushes and a backed-up queue are not
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+BATCH_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Alertmanager caps a notification at max_alerts; even unbounded groups stay well below this
+MAX_BODY = 4 * 1024 * 1024
+
+# Keep-alive connections idle for longer than this are closed
+IDLE_TIMEOUT = 120
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 411: 'Length Required',
+           413: 'Payload Too Large', 431: 'Request Header Fields Too Large', 503: 'Service Unavailable'}
+
+JSON_CONTENT_TYPE = 'application/json'
+
+
+def fingerprint(alert):
+    """Alertmanager's fingerprint of an alert, or a hash of its labels for senders without one"""
+    value = alert.get('fingerprint')
+    if value:
+        return value
+    labels = alert.get('labels') or {}
+    text = '\xff'.join(f'{name}\xfe{labels[name]}' for name in sorted(labels))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def alert_records(payload, received):
+    """One flat record per alert of an Alertmanager notification"""
+    records = []
+    for alert in payload.get('alerts') or ():
+        if not isinstance(alert, dict):
+            continue
+        labels = alert.get('labels') or {}
+        records.append({
+            'received': received,
+            'fingerprint': fingerprint(alert),
+            'status': alert.get('status') or payload.get('status'),
+            'alertname': labels.get('alertname'),
+            'labels': labels,
+            'annotations': alert.get('annotations') or {},
+            'startsAt': alert.get('startsAt'),
+            'endsAt': alert.get('endsAt'),
+            'receiver': payload.get('receiver'),
+            'groupKey': payload.get('groupKey'),
+        })
+    return records
+
+
+class BatchSink:
+    """Base for sinks that write alert records in batches
+
+    Records are buffered and written by one thread when `batch_size` have
+    accumulated or every `flush_interval` seconds, so a storm costs one
+    write per batch rather than one per alert.  Once `limit` records are
+    pending, submit() waits for the write to finish, which slows the
+    workers down and, through the queue, the receiver.  Subclasses
+    implement write(batch), which runs on the writer thread, and may
+    override open() and release(), which run there too.
+    """
+
+    name = None
+
+    def __init__(self, batch_size=500, flush_interval=1.0, limit=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.limit = limit or batch_size * 10
+        self.pending = []
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self.flush_durations = []
+        self.lock = None
+        self.tasks = []
+        self.flushing = None
+        # A single writer keeps batches in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'webhook-{self.name}')
+
+    async def run(self, function, *args):
+        """Call function on the writer thread"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def start(self):
+        self.lock = asyncio.Lock()
+        await self.run(self.open)
+        self.tasks.append(asyncio.create_task(self.flush_periodically()))
+
+    async def submit(self, records):
+        self.pending.extend(records)
+        if len(self.pending) >= self.limit:
+            await self.flush()
+        elif len(self.pending) >= self.batch_size and not self.lock.locked():
+            self.flushing = asyncio.create_task(self.flush())
+            self.flushing.add_done_callback(self.flushed)
+
+    def flushed(self, task):
+        """Report what escaped a background flush, which nothing awaits"""
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Background flush of the {self.name} sink failed: {task.exception()!r}", file=sys.stderr)
+
+    async def flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        async with self.lock:
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, []
+            start = time.perf_counter()
+            try:
+                await self.run(self.write, batch)
+            except Exception as e:
+                self.failures += 1
+                print(f"Error writing {len(batch)} alerts to the {self.name} sink: {e}", file=sys.stderr)
+                return
+            self.flush_durations.append(time.perf_counter() - start)
+            self.written += len(batch)
+            self.flushes += 1
+
+    def open(self):
+        pass
+
+    def write(self, batch):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await self.flush()
+        await self.run(self.release)
+        self.executor.shutdown()
+
+
+class JSONLogSink(BatchSink):
+    """Structured alert log, one JSON object per line"""
+
+    name = 'log'
+
+    def __init__(self, path='-', **options):
+        super().__init__(**options)
+        self.path = path
+        self.file = None
+
+    def open(self):
+        self.file = sys.stdout if self.path == '-' else open(self.path, 'a', encoding='utf-8')
+
+    def write(self, batch):
+        self.file.write(''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in batch))
+        self.file.flush()
+
+    def release(self):
+        if self.file is not None and self.file is not sys.stdout:
+            self.file.close()
+
+
+class StoreSink(BatchSink):
+    """Alert history kept in an AlertStore, one transaction per batch
+
+    Events older than `retention` seconds are deleted every
+    `purge_interval` seconds on the same writer thread.
+    """
+
+    name = 'store'
+
+    def __init__(self, store, retention=30 * 86400, purge_interval=3600, **options):
+        super().__init__(**options)
+        self.store = store
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self.purged = 0
+
+    async def start(self):
+        await super().start()
+        self.tasks.append(asyncio.create_task(self.purge_periodically()))
+
+    def open(self):
+        self.store.open()
+
+    def write(self, batch):
+        self.store.insert(batch)
+
+    def release(self):
+        self.store.close()
+
+    async def purge_periodically(self):
+        while True:
+            try:
+                self.purged += await self.run(self.store.purge, time.time() - self.retention)
+            except sqlite3.Error as e:
+                print(f"Error applying alert retention: {e}", file=sys.stderr)
+            await asyncio.sleep(self.purge_interval)
+
+
+class AlertPipeline:
+    """Bounded queue of received notifications and the workers draining it
+
+    Workers are tasks on the receiver's event loop: parsing is quick and
+    the slow part, the sinks' I/O, happens in executors, so several
+    workers keep batches flowing while one waits on a write.
+    """
+
+    def __init__(self, sinks, history=(), queue_size=10000, workers=4, processor=None):
+        self.sinks = sinks  # notification sinks, fed what the processor forwards
+        self.history = list(history)  # fed every state change
+        self.queue_size = queue_size
+        self.worker_count = workers
+        self.processor = processor or AlertProcessor()
+        self.queue = None
+        self.workers = []
+        self.accepted = 0
+        self.rejected = 0
+        self.invalid = 0
+        self.alerts = Counter()  # status -> alerts forwarded
+        self.latencies = []
+        self.batch_sizes = []
+
+    async def start(self):
+        self.queue = asyncio.Queue(self.queue_size)
+        for sink in self.all_sinks:
+            await sink.start()
+        self.workers = [asyncio.create_task(self.work()) for _ in range(self.worker_count)]
+
+    def submit(self, body):
+        """Queue a raw notification body; False when the queue is full"""
+        try:
+            self.queue.put_nowait((time.perf_counter(), time.time(), body))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.accepted += 1
+        return True
+
+    async def work(self):
+        while True:
+            item = await self.queue.get()
+            try:
+                await self.process(*item)
+            except Exception as e:
+                print(f"Error processing a notification: {e}", file=sys.stderr)
+            finally:
+                self.queue.task_done()
+
+    async def process(self, started, received, body):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.invalid += 1
+            return
+        if not isinstance(payload, dict):
+            self.invalid += 1
+            return
+
+        history, forward = self.processor.process(alert_records(payload, received), time.monotonic())
+        if history:
+            for sink in self.history:
+                await sink.submit(history)
+        if forward:
+            self.batch_sizes.append(len(forward))
+            for record in forward:
+                self.alerts[record['status']] += 1
+            for sink in self.sinks:
+                await sink.submit(forward)
+        self.latencies.append(time.perf_counter() - started)
+
+    @property
+    def all_sinks(self):
+        return self.sinks + self.history
+
+    async def close(self):
+        """Finish what is queued, then stop the workers and flush the sinks"""
+        await self.queue.join()
+        for worker in self.workers:
+            worker.cancel()
+        for sink in self.all_sinks:
+            await sink.close()
+
+
+class WebhookReceiver:
+    """Minimal HTTP/1.1 server for the webhook, health, metrics and alert history endpoints"""
+
+    def __init__(self, pipeline, store=None, max_body=MAX_BODY):
+        self.pipeline = pipeline
+        self.store = store
+        self.max_body = max_body
+        self.query_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='webhook-query')
+        self.query_durations = []
+        self.requests = Counter()  # (path, code) -> requests
+        self.connections = 0
+        self.registry = registry = MetricRegistry()
+        self.snapshot = SnapshotBuffer()
+        self.http_requests = registry.counter('webhook_http_requests_total', 'HTTP requests served', ('path', 'code'))
+        self.open_connections = registry.gauge('webhook_http_connections', 'Open client connections')
+        self.queue_depth = registry.gauge('webhook_queue_depth', 'Notifications waiting for a worker')
+        self.queue_capacity = registry.gauge('webhook_queue_capacity', 'Notifications the queue holds before rejecting')
+        self.accepted = registry.counter('webhook_notifications_accepted_total', 'Notifications queued')
+        self.rejected = registry.counter(
+            'webhook_notifications_rejected_total', 'Notifications refused with 503 because the queue was full'
+        )
+        self.invalid = registry.counter('webhook_notifications_invalid_total', 'Queued bodies that were not JSON objects')
+        self.alerts = registry.counter('webhook_alerts_total', 'Alerts forwarded to the notification sinks', ('status',))
+        self.suppressed = registry.counter(
+            'webhook_alerts_suppressed_total', 'Alerts not forwarded, by reason', ('reason',)
+        )
+        self.tracked = registry.gauge('webhook_alert_states', 'Alert fingerprints whose state is tracked')
+        self.flapping = registry.gauge('webhook_alerts_flapping', 'Alert fingerprints currently held back as flapping')
+        self.evictions = registry.counter(
+            'webhook_alert_state_evictions_total', 'Alert states dropped to stay within the tracking capacity'
+        )
+        self.latency = registry.histogram(
+            'webhook_ingestion_latency_seconds', 'Time from receiving a notification to handing its alerts to the sinks',
+            (), LATENCY_BUCKETS
+        )
+        self.batch_size = registry.histogram(
+            'webhook_notification_alerts', 'Alerts forwarded per notification', (), BATCH_BUCKETS
+        )
+        self.sink_pending = registry.gauge('webhook_sink_pending_records', 'Records buffered in a sink', ('sink',))
+        self.sink_written = registry.counter('webhook_sink_written_records_total', 'Records a sink wrote', ('sink',))
+        self.sink_flush = registry.histogram(
+            'webhook_sink_flush_duration_seconds', 'Time a sink took to write one batch', ('sink',), LATENCY_BUCKETS
+        )
+        self.sink_failures = registry.counter(
+            'webhook_sink_failures_total', 'Batches a sink failed to write and dropped', ('sink',)
+        )
+        self.purged = registry.counter('webhook_store_purged_events_total', 'Alert events deleted by retention')
+        self.query_duration = registry.histogram(
+            'webhook_alert_query_duration_seconds', 'Time to answer an /alerts query', (), LATENCY_BUCKETS
+        )
+
+    def render_metrics(self):
+        pipeline = self.pipeline
+        with self.registry.cycle():
+            for (path, code), count in self.requests.items():
+                self.http_requests.labels(path, code).set(count)
+            self.open_connections.set(self.connections)
+            self.queue_depth.set(pipeline.queue.qsize())
+            self.queue_capacity.set(pipeline.queue_size)
+            self.accepted.set(pipeline.accepted)
+            self.rejected.set(pipeline.rejected)
+            self.invalid.set(pipeline.invalid)
+            for status, count in pipeline.alerts.items():
+                self.alerts.labels(status).set(count)
+            processor = pipeline.processor
+            for reason, count in processor.suppressed.items():
+                self.suppressed.labels(reason).set(count)
+            self.tracked.set(len(processor.states))
+            self.flapping.set(processor.flapping)
+            self.evictions.set(processor.evictions)
+            # Histograms only see an observation when something happened
+            for histogram in (self.latency, self.batch_size, self.sink_flush, self.query_duration):
+                histogram.touch()
+            for seconds in pipeline.latencies:
+                self.latency.observe(seconds)
+            pipeline.latencies.clear()
+            for size in pipeline.batch_sizes:
+                self.batch_size.observe(size)
+            pipeline.batch_sizes.clear()
+            for sink in pipeline.all_sinks:
+                self.sink_pending.labels(sink.name).set(len(sink.pending))
+                self.sink_written.labels(sink.name).set(sink.written)
+                self.sink_failures.labels(sink.name).set(sink.failures)
+                if isinstance(sink, StoreSink):
+                    self.purged.set(sink.purged)
+                flush = self.sink_flush.labels(sink.name)
+                for seconds in sink.flush_durations:
+                    flush.observe(seconds)
+                sink.flush_durations.clear()
+            for seconds in self.query_durations:
+                self.query_duration.observe(seconds)
+            self.query_durations.clear()
+        return self.snapshot.publish(self.registry.render())
+
+    async def query_alerts(self, params):
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.query_executor, self.store.query, params)
+        except ValueError as e:
+            return 400, JSON_CONTENT_TYPE, json.dumps({'status': 'error', 'error': str(e)}).encode('utf-8'), {}
+        except sqlite3.Error as e:
+            return 503, JSON_CONTENT_TYPE, json.dumps({'status': 'error', 'error': str(e)}).encode('utf-8'), {}
+        self.query_durations.append(time.perf_counter() - start)
+        return 200, JSON_CONTENT_TYPE, json.dumps(result, separators=(',', ':')).encode('utf-8'), {}
+
+    async def route(self, method, path, query, headers, body):
+        """(status, content type, body, extra headers) for one request"""
+        if path == '/webhook':
+            if method != 'POST':
+                return 405, JSON_CONTENT_TYPE, b'{"status":"error"}', {'Allow': 'POST'}
+            if not self.pipeline.submit(body):
+                return 503, JSON_CONTENT_TYPE, b'{"status":"busy"}', {'Retry-After': '1'}
+            return 200, JSON_CONTENT_TYPE, b'{"status":"success"}', {}
+        if path == '/alerts' and self.store is not None:
+            return await self.query_alerts(query)
+        if path == '/health':
+            return 200, JSON_CONTENT_TYPE, b'{"status":"healthy"}', {}
+        if path == '/metrics':
+            snapshot = self.render_metrics()
+            if accepts_gzip(headers.get('accept-encoding')):
+                return 200, CONTENT_TYPE, snapshot.gzip_body(), {'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+            return 200, CONTENT_TYPE, snapshot.body, {'Vary': 'Accept-Encoding'}
+        return 404, JSON_CONTENT_TYPE, b'{"status":"not found"}', {}
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while await self.handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def handle_request(self, reader, writer):
+        """Serve one request; False once the connection should be closed"""
+        # readline() raises ValueError for lines beyond the stream limit
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return False
+        except ValueError:
+            await self.respond(writer, 400, JSON_CONTENT_TYPE, b'', {}, False)
+            return False
+        if not request_line:
+            return False
+
+        parts = request_line.decode('latin-1').split()
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                await self.respond(writer, 431, JSON_CONTENT_TYPE, b'', {}, False)
+                return False
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if len(parts) != 3:
+            await self.respond(writer, 400, JSON_CONTENT_TYPE, b'', {}, False)
+            return False
+        method, target, version = parts
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            await self.respond(writer, 411, JSON_CONTENT_TYPE, b'', {}, False)
+            return False
+        try:
+            length = int(headers.get('content-length', '0'))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= self.max_body:
+            await self.respond(writer, 413 if length > 0 else 400, JSON_CONTENT_TYPE, b'', {}, False)
+            return False
+        body = await reader.readexactly(length) if length else b''
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        url = urlsplit(target)
+        path = url.path
+        code, content_type, payload, extra = await self.route(method, path, parse_qs(url.query), headers, body)
+        if code == 404:
+            # Unknown paths share one label instead of one series each
+            path = 'other'
+        self.requests[path, str(code)] += 1
+        await self.respond(writer, code, content_type, payload if method != 'HEAD' else b'', extra, keep_alive,
+                           len(payload))
+        return keep_alive
+
+    @staticmethod
+    async def respond(writer, code, content_type, body, extra, keep_alive, length=None):
+        lines = [
+            f'HTTP/1.1 {code} {REASONS.get(code, "")}',
+            f'Content-Type: {content_type}',
+            f'Content-Length: {len(body) if length is None else length}',
+        ]
+        lines.extend(f'{name}: {value}' for name, value in extra.items())
+        if not keep_alive:
+            lines.append('Connection: close')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+
+async def serve(port, pipeline, store=None):
+    receiver = WebhookReceiver(pipeline, store)
+    await pipeline.start()
+    server = await asyncio.start_server(receiver.handle, '0.0.0.0', port, backlog=1024)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    print(f"[Alert-Webhook] Listening on port {port}: {pipeline.worker_count} workers, "
+          f"queue of {pipeline.queue_size}", file=sys.stderr)
+    async with server:
+        await stop.wait()
+        server.close()
+        await server.wait_closed()
+    print(f"[Alert-Webhook] Shutting down, draining {pipeline.queue.qsize()} queued notifications", file=sys.stderr)
+    await pipeline.close()
+
+
+def notification(sequence, alerts, distinct):
+    """A synthetic Alertmanager notification
+
+    Fingerprints repeat every `distinct` alerts and flip between firing and
+    resolved every fifth round, like an ongoing incident being resent.
+    """
+    items = []
+    for i in range(alerts):
+        number = (sequence * alerts + i) % distinct
+        status = 'resolved' if (sequence * alerts + i) // (distinct * 5) % 2 else 'firing'
+        labels = {'alertname': 'ContainerHighCPU', 'severity': 'warning', 'name': f'nginx-{number}'}
+        items.append({
+            'status': status,
+            'labels': labels,
+            'annotations': {'summary': f'High CPU on nginx-{number}', 'description': 'CPU usage above 80%'},
+            'startsAt': '2024-01-01T00:00:00Z',
+            'endsAt': '0001-01-01T00:00:00Z',
+            'fingerprint': f'{number:016x}',
+        })
+    return json.dumps({
+        'version': '4', 'status': 'firing', 'receiver': 'webhook', 'groupKey': '{}:{alertname="ContainerHighCPU"}',
+        'groupLabels': {'alertname': 'ContainerHighCPU'}, 'alerts': items,
+    }).encode('utf-8')
+
+
+async def generate_load(url, requests, concurrency, alerts, distinct):
+    """Send `requests` notifications over `concurrency` keep-alive connections"""
+    url = urlsplit(url)
+    host, port = url.hostname, url.port or 80
+    path = url.path or '/webhook'
+    sequence = iter(range(requests))
+    latencies = []
+    codes = Counter()
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for number in sequence:
+                body = notification(number, alerts, distinct)
+                head = (f'POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n'
+                        f'Content-Length: {len(body)}\r\n\r\n')
+                start = time.perf_counter()
+                writer.write(head.encode('latin-1') + body)
+                status = await reader.readline()
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':', 1)[1])
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+                codes[int(status.split()[1])] += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'alerts_per_request': alerts,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'alerts_per_second': round(len(latencies) * alerts / elapsed, 1),
+        'codes': dict(codes),
+        'latency_ms': {
+            quantile: round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 3)
+            for quantile, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1))
+        } if latencies else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--load', metavar='URL', help='send synthetic notifications to URL and report throughput')
+    parser.add_argument('--requests', type=int, default=10000, help='notifications to send with --load')
+    parser.add_argument('--concurrency', type=int, default=32, help='connections used by --load')
+    parser.add_argument('--alerts', type=int, default=10, help='alerts per notification with --load')
+    parser.add_argument('--distinct', type=int, default=1000, help='distinct fingerprints with --load')
+    args = parser.parse_args()
+
+    if args.load:
+        print(json.dumps(asyncio.run(generate_load(
+            args.load, args.requests, args.concurrency, args.alerts, args.distinct
+        )), indent=2))
+        return
+
+    batching = {
+        'batch_size': int(os.environ.get('WEBHOOK_BATCH_SIZE', '500')),
+        'flush_interval': float(os.environ.get('WEBHOOK_FLUSH_INTERVAL', '1')),
+    }
+    history = []
+    store = None
+    path = os.environ.get('WEBHOOK_DB', '')
+    if path:
+        store = AlertStore(path)
+        history.append(StoreSink(store, parse_duration(os.environ.get('WEBHOOK_RETENTION', '30d')), **batching))
+    processor = AlertProcessor(
+        ttl=float(os.environ.get('WEBHOOK_DEDUP_TTL', '300')),
+        flap_transitions=int(os.environ.get('WEBHOOK_FLAP_TRANSITIONS', '4')),
+        flap_window=float(os.environ.get('WEBHOOK_FLAP_WINDOW', '600')),
+        rate_limits=parse_rate_limits(os.environ.get('WEBHOOK_RATE_LIMITS', '')),
+    )
+    pipeline = AlertPipeline(
+        [JSONLogSink(os.environ.get('WEBHOOK_LOG', '-'), **batching)],
+        history,
+        queue_size=int(os.environ.get('WEBHOOK_QUEUE_SIZE', '10000')),
+        workers=int(os.environ.get('WEBHOOK_WORKERS', '4')),
+        processor=processor,
+    )
+    asyncio.run(serve(int(os.environ.get('WEBHOOK_PORT', '5001')), pipeline, store))
+
+
+if __name__ == '__main__':
+    main()
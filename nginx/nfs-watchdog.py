@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""NFS mount watchdog for the nginx replicas
+
+    python3 nfs-watchdog.py            watch MOUNT_POINT, remount when stale
+    python3 nfs-watchdog.py --test     measure detection latency on a fake mount
+
+Every WATCHDOG_INTERVAL seconds a forked child stats the mount, reads its
+first directory entry and rewrites this host's heartbeat file on it; a
+child that misses WATCHDOG_DEADLINE is killed.  WATCHDOG_FAILURES failed
+probes in a row mark the mount stale, and it is force-unmounted and
+mounted again, backing off exponentially while that keeps failing.
+Changes to the mount table wake the watchdog through poll() on
+/proc/self/mountinfo and are probed at once.  State is served on
+WATCHDOG_PORT (/metrics, and /health which answers 503 unless healthy).
+
+Standalone on purpose: the nginx image has python3 but not the exporter.
+"""
+
+import argparse
+import errno
+import json
+import os
+import select
+import signal
+import socket
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MOUNTINFO_PATH = '/proc/self/mountinfo'
+
+STATES = ('healthy', 'stale', 'unmounted')
+
+# Probe durations on a LAN are well under the deadline
+PROBE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# How often a running umount/mount is checked for having exited
+COMMAND_POLL = 0.05
+
+
+def log(message):
+    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message}", flush=True)
+
+
+def mount_entry(mount_point, path=MOUNTINFO_PATH):
+    """(fstype, source) of the mount at mount_point, or None; never touches the mount itself"""
+    entry = None
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.split()
+            try:
+                separator = fields.index('-', 6)
+            except ValueError:
+                continue
+            mountpoint = fields[4].replace('\\040', ' ')
+            if mountpoint == mount_point and separator + 2 < len(fields):
+                # The last entry wins when mounts are stacked
+                entry = (fields[separator + 1], fields[separator + 2])
+    return entry
+
+
+def probe(mount_point, heartbeat):
+    """What the forked child does; raises OSError when the mount is broken"""
+    os.stat(mount_point)
+    with os.scandir(mount_point) as entries:
+        next(entries, None)
+    if heartbeat:
+        fd = os.open(heartbeat, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, b'%d\n' % time.time())
+        finally:
+            os.close(fd)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, lines):
+        for bound, count in zip(self.buckets, self.counts):
+            lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum {self.sum}')
+        lines.append(f'{name}_count {self.count}')
+
+
+class Watchdog:
+    """Probe one NFS mount, track its state and repair it
+
+    The probe runs in a forked child so a hung server only ever blocks the
+    child: it is killed at the deadline, and while a killed child is still
+    stuck in the kernel no other one is forked.  `remount=False` only
+    watches, and `check_mounted=False` skips the mount table, which is
+    what the self-test does on a plain directory.
+    """
+
+    def __init__(self, mount_point, source=None, options='soft,timeo=20,retrans=1,nolock,vers=3', interval=1.0,
+                 deadline=0.5, failures=2, backoff=1.0, max_backoff=60.0, remount=True, check_mounted=True,
+                 heartbeat=True):
+        self.mount_point = mount_point
+        self.source = source  # server:/export
+        self.options = options
+        self.interval = interval
+        self.deadline = deadline
+        self.failure_threshold = failures
+        self.backoff_base = backoff
+        self.max_backoff = max_backoff
+        self.remount_enabled = remount
+        self.check_mounted = check_mounted
+        self.heartbeat = os.path.join(mount_point, f'.nfs-watchdog-{socket.gethostname()}') if heartbeat else None
+
+        self.state = 'unmounted' if check_mounted else 'healthy'
+        self.stuck_pid = None
+        self.stuck_commands = []  # killed umount/mount processes not reaped yet
+        self.failures = 0
+        self.last_healthy = time.monotonic()  # end of the last good probe
+        self.backoff = 0.0
+        self.next_remount = 0.0
+        self.stopped = threading.Event()
+        # Written by stop() to wake the main loop out of poll()
+        self.wakeup = os.pipe()
+
+        self.lock = threading.Lock()
+        self.probes = 0
+        self.probe_failures = {}  # reason -> probes
+        self.probe_seconds = Histogram(PROBE_BUCKETS)
+        self.remounts = {'success': 0, 'failure': 0}
+        self.table_changes = 0
+        self.detection_latency = None
+        self.state_changed = threading.Condition(self.lock)
+
+    # -- probing ---------------------------------------------------------
+
+    def reap_stuck(self):
+        """True while the last killed child has not exited yet"""
+        if self.stuck_pid is None:
+            return False
+        try:
+            pid, _ = os.waitpid(self.stuck_pid, os.WNOHANG)
+        except ChildProcessError:
+            pid = self.stuck_pid
+        if pid == 0:
+            return True
+        self.stuck_pid = None
+        return False
+
+    def run_probe(self):
+        """(seconds, None) or (None, reason)"""
+        if self.reap_stuck():
+            return None, 'stuck'
+
+        read_fd, write_fd = os.pipe()
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            # Child: only syscalls from here, and whatever happens it must
+            # _exit rather than return into the parent's code
+            try:
+                os.close(read_fd)
+                code = 0
+                try:
+                    probe(self.mount_point, self.heartbeat)
+                except OSError as e:
+                    code = e.errno or 1
+                os.write(write_fd, b'%d' % code)
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        try:
+            ready, _, _ = select.select([read_fd], [], [], self.deadline)
+            if not ready:
+                os.kill(pid, signal.SIGKILL)
+                self.stuck_pid = pid
+                self.reap_stuck()
+                return None, 'timeout'
+            data = os.read(read_fd, 16)
+            seconds = time.perf_counter() - start
+        finally:
+            os.close(read_fd)
+        os.waitpid(pid, 0)
+
+        code = int(data or b'-1')
+        if code == 0:
+            return seconds, None
+        return None, errno.errorcode.get(code, 'error')
+
+    def mounted(self):
+        if not self.check_mounted:
+            return True
+        try:
+            entry = mount_entry(self.mount_point)
+        except OSError as e:
+            log(f"Cannot read the mount table: {e}")
+            return False
+        return entry is not None and entry[0].startswith('nfs')
+
+    def set_state(self, state):
+        with self.lock:
+            if state != self.state:
+                log(f"NFS {self.state} -> {state}")
+                self.state = state
+                self.state_changed.notify_all()
+
+    def check(self):
+        if not self.mounted():
+            self.set_state('unmounted')
+            self.failures = 0
+            self.repair()
+            return
+
+        seconds, reason = self.run_probe()
+        now = time.monotonic()
+        with self.lock:
+            self.probes += 1
+            if seconds is not None:
+                self.probe_seconds.observe(seconds)
+            else:
+                self.probe_failures[reason] = self.probe_failures.get(reason, 0) + 1
+
+        if seconds is not None:
+            self.failures = 0
+            self.backoff = 0.0
+            self.last_healthy = now
+            self.set_state('healthy')
+            return
+
+        self.failures += 1
+        if self.failures < self.failure_threshold:
+            log(f"NFS probe failed ({reason}), confirming")
+            return
+        if self.state != 'stale':
+            with self.lock:
+                self.detection_latency = now - self.last_healthy
+            log(f"NFS stale mount detected ({reason}) {self.detection_latency:.2f}s after the last good probe")
+            self.set_state('stale')
+        self.repair()
+
+    # -- repair ----------------------------------------------------------
+
+    def command(self, arguments, timeout):
+        """Whether the command succeeded within timeout
+
+        An overrunning command is killed but never waited for: umount on a
+        dead server can sit in the kernel after SIGKILL, and waiting would
+        hang the watchdog with it.  It is reaped on a later call.
+        """
+        self.stuck_commands = [process for process in self.stuck_commands if process.poll() is None]
+        try:
+            process = subprocess.Popen(arguments, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            log(f"{' '.join(arguments)} failed: {e}")
+            return False
+        deadline = time.monotonic() + timeout
+        while process.poll() is None:
+            if time.monotonic() >= deadline:
+                process.kill()
+                if process.poll() is None:
+                    self.stuck_commands.append(process)
+                log(f"{' '.join(arguments)} did not finish in {timeout}s, killed")
+                return False
+            time.sleep(COMMAND_POLL)
+        return process.returncode == 0
+
+    def server_reachable(self):
+        host = self.source.split(':')[0]
+        try:
+            socket.create_connection((host, 2049), timeout=1).close()
+            return True
+        except OSError:
+            return False
+
+    def repair(self):
+        """Unmount and mount again, unless still backing off from the last attempt"""
+        now = time.monotonic()
+        if not self.remount_enabled or not self.source or now < self.next_remount:
+            return
+
+        if not self.server_reachable():
+            log(f"NFS server {self.source.split(':')[0]} is not reachable on port 2049")
+            ok = False
+        else:
+            if self.state == 'stale':
+                # A forced unmount can hang on a dead server; the lazy one cannot
+                if not self.command(['umount', '-f', self.mount_point], 5):
+                    self.command(['umount', '-l', self.mount_point], 5)
+            ok = self.command(['mount', '-t', 'nfs', '-o', self.options, self.source, self.mount_point], 10)
+
+        with self.lock:
+            self.remounts['success' if ok else 'failure'] += 1
+        if ok:
+            log(f"NFS mounted {self.source} on {self.mount_point}")
+            self.failures = 0
+            self.backoff = 0.0
+            self.next_remount = 0.0
+        else:
+            self.backoff = min(self.max_backoff, self.backoff * 2 or self.backoff_base)
+            self.next_remount = time.monotonic() + self.backoff
+            log(f"NFS remount failed, next attempt in {self.backoff:.0f}s")
+
+    # -- main loop -------------------------------------------------------
+
+    def run(self):
+        poller = select.poll()
+        poller.register(self.wakeup[0], select.POLLIN)
+        table = None
+        if self.check_mounted:
+            # The kernel flags mountinfo with POLLPRI/POLLERR whenever the mount table changes
+            table = open(MOUNTINFO_PATH, 'rb')
+            table.read()
+            poller.register(table, select.POLLPRI | select.POLLERR)
+
+        next_probe = time.monotonic()
+        try:
+            while not self.stopped.is_set():
+                wait = max(0.0, next_probe - time.monotonic())
+                events = poller.poll(wait * 1000)
+                if self.stopped.is_set():
+                    break
+                if events:
+                    table.seek(0)
+                    table.read()
+                    with self.lock:
+                        self.table_changes += 1
+                    log("Mount table changed")
+                    next_probe = time.monotonic()
+                if time.monotonic() < next_probe:
+                    continue
+                self.check()
+                # A failed probe is confirmed straight away instead of a full interval later
+                delay = self.interval if self.failures == 0 or self.state == 'stale' else 0
+                next_probe = time.monotonic() + delay
+        finally:
+            if table is not None:
+                table.close()
+
+    def stop(self):
+        self.stopped.set()
+        os.write(self.wakeup[1], b'x')
+
+    def render(self):
+        with self.lock:
+            lines = [
+                '# HELP nfs_watchdog_state Current mount state (1 for the active state)',
+                '# TYPE nfs_watchdog_state gauge',
+            ]
+            lines.extend(f'nfs_watchdog_state{{state="{state}"}} {int(state == self.state)}' for state in STATES)
+            lines += [
+                '# HELP nfs_watchdog_probe_seconds Duration of successful mount probes',
+                '# TYPE nfs_watchdog_probe_seconds histogram',
+            ]
+            self.probe_seconds.render('nfs_watchdog_probe_seconds', lines)
+            lines += [
+                '# HELP nfs_watchdog_probes_total Mount probes run',
+                '# TYPE nfs_watchdog_probes_total counter',
+                f'nfs_watchdog_probes_total {self.probes}',
+                '# HELP nfs_watchdog_probe_failures_total Failed mount probes by reason',
+                '# TYPE nfs_watchdog_probe_failures_total counter',
+            ]
+            lines.extend(f'nfs_watchdog_probe_failures_total{{reason="{reason}"}} {count}'
+                         for reason, count in sorted(self.probe_failures.items()))
+            lines += [
+                '# HELP nfs_watchdog_probe_stuck A killed probe is still blocked in the kernel (1=stuck)',
+                '# TYPE nfs_watchdog_probe_stuck gauge',
+                f'nfs_watchdog_probe_stuck {int(self.stuck_pid is not None)}',
+                '# HELP nfs_watchdog_remounts_total Remount attempts by result',
+                '# TYPE nfs_watchdog_remounts_total counter',
+            ]
+            lines.extend(f'nfs_watchdog_remounts_total{{result="{result}"}} {count}'
+                         for result, count in self.remounts.items())
+            lines += [
+                '# HELP nfs_watchdog_backoff_seconds Wait before the next remount attempt',
+                '# TYPE nfs_watchdog_backoff_seconds gauge',
+                f'nfs_watchdog_backoff_seconds {self.backoff}',
+                '# HELP nfs_watchdog_mount_table_changes_total Mount table changes seen',
+                '# TYPE nfs_watchdog_mount_table_changes_total counter',
+                f'nfs_watchdog_mount_table_changes_total {self.table_changes}',
+                '# HELP nfs_watchdog_last_healthy_age_seconds Seconds since the last good probe',
+                '# TYPE nfs_watchdog_last_healthy_age_seconds gauge',
+                f'nfs_watchdog_last_healthy_age_seconds {time.monotonic() - self.last_healthy}',
+            ]
+            if self.detection_latency is not None:
+                lines += [
+                    '# HELP nfs_watchdog_detection_seconds Time from the last good probe to declaring the mount stale',
+                    '# TYPE nfs_watchdog_detection_seconds gauge',
+                    f'nfs_watchdog_detection_seconds {self.detection_latency}',
+                ]
+        return '\n'.join(lines) + '\n'
+
+
+class WatchdogHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.partition('?')[0]
+        if path == '/metrics':
+            self.send(200, CONTENT_TYPE, self.server.watchdog.render().encode('utf-8'))
+        elif path == '/health':
+            state = self.server.watchdog.state
+            self.send(200 if state == 'healthy' else 503, 'application/json',
+                      json.dumps({'status': state}).encode('utf-8'))
+        else:
+            self.send(404, 'text/plain', b'')
+
+    def send(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def self_test(rounds, interval, deadline, failures):
+    """Detection latency against a directory whose heartbeat file is swapped for a FIFO
+
+    Opening a FIFO for writing blocks until a reader shows up, which is
+    what a hung NFS server does to the probe.
+    """
+    directory = tempfile.mkdtemp(prefix='nfs-watchdog-')
+    watchdog = Watchdog(directory, interval=interval, deadline=deadline, failures=failures, remount=False,
+                        check_mounted=False)
+    thread = threading.Thread(target=watchdog.run, daemon=True)
+    thread.start()
+
+    def wait_for(state, timeout=30):
+        with watchdog.lock:
+            if not watchdog.state_changed.wait_for(lambda: watchdog.state == state, timeout):
+                raise SystemExit(f"watchdog never became {state}")
+        return time.monotonic()
+
+    latencies = []
+    try:
+        for _ in range(rounds):
+            wait_for('healthy')
+            time.sleep(interval * 1.5)
+            fifo = watchdog.heartbeat + '.fifo'
+            os.mkfifo(fifo)
+            os.replace(fifo, watchdog.heartbeat)
+            frozen = time.monotonic()
+            latencies.append(wait_for('stale') - frozen)
+            os.unlink(watchdog.heartbeat)
+    finally:
+        watchdog.stop()
+        thread.join(interval + deadline + 1)
+
+    return {
+        'rounds': rounds,
+        'interval': interval,
+        'deadline': deadline,
+        'failures': failures,
+        'detection_seconds': {
+            'min': round(min(latencies), 3),
+            'median': round(statistics.median(latencies), 3),
+            'max': round(max(latencies), 3),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--test', action='store_true', help='measure stale detection latency on a fake mount')
+    parser.add_argument('--rounds', type=int, default=5, help='freezes measured by --test')
+    args = parser.parse_args()
+
+    interval = float(os.environ.get('WATCHDOG_INTERVAL', '1'))
+    deadline = float(os.environ.get('WATCHDOG_DEADLINE', '0.5'))
+    failures = int(os.environ.get('WATCHDOG_FAILURES', '2'))
+
+    if args.test:
+        print(json.dumps(self_test(args.rounds, interval, deadline, failures), indent=2))
+        return
+
+    server = os.environ.get('NFS_SERVER_IP', '10.95.137.10')
+    watchdog = Watchdog(
+        os.environ.get('MOUNT_POINT', '/var/www/html/nfs'),
+        source=f"{server}:{os.environ.get('NFS_EXPORT_PATH', '/nfs/shared')}",
+        options=os.environ.get('NFS_MOUNT_OPTIONS', 'soft,timeo=20,retrans=1,nolock,vers=3'),
+        interval=interval,
+        deadline=deadline,
+        failures=failures,
+        max_backoff=float(os.environ.get('WATCHDOG_MAX_BACKOFF', '60')),
+    )
+
+    port = int(os.environ.get('WATCHDOG_PORT', '9172'))
+    http = ThreadingHTTPServer(('0.0.0.0', port), WatchdogHandler)
+    http.daemon_threads = True
+    http.watchdog = watchdog
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: watchdog.stop())
+    log(f"NFS watchdog on {watchdog.mount_point}: probe every {interval}s within {deadline}s, "
+        f"metrics on port {port}")
+    try:
+        watchdog.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -52,10 +52,11 @@ else
     echo "NFS server ${NFS_SERVER} is not reachable. Running without NFS mount."
 fi
 
-# NFS 모니터링 백그라운드 실행 (옵션)
-if [ -f /nfs-monitor.sh ]; then
-    echo "NFS 모니터링 스크립트 시작..."
-    /nfs-monitor.sh >> /var/log/nfs-monitor.log 2>&1 &
+# NFS 워치독 백그라운드 실행 (stale 마운트 감지/재마운트, 메트릭 :9172)
+if [ -f /nfs-watchdog.py ]; then
+    echo "NFS 워치독 시작..."
+    NFS_SERVER_IP=${NFS_SERVER} NFS_EXPORT_PATH=${NFS_PATH} MOUNT_POINT=${MOUNT_POINT} \
+        python3 /nfs-watchdog.py >> /var/log/nfs-watchdog.log 2>&1 &
 fi
 
 # Nginx 시작
@@ -20,16 +20,10 @@ if [ -f nginx/start.sh ]; then
     echo "✅ nginx/start.sh 수정 완료"
 fi
 
-# multi-exporter.py 수정
-if [ -f multi-exporter.py ]; then
-    sed -i "s/self.nfs_server = \"$OLD_IP\"/self.nfs_server = \"$NEW_IP\"/g" multi-exporter.py
-    echo "✅ multi-exporter.py 수정 완료"
-fi
-
-# nfs-monitor.py 수정 (있는 경우)
-if [ -f nfs-monitor.py ]; then
-    sed -i "s/self.nfs_server = \"$OLD_IP\"/self.nfs_server = \"$NEW_IP\"/g" nfs-monitor.py
-    echo "✅ nfs-monitor.py 수정 완료"
+# exporter NFS 컬렉터 수정 (multi-exporter.py, nfs-monitor.py 공용)
+if [ -f exporter/collectors/nfs.py ]; then
+    sed -i "s/self.nfs_server = \"$OLD_IP\"/self.nfs_server = \"$NEW_IP\"/g" exporter/collectors/nfs.py
+    echo "✅ exporter/collectors/nfs.py 수정 완료"
 fi
 
 echo ""